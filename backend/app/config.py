@@ -4,80 +4,111 @@ Uses environment variables with sensible defaults.
 """
 
 import os
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file; reload/worker children inherit
+# the parent's environment, so they skip re-parsing it
+if not os.environ.get("ENV_LOADED"):
+    load_dotenv()
+    os.environ["ENV_LOADED"] = "1"
 
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Snapshot of the environment, taken once after .env has been applied
+_env = os.environ.copy()
 
+
+def _env_bool(key: str, default: str) -> bool:
+    """Read a boolean flag from the environment snapshot."""
+    return _env.get(key, default).lower() == "true"
+
+
+@dataclass(frozen=True)
 class Settings:
     """Application settings loaded from environment variables."""
     
     # Application
     APP_NAME: str = "WiFi Tracker System"
     APP_VERSION: str = "1.0.0"
-    DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
+    DEBUG: bool = _env_bool("DEBUG", "False")
     
     # Server
-    HOST: str = os.getenv("HOST", "0.0.0.0")
-    PORT: int = int(os.getenv("PORT", "8000"))
+    HOST: str = _env.get("HOST", "0.0.0.0")
+    PORT: int = int(_env.get("PORT", "8000"))
     
     # Database (MySQL/XAMPP)
-    DB_HOST: str = os.getenv("DB_HOST", "localhost")
-    DB_PORT: int = int(os.getenv("DB_PORT", "3306"))
-    DB_USER: str = os.getenv("DB_USER", "root")
-    DB_PASSWORD: str = os.getenv("DB_PASSWORD", "")
-    DB_NAME: str = os.getenv("DB_NAME", "wifi_tracker")
+    DB_HOST: str = _env.get("DB_HOST", "localhost")
+    DB_PORT: int = int(_env.get("DB_PORT", "3306"))
+    DB_USER: str = _env.get("DB_USER", "root")
+    DB_PASSWORD: str = _env.get("DB_PASSWORD", "")
+    DB_NAME: str = _env.get("DB_NAME", "wifi_tracker")
+    DB_POOL_SIZE: int = int(_env.get("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(_env.get("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(_env.get("DB_POOL_TIMEOUT", "30"))
+    # Seconds before a pooled connection is replaced; keep below MySQL wait_timeout
+    DB_POOL_RECYCLE: int = int(_env.get("DB_POOL_RECYCLE", "1800"))
+    SQL_ECHO: bool = _env_bool("SQL_ECHO", "False")
     
-    @property
+    @cached_property
     def DATABASE_URL(self) -> str:
-        """Construct MySQL database URL."""
+        """Construct MySQL database URL (built once per settings instance)."""
         return f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
     
     # Redis (optional caching)
-    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
-    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
-    REDIS_DB: int = int(os.getenv("REDIS_DB", "0"))
-    REDIS_ENABLED: bool = os.getenv("REDIS_ENABLED", "False").lower() == "true"
+    REDIS_HOST: str = _env.get("REDIS_HOST", "localhost")
+    REDIS_PORT: int = int(_env.get("REDIS_PORT", "6379"))
+    REDIS_DB: int = int(_env.get("REDIS_DB", "0"))
+    REDIS_ENABLED: bool = _env_bool("REDIS_ENABLED", "False")
     
     # JWT Authentication
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "wifi-tracker-super-secret-key-change-in-production")
+    SECRET_KEY: str = _env.get("SECRET_KEY", "wifi-tracker-super-secret-key-change-in-production")
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
-    REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(_env.get("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(_env.get("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
     
     # Network Scanning
-    DEFAULT_NETWORK_RANGE: str = os.getenv("NETWORK_RANGE", "192.168.1.0/24")
-    SCAN_TIMEOUT: int = int(os.getenv("SCAN_TIMEOUT", "3"))
-    SCAN_INTERVAL_SECONDS: int = int(os.getenv("SCAN_INTERVAL", "300"))
-    MAX_CONCURRENT_SCANS: int = int(os.getenv("MAX_CONCURRENT_SCANS", "50"))
+    DEFAULT_NETWORK_RANGE: str = _env.get("NETWORK_RANGE", "192.168.1.0/24")
+    SCAN_TIMEOUT: int = int(_env.get("SCAN_TIMEOUT", "3"))
+    SCAN_INTERVAL_SECONDS: int = int(_env.get("SCAN_INTERVAL", "300"))
+    MAX_CONCURRENT_SCANS: int = int(_env.get("MAX_CONCURRENT_SCANS", "50"))
     
     # Machine Learning
     ML_MODEL_PATH: Path = BASE_DIR / "data" / "models"
-    ANOMALY_THRESHOLD: float = float(os.getenv("ANOMALY_THRESHOLD", "0.7"))
-    MIN_TRAINING_SAMPLES: int = int(os.getenv("MIN_TRAINING_SAMPLES", "100"))
+    ANOMALY_THRESHOLD: float = float(_env.get("ANOMALY_THRESHOLD", "0.7"))
+    MIN_TRAINING_SAMPLES: int = int(_env.get("MIN_TRAINING_SAMPLES", "100"))
+    IF_N_ESTIMATORS: int = int(_env.get("IF_N_ESTIMATORS", "64"))
+    IF_MAX_SAMPLES: int = int(_env.get("IF_MAX_SAMPLES", "128"))
+    IF_MAX_FEATURES: int = int(_env.get("IF_MAX_FEATURES", "8"))
     
     # Alerting
-    ALERT_NEW_DEVICES: bool = os.getenv("ALERT_NEW_DEVICES", "True").lower() == "true"
-    ALERT_SUSPICIOUS: bool = os.getenv("ALERT_SUSPICIOUS", "True").lower() == "true"
-    EMAIL_ENABLED: bool = os.getenv("EMAIL_ENABLED", "False").lower() == "true"
-    SMTP_HOST: str = os.getenv("SMTP_HOST", "smtp.gmail.com")
-    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "587"))
-    SMTP_USER: str = os.getenv("SMTP_USER", "")
-    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD", "")
-    ALERT_EMAIL: str = os.getenv("ALERT_EMAIL", "")
-    WEBHOOK_URL: Optional[str] = os.getenv("WEBHOOK_URL", None)
+    ALERT_NEW_DEVICES: bool = _env_bool("ALERT_NEW_DEVICES", "True")
+    ALERT_SUSPICIOUS: bool = _env_bool("ALERT_SUSPICIOUS", "True")
+    EMAIL_ENABLED: bool = _env_bool("EMAIL_ENABLED", "False")
+    SMTP_HOST: str = _env.get("SMTP_HOST", "smtp.gmail.com")
+    SMTP_PORT: int = int(_env.get("SMTP_PORT", "587"))
+    SMTP_USER: str = _env.get("SMTP_USER", "")
+    SMTP_PASSWORD: str = _env.get("SMTP_PASSWORD", "")
+    ALERT_EMAIL: str = _env.get("ALERT_EMAIL", "")
+    WEBHOOK_URL: Optional[str] = _env.get("WEBHOOK_URL", None)
+    # Combine alerts raised together into one "wifi_tracker_alerts" POST;
+    # off keeps one "wifi_tracker_alert" POST per alert
+    WEBHOOK_BATCH: bool = _env_bool("WEBHOOK_BATCH", "False")
     
     # CORS
-    CORS_ORIGINS: list = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000,http://localhost:8080").split(",")
+    CORS_ORIGINS: Tuple[str, ...] = tuple(
+        _env.get("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000,http://localhost:8080,null").split(",")
+    )
+    
+    # Seconds polled stats endpoints reuse a computed response (0 disables)
+    STATS_CACHE_TTL: float = float(_env.get("STATS_CACHE_TTL", "5"))
     
     # Logging
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL: str = _env.get("LOG_LEVEL", "INFO")
     LOG_FILE: Path = BASE_DIR / "logs" / "wifi_tracker.log"
     
     # OUI Database for MAC vendor lookup
@@ -90,8 +121,9 @@ settings = Settings()
 
 
 # Ensure required directories exist
+@lru_cache(maxsize=None)
 def init_directories():
-    """Create required directories if they don't exist."""
+    """Create required directories if they don't exist (runs once per process)."""
     directories = [
         settings.ML_MODEL_PATH,
         settings.LOG_FILE.parent,
@@ -99,6 +131,3 @@ def init_directories():
     ]
     for directory in directories:
         directory.mkdir(parents=True, exist_ok=True)
-
-
-init_directories()
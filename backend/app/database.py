@@ -3,13 +3,15 @@ Database connection and session management using SQLAlchemy.
 Supports MySQL through XAMPP.
 """
 
-from sqlalchemy import create_engine, event, text
+from sqlalchemy import create_engine, event, insert, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Dict, Generator, List, Optional
+import asyncio
 import logging
+import time
 
 from app.config import settings
 
@@ -19,13 +21,24 @@ logger = logging.getLogger(__name__)
 engine = create_engine(
     settings.DATABASE_URL,
     poolclass=QueuePool,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=1800,  # Recycle connections after 30 minutes
-    echo=settings.DEBUG,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,  # Max connection age in seconds, below the server's wait_timeout
+    pool_pre_ping=True,  # Detect stale connections on checkout
+    pool_use_lifo=True,  # Reuse the warmest connection; idle overflow ages out
+    echo=settings.SQL_ECHO,  # Statement logging is opt-in, independent of DEBUG
 )
 
+# Rows per executemany round-trip in bulk_insert
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Cached result of the last connectivity probe, served to /health
+DB_HEALTH_TTL_SECONDS = 1.0
+_db_health_status: Optional[bool] = None
+_db_health_checked_at = 0.0
+_db_health_refresh: Optional[asyncio.Task] = None
+
 # Session factory
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -71,6 +84,23 @@ def get_db_context() -> Generator[Session, None, None]:
         db.close()
 
 
+def bulk_insert(
+    db: Session,
+    model,
+    rows: List[Dict[str, Any]],
+    batch_size: int = BULK_INSERT_BATCH_SIZE
+) -> int:
+    """
+    Insert many rows with Core executemany, bypassing the ORM unit of work.
+    PyMySQL rewrites each batch into a single multi-row INSERT. All rows must
+    share the same keys; Python-side column defaults still apply.
+    """
+    statement = insert(model.__table__)
+    for start in range(0, len(rows), batch_size):
+        db.execute(statement, rows[start:start + batch_size])
+    return len(rows)
+
+
 def init_db():
     """
     Initialize database tables.
@@ -78,7 +108,7 @@ def init_db():
     """
     try:
         # Import all models to ensure they're registered
-        from app.models import user, device, scan_result, alert, ml_prediction
+        from app.models import user, device, scan_result, alert, ml_prediction, counter
         
         Base.metadata.create_all(bind=engine)
         logger.info("Database tables initialized successfully")
@@ -101,6 +131,31 @@ def check_db_connection() -> bool:
         return False
 
 
+async def _refresh_db_health():
+    """Run a connectivity probe off the event loop and cache the result."""
+    global _db_health_status, _db_health_checked_at
+    _db_health_status = await asyncio.to_thread(check_db_connection)
+    _db_health_checked_at = time.monotonic()
+
+
+async def get_cached_db_health() -> bool:
+    """
+    Return database connectivity using stale-while-revalidate caching.
+    The first call waits for a real probe; afterwards the cached value is
+    returned immediately and at most one background refresh runs once it
+    is older than DB_HEALTH_TTL_SECONDS.
+    """
+    global _db_health_refresh
+    
+    if _db_health_status is None:
+        await _refresh_db_health()
+    elif time.monotonic() - _db_health_checked_at > DB_HEALTH_TTL_SECONDS:
+        if _db_health_refresh is None or _db_health_refresh.done():
+            _db_health_refresh = asyncio.create_task(_refresh_db_health())
+    
+    return _db_health_status
+
+
 # Event listener for connection debugging
 @event.listens_for(engine, "connect")
 def on_connect(dbapi_connection, connection_record):
@@ -3,14 +3,16 @@ WiFi Tracker System - FastAPI Main Application
 """
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
+from anyio import to_thread
 import logging
 
-from app.config import settings
-from app.database import init_db, check_db_connection
+from app.config import settings, init_directories
+from app.database import init_db, check_db_connection, get_cached_db_health
 from app.utils.logger import setup_logging, get_logger
+from app.utils.cors import CachedCORSMiddleware
+from app.utils.serialization import ORJSON_AVAILABLE
 from app.services.notification import notification_service
 
 from app.routers import (
@@ -30,31 +32,40 @@ async def lifespan(app: FastAPI):
     """Application lifespan events."""
     logger.info("Starting WiFi Tracker System...")
     
+    init_directories()
+    
+    # Sync DB-bound handlers run in anyio's thread pool; size it to the
+    # connection pool so workers are not left waiting on each other
+    to_thread.current_default_thread_limiter().total_tokens = (
+        settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW
+    )
+    
     if check_db_connection():
         logger.info("Database connection successful")
         init_db()
     else:
         logger.error("Database connection failed!")
     
+    notification_service.start()
+    
     yield
     
     logger.info("Shutting down WiFi Tracker System...")
+    await notification_service.close()
 
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="AI-based WiFi device tracking and monitoring system",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
-# CORS configuration - allow all origins for development (file:// has null origin)
+# CORS configuration - origins come from CORS_ORIGINS ("null" covers file://, "*" allows all)
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins including file:// (null origin)
-    allow_credentials=False,  # Must be False when allow_origins=["*"]
-    allow_methods=["*"],
-    allow_headers=["*"],
+    CachedCORSMiddleware,
+    allow_origins=settings.CORS_ORIGINS,
 )
 
 
@@ -88,7 +99,7 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    db_status = check_db_connection()
+    db_status = await get_cached_db_health()
     return {
         "status": "healthy" if db_status else "unhealthy",
         "database": "connected" if db_status else "disconnected"
@@ -1,15 +1,35 @@
 """
 Machine Learning package for anomaly detection.
+
+Submodules are imported lazily (PEP 562) so that importing ``app.ml`` does
+not pull in scikit-learn or PyTorch until a detector is actually requested.
 """
 
-from app.ml.feature_extractor import FeatureExtractor
-from app.ml.isolation_forest import IsolationForestDetector
-from app.ml.autoencoder import AutoencoderDetector
-from app.ml.detector import AnomalyDetector
+from importlib import import_module
+
+_LAZY_ATTRS = {
+    "FeatureExtractor": "app.ml.feature_extractor",
+    "DeviceColumns": "app.ml.feature_extractor",
+    "IsolationForestDetector": "app.ml.isolation_forest",
+    "AutoencoderDetector": "app.ml.autoencoder",
+    "AnomalyDetector": "app.ml.detector",
+    "get_anomaly_detector": "app.ml.detector",
+}
 
 __all__ = [
     "FeatureExtractor",
+    "DeviceColumns",
     "IsolationForestDetector",
     "AutoencoderDetector",
-    "AnomalyDetector"
+    "AnomalyDetector",
+    "get_anomaly_detector"
 ]
+
+
+def __getattr__(name):
+    module_path = _LAZY_ATTRS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module_path), name)
+    globals()[name] = value
+    return value
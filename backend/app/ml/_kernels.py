@@ -0,0 +1,81 @@
+"""
+Numerical kernels for single-sample feature extraction and anomaly scoring.
+
+Numba is optional: when it is not installed the kernels run as plain NumPy.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit."""
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def mlp_reconstruction_errors(X, mean, std, weights, biases):
+    """
+    Normalize X and return the per-row MSE of an MLP autoencoder.
+
+    Args:
+        X: Raw feature matrix (n_samples, n_features), float32
+        mean: Per-feature mean used for z-score normalization
+        std: Per-feature std used for z-score normalization
+        weights: Tuple of (in_dim, out_dim) weight matrices, one per layer
+        biases: Tuple of bias vectors, one per layer
+
+    Returns:
+        Reconstruction error per sample
+    """
+    h = (X - mean) / std
+    z = h
+    n_layers = len(weights)
+    for i in range(n_layers):
+        z = z @ weights[i] + biases[i]
+        if i < n_layers - 1:
+            z = np.maximum(z, np.float32(0.0))
+
+    n_samples, n_features = h.shape
+    errors = np.empty(n_samples, dtype=np.float32)
+    for r in range(n_samples):
+        acc = np.float32(0.0)
+        for c in range(n_features):
+            d = z[r, c] - h[r, c]
+            acc += d * d
+        errors[r] = acc / n_features
+    return errors
+
+
+@njit(cache=True, fastmath=True)
+def norm_entropy(values, num_bins):
+    """
+    Shannon entropy of integer values in [0, num_bins), normalized to [0, 1].
+    
+    Args:
+        values: 1-D integer array of bin indices
+        num_bins: Number of possible bins
+        
+    Returns:
+        Entropy divided by log2(num_bins)
+    """
+    n = values.shape[0]
+    if n == 0 or num_bins < 2:
+        return 0.0
+    
+    counts = np.zeros(num_bins, dtype=np.int64)
+    for i in range(n):
+        counts[values[i]] += 1
+    
+    entropy = 0.0
+    for b in range(num_bins):
+        if counts[b] > 0:
+            p = counts[b] / n
+            entropy -= p * np.log2(p)
+    return entropy / np.log2(num_bins)
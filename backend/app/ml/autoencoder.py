@@ -7,22 +7,47 @@ from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 from datetime import datetime
 import logging
+import threading
 
 try:
     import torch
     import torch.nn as nn
+    import torch.nn.functional as F
     import torch.optim as optim
     from torch.utils.data import DataLoader, TensorDataset
     TORCH_AVAILABLE = True
 except ImportError:
     TORCH_AVAILABLE = False
 
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
 from app.config import settings
+from app.ml._kernels import mlp_reconstruction_errors
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class FusedLinearReLU(nn.Module):
+    """Linear layer with an in-place ReLU and train-only dropout."""
+    
+    def __init__(self, in_features: int, out_features: int, dropout: float = 0.0):
+        super().__init__()
+        self.linear = nn.Linear(in_features, out_features)
+        self.dropout = dropout
+    
+    def forward(self, x):
+        x = F.relu_(self.linear(x))
+        # Dropout is skipped outright in eval mode rather than dispatched as a no-op
+        if self.training and self.dropout > 0:
+            x = F.dropout(x, self.dropout, training=True)
+        return x
+
+
 class AutoencoderNetwork(nn.Module):
     """Autoencoder neural network architecture."""
     
@@ -30,23 +55,14 @@ class AutoencoderNetwork(nn.Module):
         super().__init__()
         
         self.encoder = nn.Sequential(
-            nn.Linear(input_dim, 32),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(32, 16),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(16, encoding_dim),
-            nn.ReLU()
+            FusedLinearReLU(input_dim, 32, dropout=0.2),
+            FusedLinearReLU(32, 16, dropout=0.2),
+            FusedLinearReLU(16, encoding_dim)
         )
         
         self.decoder = nn.Sequential(
-            nn.Linear(encoding_dim, 16),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(16, 32),
-            nn.ReLU(),
-            nn.Dropout(0.2),
+            FusedLinearReLU(encoding_dim, 16, dropout=0.2),
+            FusedLinearReLU(16, 32, dropout=0.2),
             nn.Linear(32, input_dim)
         )
     
@@ -57,11 +73,37 @@ class AutoencoderNetwork(nn.Module):
     
     def encode(self, x):
         return self.encoder(x)
+    
+    @staticmethod
+    def upgrade_state_dict(state_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Map checkpoints saved with the old unfused layout onto fused blocks.
+        
+        The old Sequential stacks held Linear layers at indices 0, 3 and 6
+        (separated by ReLU/Dropout modules); they now live at 0, 1 and 2.
+        """
+        if "encoder.0.weight" not in state_dict:
+            return state_dict
+        
+        upgraded = {}
+        for key, value in state_dict.items():
+            stage, index, param = key.split(".")
+            block = int(index) // 3
+            if stage == "decoder" and block == 2:
+                upgraded[f"decoder.2.{param}"] = value
+            else:
+                upgraded[f"{stage}.{block}.linear.{param}"] = value
+        return upgraded
 
 
 class AutoencoderDetector:
     """Autoencoder based anomaly detector using reconstruction error."""
     
+    # Batches up to this size are scored with the NumPy/Numba kernel
+    KERNEL_MAX_BATCH = 16
+    # Batches up to this size are normalized into a reused scratch buffer
+    SCRATCH_MAX_BATCH = 1024
+    
     def __init__(
         self,
         input_dim: int = 15,
@@ -87,18 +129,35 @@ class AutoencoderDetector:
         self.std: Optional[np.ndarray] = None
         self.is_trained = False
         
+        # Host-side copies of the trained weights for small-batch scoring
+        self._weights: Optional[Tuple[np.ndarray, ...]] = None
+        self._biases: Optional[Tuple[np.ndarray, ...]] = None
+        self._mean32: Optional[np.ndarray] = None
+        self._std32: Optional[np.ndarray] = None
+        # Per-thread normalize buffers: predict runs on threadpool workers
+        self._scratch = threading.local()
+        self.ort_session = None
+        self.model_ts = None
+        
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.model_path = settings.ML_MODEL_PATH / "autoencoder.pth"
+        self.mean_path = settings.ML_MODEL_PATH / "autoencoder_mean.npy"
+        self.std_path = settings.ML_MODEL_PATH / "autoencoder_std.npy"
+        # Legacy combined stats file, read only when the .npy pair is missing
         self.stats_path = settings.ML_MODEL_PATH / "autoencoder_stats.npz"
+        self.onnx_path = settings.ML_MODEL_PATH / "autoencoder.onnx"
+        self.scripted_path = settings.ML_MODEL_PATH / "autoencoder_scripted.pt"
         
         self._load_model()
     
-    def train(self, X: np.ndarray) -> Dict[str, Any]:
+    def train(self, X: np.ndarray, copy: bool = True) -> Dict[str, Any]:
         """
         Train the autoencoder model.
         
         Args:
             X: Training feature matrix (n_samples, n_features)
+            copy: If False, X (float32) is normalized in place and must not
+                be reused by the caller
             
         Returns:
             Training results dict
@@ -109,13 +168,34 @@ class AutoencoderDetector:
         self.std = np.std(X, axis=0)
         self.std[self.std == 0] = 1
         
-        X_normalized = (X - self.mean) / self.std
+        if copy or X.dtype != np.float32:
+            X_normalized = (X - self.mean) / self.std
+        else:
+            X_normalized = X
+            np.subtract(X_normalized, self.mean, out=X_normalized)
+            np.divide(X_normalized, self.std, out=X_normalized)
         
         self.model = AutoencoderNetwork(X.shape[1], self.encoding_dim).to(self.device)
         
-        X_tensor = torch.FloatTensor(X_normalized).to(self.device)
+        # Keep the dataset on the host; on CUDA, pinned pages let each batch
+        # copy run asynchronously while the previous step is still computing.
+        use_cuda = self.device.type == "cuda"
+        X_tensor = torch.from_numpy(X_normalized).float()
+        if use_cuda:
+            X_tensor = X_tensor.pin_memory()
         dataset = TensorDataset(X_tensor, X_tensor)
-        dataloader = DataLoader(dataset, batch_size=self.batch_size, shuffle=True)
+        # CUDA graphs replay one batch shape: the compiled model only sees
+        # full batches, so a ragged last batch never forces a recompile
+        compile_model = use_cuda and len(dataset) >= self.batch_size
+        dataloader = DataLoader(
+            dataset,
+            batch_size=self.batch_size,
+            shuffle=True,
+            pin_memory=use_cuda,
+            drop_last=compile_model
+        )
+        
+        train_model = self._compile_for_training(self.model) if compile_model else self.model
         
         criterion = nn.MSELoss()
         optimizer = optim.Adam(self.model.parameters(), lr=self.learning_rate)
@@ -124,30 +204,53 @@ class AutoencoderDetector:
         
         for epoch in range(self.epochs):
             self.model.train()
-            epoch_loss = 0.0
+            # Accumulate on-device; one host sync per epoch instead of per batch
+            epoch_loss = torch.zeros((), device=self.device)
             
             for batch_x, _ in dataloader:
-                optimizer.zero_grad()
-                outputs = self.model(batch_x)
-                loss = criterion(outputs, batch_x)
-                loss.backward()
-                optimizer.step()
-                epoch_loss += loss.item()
+                batch_x = batch_x.to(self.device, non_blocking=True)
+                try:
+                    loss = self._train_step(train_model, batch_x, criterion, optimizer)
+                except Exception as e:
+                    # torch.compile is lazy: Dynamo/Inductor errors surface
+                    # on the first call, so retry the step in eager mode
+                    if train_model is self.model:
+                        raise
+                    logger.warning(f"Compiled training step failed, training in eager mode: {e}")
+                    train_model = self.model
+                    loss = self._train_step(train_model, batch_x, criterion, optimizer)
+                epoch_loss += loss.detach()
             
-            avg_loss = epoch_loss / len(dataloader)
+            avg_loss = (epoch_loss / len(dataloader)).item()
             history['loss'].append(avg_loss)
             
             if (epoch + 1) % 20 == 0:
                 logger.info(f"Epoch {epoch+1}/{self.epochs}, Loss: {avg_loss:.6f}")
         
         self.model.eval()
+        eval_loader = DataLoader(dataset, batch_size=self.batch_size, pin_memory=use_cuda)
+        # Write per-row errors into one preallocated device buffer so peak
+        # memory stays O(batch_size * D) and the host copy happens once
+        err_buf = torch.empty(len(X), device=self.device)
+        offset = 0
         with torch.no_grad():
-            reconstructions = self.model(X_tensor)
-            errors = torch.mean((X_tensor - reconstructions) ** 2, dim=1)
-            errors_np = errors.cpu().numpy()
+            for batch_x, _ in eval_loader:
+                batch_x = batch_x.to(self.device, non_blocking=True)
+                reconstructions = self.model(batch_x)
+                end = offset + len(batch_x)
+                torch.mean(
+                    F.mse_loss(reconstructions, batch_x, reduction='none'),
+                    dim=1,
+                    out=err_buf[offset:end]
+                )
+                offset = end
+        errors_np = err_buf.cpu().numpy()
         
-        self.threshold = np.percentile(errors_np, self.threshold_percentile)
+        # Introselect (O(N)) instead of the full sort behind np.percentile
+        k = min(int(errors_np.size * (self.threshold_percentile / 100.0)), errors_np.size - 1)
+        self.threshold = float(np.partition(errors_np, k)[k])
         self.is_trained = True
+        self._export_inference_weights()
         
         self._save_model()
         
@@ -166,6 +269,63 @@ class AutoencoderDetector:
         logger.info(f"Training complete: {results}")
         return results
     
+    def _train_step(self, model, batch_x, criterion, optimizer):
+        """One forward/backward/update on a batch; returns the batch loss."""
+        optimizer.zero_grad(set_to_none=True)
+        # bf16 autocast needs no GradScaler; CPU stays in fp32
+        with torch.autocast(self.device.type, dtype=torch.bfloat16, enabled=self.device.type == "cuda"):
+            outputs = model(batch_x)
+            loss = criterion(outputs.float(), batch_x)
+        loss.backward()
+        optimizer.step()
+        return loss
+    
+    @staticmethod
+    def _compile_for_training(model: "AutoencoderNetwork"):
+        """Wrap the model with torch.compile, falling back to eager mode."""
+        try:
+            return torch.compile(model, mode="reduce-overhead")
+        except Exception as e:
+            logger.debug(f"torch.compile unavailable, training in eager mode: {e}")
+            return model
+    
+    def _export_inference_weights(self):
+        """Copy the eval-mode weights to host arrays for the scoring kernel."""
+        linears = [m for m in self.model.modules() if isinstance(m, nn.Linear)]
+        self._weights = tuple(
+            np.ascontiguousarray(layer.weight.detach().cpu().numpy().T, dtype=np.float32)
+            for layer in linears
+        )
+        self._biases = tuple(
+            np.ascontiguousarray(layer.bias.detach().cpu().numpy(), dtype=np.float32)
+            for layer in linears
+        )
+        self._mean32 = np.asarray(self.mean, dtype=np.float32)
+        self._std32 = np.asarray(self.std, dtype=np.float32)
+        self._scratch = threading.local()
+    
+    def _normalize(self, X: np.ndarray) -> np.ndarray:
+        """
+        Z-score X as float32 without allocating for batches that fit the scratch buffer.
+        
+        The result aliases the calling thread's buffer and is only valid until
+        that thread's next call; concurrent predicts each get their own buffer.
+        """
+        n_samples, n_features = X.shape
+        if n_samples > self.SCRATCH_MAX_BATCH:
+            out = np.empty((n_samples, n_features), dtype=np.float32)
+        else:
+            scratch = getattr(self._scratch, "buffer", None)
+            if scratch is None or scratch.shape[1] != n_features:
+                scratch = self._scratch.buffer = np.empty(
+                    (self.SCRATCH_MAX_BATCH, n_features), dtype=np.float32
+                )
+            out = scratch[:n_samples]
+        
+        np.subtract(X, self._mean32, out=out)
+        np.divide(out, self._std32, out=out)
+        return out
+    
     def predict(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
         Predict anomalies for input samples.
@@ -179,14 +339,29 @@ class AutoencoderDetector:
         if not self.is_trained or self.model is None:
             raise ValueError("Model not trained. Call train() first.")
         
-        X_normalized = (X - self.mean) / self.std
-        X_tensor = torch.FloatTensor(X_normalized).to(self.device)
-        
-        self.model.eval()
-        with torch.no_grad():
-            reconstructions = self.model(X_tensor)
-            errors = torch.mean((X_tensor - reconstructions) ** 2, dim=1)
-            errors_np = errors.cpu().numpy()
+        if self._weights is not None and len(X) <= self.KERNEL_MAX_BATCH:
+            # Small batches: skip torch dispatch and tensor creation entirely
+            errors_np = mlp_reconstruction_errors(
+                np.ascontiguousarray(X, dtype=np.float32),
+                self._mean32, self._std32,
+                self._weights, self._biases
+            )
+        elif self.ort_session is not None:
+            X_normalized = self._normalize(X)
+            reconstructions = self.ort_session.run(None, {"input": X_normalized})[0]
+            errors_np = np.mean((X_normalized - reconstructions) ** 2, axis=1)
+        else:
+            X_normalized = self._normalize(X)
+            X_tensor = torch.from_numpy(X_normalized).to(self.device)
+            
+            # Prefer the shape-specialized graph; both are fp32 like the
+            # errors the threshold was calibrated on
+            model = self.model_ts if self.model_ts is not None else self.model
+            model.eval()
+            with torch.no_grad():
+                reconstructions = model(X_tensor)
+                errors = torch.mean((X_tensor - reconstructions) ** 2, dim=1)
+                errors_np = errors.cpu().numpy()
         
         predictions = np.where(errors_np > self.threshold, -1, 1)
         
@@ -228,21 +403,101 @@ class AutoencoderDetector:
                 'threshold': self.threshold
             }, self.model_path)
             
-            np.savez(
-                self.stats_path,
-                mean=self.mean,
-                std=self.std
-            )
+            np.save(self.mean_path, np.ascontiguousarray(self.mean))
+            np.save(self.std_path, np.ascontiguousarray(self.std))
             
             logger.info(f"Autoencoder saved to {self.model_path}")
             
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
+        
+        self._export_scripted()
+        self._export_onnx()
+    
+    def _export_scripted(self):
+        """Trace, freeze and save a shape-specialized TorchScript copy of the model."""
+        self.model_ts = None
+        try:
+            example = torch.zeros(1, self.input_dim, device=self.device)
+            with torch.no_grad():
+                traced = torch.jit.trace(self.model.eval(), example)
+            self.model_ts = torch.jit.optimize_for_inference(traced)
+            torch.jit.save(self.model_ts, str(self.scripted_path))
+        except Exception as e:
+            logger.warning(f"TorchScript export failed, using eager model: {e}")
+            self.model_ts = None
+            self.scripted_path.unlink(missing_ok=True)
+    
+    def _load_scripted(self):
+        """Load the TorchScript artifact if one was saved with the checkpoint."""
+        self.model_ts = None
+        if not self.scripted_path.exists():
+            return
+        
+        try:
+            self.model_ts = torch.jit.load(str(self.scripted_path), map_location=self.device)
+        except Exception as e:
+            logger.warning(f"Could not load TorchScript model: {e}")
+            self.model_ts = None
+    
+    def _export_onnx(self):
+        """Export the trained model to ONNX and reload the inference session."""
+        self.ort_session = None
+        if not ONNXRUNTIME_AVAILABLE:
+            return
+        
+        try:
+            dummy_input = torch.zeros(1, self.input_dim, device=self.device)
+            torch.onnx.export(
+                self.model,
+                dummy_input,
+                str(self.onnx_path),
+                input_names=["input"],
+                output_names=["output"],
+                dynamic_axes={"input": {0: "batch"}, "output": {0: "batch"}},
+                opset_version=17
+            )
+            self._load_onnx_session()
+        except Exception as e:
+            logger.warning(f"ONNX export failed, using PyTorch for inference: {e}")
+            # Never serve a stale graph from a previous training run
+            self.onnx_path.unlink(missing_ok=True)
+    
+    def _load_onnx_session(self):
+        """Create an ONNX Runtime session for batch inference if available."""
+        if not ONNXRUNTIME_AVAILABLE or not self.onnx_path.exists():
+            return
+        
+        try:
+            opts = ort.SessionOptions()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.ort_session = ort.InferenceSession(
+                str(self.onnx_path),
+                sess_options=opts,
+                providers=["CPUExecutionProvider"]
+            )
+        except Exception as e:
+            logger.warning(f"Could not load ONNX model: {e}")
+            self.ort_session = None
+    
+    def _load_stats(self):
+        """Load normalization stats, memory-mapped so workers share the pages."""
+        if self.mean_path.exists() and self.std_path.exists():
+            self.mean = np.load(self.mean_path, mmap_mode='r')
+            self.std = np.load(self.std_path, mmap_mode='r')
+        else:
+            stats = np.load(self.stats_path)
+            self.mean = stats['mean']
+            self.std = stats['std']
     
     def _load_model(self):
         """Load model from disk if available."""
         try:
-            if self.model_path.exists() and self.stats_path.exists():
+            has_stats = (
+                (self.mean_path.exists() and self.std_path.exists())
+                or self.stats_path.exists()
+            )
+            if self.model_path.exists() and has_stats:
                 # Use weights_only=False for PyTorch 2.6+ compatibility (safe since we control the model files)
                 checkpoint = torch.load(self.model_path, map_location=self.device, weights_only=False)
                 
@@ -254,14 +509,23 @@ class AutoencoderDetector:
                     self.input_dim, 
                     self.encoding_dim
                 ).to(self.device)
-                self.model.load_state_dict(checkpoint['model_state_dict'])
+                self.model.load_state_dict(
+                    AutoencoderNetwork.upgrade_state_dict(checkpoint['model_state_dict'])
+                )
                 self.model.eval()
                 
-                stats = np.load(self.stats_path)
-                self.mean = stats['mean']
-                self.std = stats['std']
+                self._load_stats()
                 
                 self.is_trained = True
+                self._export_inference_weights()
+                self._load_scripted()
+                self._load_onnx_session()
+                # Checkpoints saved before the artifacts existed get them now,
+                # so large batches don't fall back to the eager model
+                if self.model_ts is None:
+                    self._export_scripted()
+                if ONNXRUNTIME_AVAILABLE and self.ort_session is None:
+                    self._export_onnx()
                 logger.info("Loaded existing Autoencoder model")
                 
         except Exception as e:
@@ -3,58 +3,78 @@ Unified Anomaly Detector - Ensemble of Isolation Forest and Autoencoder.
 """
 
 import numpy as np
-from typing import Optional, Dict, Any, List
+from functools import cache
+from typing import Optional, Dict, Any, List, Union, TYPE_CHECKING
 from datetime import datetime
 import logging
+import threading
 
-from app.ml.feature_extractor import FeatureExtractor, feature_extractor
+from app.ml.feature_extractor import FeatureExtractor, DeviceColumns, feature_extractor
 from app.ml.isolation_forest import IsolationForestDetector
 from app.config import settings
 from app.utils.logger import get_logger
 
-logger = get_logger(__name__)
-
-try:
+if TYPE_CHECKING:
     from app.ml.autoencoder import AutoencoderDetector
-    AUTOENCODER_AVAILABLE = True
-except ImportError:
-    AUTOENCODER_AVAILABLE = False
-    logger.warning("PyTorch not available, Autoencoder disabled")
+
+logger = get_logger(__name__)
 
 
 class AnomalyDetector:
     """Unified anomaly detector combining multiple models."""
     
     def __init__(self, use_ensemble: bool = True):
-        self.use_ensemble = use_ensemble and AUTOENCODER_AVAILABLE
+        self.use_ensemble = use_ensemble
         self.feature_extractor = feature_extractor
         
         self.isolation_forest: Optional[IsolationForestDetector] = None
-        self.autoencoder: Optional[AutoencoderDetector] = None
+        self.autoencoder: Optional["AutoencoderDetector"] = None
+        # Guards swapping in freshly trained models, so a prediction never
+        # pairs one run's forest with another run's autoencoder. Training
+        # itself runs outside it on new instances.
+        self._lock = threading.Lock()
         
         self._initialize_models()
     
     def _initialize_models(self):
         """Initialize ML models."""
         try:
-            self.isolation_forest = IsolationForestDetector(
-                contamination=0.1,
-                n_estimators=100
-            )
+            self.isolation_forest = self._new_isolation_forest()
         except Exception as e:
             logger.error(f"Failed to initialize Isolation Forest: {e}")
         
         if self.use_ensemble:
             try:
-                self.autoencoder = AutoencoderDetector(
-                    input_dim=len(FeatureExtractor.FEATURE_NAMES),
-                    encoding_dim=8,
-                    epochs=100
-                )
+                self.autoencoder = self._new_autoencoder()
+            except ImportError:
+                logger.warning("PyTorch not available, Autoencoder disabled")
+                self.use_ensemble = False
             except Exception as e:
                 logger.warning(f"Failed to initialize Autoencoder: {e}")
                 self.use_ensemble = False
     
+    @staticmethod
+    def _new_isolation_forest() -> IsolationForestDetector:
+        """An Isolation Forest detector with the configured parameters."""
+        return IsolationForestDetector(
+            contamination=0.1,
+            n_estimators=settings.IF_N_ESTIMATORS,
+            max_samples=settings.IF_MAX_SAMPLES,
+            max_features=settings.IF_MAX_FEATURES
+        )
+    
+    @staticmethod
+    def _new_autoencoder() -> "AutoencoderDetector":
+        """An Autoencoder detector with the configured parameters."""
+        # Deferred so torch is only loaded when the detector is built
+        from app.ml.autoencoder import AutoencoderDetector
+        
+        return AutoencoderDetector(
+            input_dim=len(FeatureExtractor.FEATURE_NAMES),
+            encoding_dim=8,
+            epochs=100
+        )
+    
     def extract_features(
         self,
         scan_results: List[Dict],
@@ -68,29 +88,24 @@ class AnomalyDetector:
     
     def train(
         self,
-        devices_data: List[Dict[str, Any]]
+        devices_data: Union[DeviceColumns, List[Dict[str, Any]]]
     ) -> Dict[str, Any]:
         """
         Train all models on device data.
         
         Args:
-            devices_data: List of dicts with 'scan_results', 'activities', 'device_info'
+            devices_data: DeviceColumns, or a list of dicts with
+                'scan_results', 'activities', 'device_info'
             
         Returns:
             Training results
         """
         logger.info(f"Training anomaly detector with {len(devices_data)} devices")
         
-        feature_matrix = []
-        for device_data in devices_data:
-            features = self.extract_features(
-                device_data.get('scan_results', []),
-                device_data.get('activities', []),
-                device_data.get('device_info', {})
-            )
-            feature_matrix.append(features)
-        
-        X = np.array(feature_matrix)
+        if isinstance(devices_data, DeviceColumns):
+            X = self.feature_extractor.extract_features_columns(devices_data)
+        else:
+            X = self.feature_extractor.extract_features_batch(devices_data)
         
         if len(X) < settings.MIN_TRAINING_SAMPLES:
             return {
@@ -102,23 +117,34 @@ class AnomalyDetector:
         self.feature_extractor.fit_normalizer(X)
         
         results = {"status": "success", "models": {}}
+        # Fitted on new instances while predictions keep using the current
+        # ones; the router's training lock keeps runs from overlapping
+        isolation_forest = self.isolation_forest
+        autoencoder = self.autoencoder
         
         if self.isolation_forest:
             try:
-                if_results = self.isolation_forest.train(X)
-                results["models"]["isolation_forest"] = if_results
+                candidate = self._new_isolation_forest()
+                results["models"]["isolation_forest"] = candidate.train(X)
+                isolation_forest = candidate
             except Exception as e:
                 logger.error(f"Isolation Forest training failed: {e}")
                 results["models"]["isolation_forest"] = {"error": str(e)}
         
         if self.use_ensemble and self.autoencoder:
             try:
-                ae_results = self.autoencoder.train(X)
-                results["models"]["autoencoder"] = ae_results
+                candidate = self._new_autoencoder()
+                # Last consumer of X, so let it normalize in place
+                results["models"]["autoencoder"] = candidate.train(X, copy=False)
+                autoencoder = candidate
             except Exception as e:
                 logger.error(f"Autoencoder training failed: {e}")
                 results["models"]["autoencoder"] = {"error": str(e)}
         
+        with self._lock:
+            self.isolation_forest = isolation_forest
+            self.autoencoder = autoencoder
+        
         results["trained_at"] = datetime.utcnow().isoformat()
         results["total_samples"] = len(X)
         
@@ -141,6 +167,10 @@ class AnomalyDetector:
         Returns:
             Prediction results with ensemble decision
         """
+        with self._lock:
+            isolation_forest = self.isolation_forest
+            autoencoder = self.autoencoder
+        
         features = self.extract_features(scan_results, activities, device_info)
         
         results = {
@@ -155,31 +185,31 @@ class AnomalyDetector:
         
         scores = []
         
-        if self.isolation_forest and self.isolation_forest.is_trained:
+        if isolation_forest and isolation_forest.is_trained:
             try:
-                if_result = self.isolation_forest.predict_single(features)
+                if_result = isolation_forest.predict_single(features)
                 results["predictions"]["isolation_forest"] = if_result
                 scores.append(if_result["anomaly_score"])
             except Exception as e:
                 logger.error(f"Isolation Forest prediction failed: {e}")
         
-        if self.use_ensemble and self.autoencoder and self.autoencoder.is_trained:
+        if self.use_ensemble and autoencoder and autoencoder.is_trained:
             try:
-                ae_result = self.autoencoder.predict_single(features)
+                ae_result = autoencoder.predict_single(features)
                 results["predictions"]["autoencoder"] = ae_result
                 scores.append(ae_result["anomaly_score"])
             except Exception as e:
                 logger.error(f"Autoencoder prediction failed: {e}")
         
         if scores:
-            results["final_score"] = float(np.mean(scores))
-            results["is_anomaly"] = bool(results["final_score"] >= settings.ANOMALY_THRESHOLD)
+            # At most two scores: plain Python beats building a NumPy array
+            threshold = settings.ANOMALY_THRESHOLD
+            results["final_score"] = float(sum(scores) / len(scores))
+            results["is_anomaly"] = bool(results["final_score"] >= threshold)
             
             if len(scores) > 1:
-                results["ensemble_decision"] = "consensus" if all(
-                    s >= settings.ANOMALY_THRESHOLD for s in scores
-                ) or all(
-                    s < settings.ANOMALY_THRESHOLD for s in scores
+                results["ensemble_decision"] = "consensus" if (
+                    min(scores) >= threshold or max(scores) < threshold
                 ) else "disagreement"
         else:
             results["error"] = "No trained models available"
@@ -212,4 +242,7 @@ class AnomalyDetector:
         }
 
 
-anomaly_detector = AnomalyDetector()
+@cache
+def get_anomaly_detector() -> AnomalyDetector:
+    """Return the shared detector, building it (and loading models) on first use."""
+    return AnomalyDetector()
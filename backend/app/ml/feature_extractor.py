@@ -3,15 +3,155 @@ Feature Extractor - Extract behavioral features from device activity.
 """
 
 import numpy as np
-from typing import List, Dict, Any, Optional
+import socket
+import struct
+from typing import List, Dict, Any, Iterable, NamedTuple, Optional, Sequence, Set, Tuple
+from itertools import islice
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from collections import Counter
 import logging
 
+try:
+    from ciso8601 import parse_datetime as _parse_iso
+    CISO8601_AVAILABLE = True
+except ImportError:
+    CISO8601_AVAILABLE = False
+
+    def _parse_iso(value: str) -> datetime:
+        """Stdlib stand-in for ciso8601.parse_datetime."""
+        if value.endswith('Z'):
+            value = value[:-1] + '+00:00'
+        return datetime.fromisoformat(value)
+
+from app.ml._kernels import NUMBA_AVAILABLE, norm_entropy
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Activity event types that feed features, encoded for np.bincount
+EVENT_CODES = {'connected': 0, 'disconnected': 1, 'ip_changed': 2}
+
+
+class _DeviceArrays(NamedTuple):
+    """Per-record arrays for one device, built in a single pass."""
+    rssi: np.ndarray
+    response_ms: np.ndarray
+    ip_u32: np.ndarray
+    other_ips: Set[str]
+    event_counts: np.ndarray
+
+
+class _NormStats:
+    """Per-feature z-score parameters, as float32 arrays in FEATURE_NAMES order."""
+    __slots__ = ('mean', 'std', 'inv_std')
+    
+    def __init__(self, mean: np.ndarray, std: np.ndarray):
+        self.mean = mean.astype(np.float32)
+        self.std = std.astype(np.float32)
+        self.inv_std = (1.0 / np.where(std > 0, std, 1)).astype(np.float32)
+
+
+def _transpose(rows: Iterable[Tuple], width: int, chunk_size: int = 5000) -> List[List[Any]]:
+    """Split rows into per-column lists, holding at most chunk_size rows at once."""
+    columns: List[List[Any]] = [[] for _ in range(width)]
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return columns
+        for column, values in zip(columns, zip(*chunk)):
+            column.extend(values)
+
+
+def _to_datetime64(values: Sequence[Any]) -> np.ndarray:
+    """Convert datetimes / ISO strings to naive datetime64[us], None -> NaT."""
+    converted = []
+    for value in values:
+        if isinstance(value, str):
+            value = _parse_iso(value)
+        if value is not None and value.tzinfo:
+            value = value.replace(tzinfo=None)
+        converted.append(value)
+    return np.array(converted, dtype='datetime64[us]')
+
+
+@dataclass
+class DeviceColumns:
+    """Columnar (structure-of-arrays) view of devices and their history."""
+    device_ids: np.ndarray
+    first_seen: np.ndarray
+    is_trusted: np.ndarray
+    vendor_known: np.ndarray
+    scan_device_ids: np.ndarray
+    scan_ips: np.ndarray
+    scan_rssi: np.ndarray
+    scan_timestamps: np.ndarray
+    scan_response_ms: np.ndarray
+    activity_device_ids: np.ndarray
+    activity_event_types: np.ndarray
+    activity_timestamps: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.device_ids)
+    
+    @classmethod
+    def from_rows(
+        cls,
+        devices: Iterable[Tuple],
+        scan_results: Iterable[Tuple],
+        activities: Iterable[Tuple]
+    ) -> "DeviceColumns":
+        """
+        Build columns from row tuples, e.g. the result of column-only queries.
+        
+        Rows are consumed in chunks, so streamed results (yield_per) are never
+        fully materialized as row objects. The sources are read in argument
+        order, each to the end before the next is touched, so lazily executed
+        queries sharing one connection never overlap.
+        
+        Args:
+            devices: (id, first_seen, is_trusted, vendor) rows
+            scan_results: (device_id, ip_address, rssi, scan_timestamp, response_time_ms) rows
+            activities: (device_id, event_type, event_timestamp) rows
+        """
+        dev = _transpose(devices, 4)
+        scans = _transpose(scan_results, 5)
+        acts = _transpose(activities, 3)
+        
+        return cls(
+            device_ids=np.array(dev[0], dtype=np.int64),
+            first_seen=_to_datetime64(dev[1]),
+            is_trusted=np.array([bool(v) for v in dev[2]], dtype=bool),
+            vendor_known=np.array([bool(v) for v in dev[3]], dtype=bool),
+            scan_device_ids=np.array(scans[0], dtype=np.int64),
+            scan_ips=np.array(scans[1], dtype=object),
+            scan_rssi=np.array(scans[2], dtype=np.float64),
+            scan_timestamps=_to_datetime64(scans[3]),
+            scan_response_ms=np.array(scans[4], dtype=np.float64),
+            activity_device_ids=np.array(acts[0], dtype=np.int64),
+            activity_event_types=np.array(acts[1], dtype=object),
+            activity_timestamps=_to_datetime64(acts[2])
+        )
+    
+    @classmethod
+    def from_devices_data(cls, devices_data: List[Dict[str, Any]]) -> "DeviceColumns":
+        """Build columns from the per-device dict layout used by the API."""
+        devices, scan_results, activities = [], [], []
+        
+        # Positional ids keep rows distinct even when device_info has no id
+        for i, device_data in enumerate(devices_data):
+            info = device_data.get('device_info', {})
+            devices.append((i, info.get('first_seen'), info.get('is_trusted'), info.get('vendor')))
+            for sr in device_data.get('scan_results', []):
+                scan_results.append((
+                    i, sr.get('ip_address'), sr.get('rssi'),
+                    sr.get('scan_timestamp'), sr.get('response_time_ms')
+                ))
+            for a in device_data.get('activities', []):
+                activities.append((i, a.get('event_type'), a.get('event_timestamp')))
+        
+        return cls.from_rows(devices, scan_results, activities)
+
 
 class FeatureExtractor:
     """Extract features from device behavior for ML models."""
@@ -34,8 +174,27 @@ class FeatureExtractor:
         'vendor_known'
     ]
     
+    # Parsed timestamps kept before the cache is reset
+    TS_CACHE_MAX = 100_000
+    
     def __init__(self):
-        self.feature_stats = {}
+        self._norm: Optional[_NormStats] = None
+        self._ts_cache: Dict[str, datetime] = {}
+    
+    def _parse_ts(self, value: str) -> datetime:
+        """Parse an ISO 8601 string to a naive datetime, memoizing repeated values."""
+        parsed = self._ts_cache.get(value)
+        if parsed is not None:
+            return parsed
+        
+        parsed = _parse_iso(value)
+        if parsed.tzinfo:
+            parsed = parsed.replace(tzinfo=None)
+        
+        if len(self._ts_cache) >= self.TS_CACHE_MAX:
+            self._ts_cache.clear()
+        self._ts_cache[value] = parsed
+        return parsed
     
     def extract_features(
         self,
@@ -54,136 +213,328 @@ class FeatureExtractor:
         Returns:
             Feature vector as numpy array
         """
-        features = {}
+        out = np.empty(len(self.FEATURE_NAMES), dtype=np.float32)
+        arrays = self._to_soa(scan_results, activities)
         
-        features['connection_count'] = len(scan_results)
+        # Written at fixed FEATURE_NAMES positions; see _IDX for name lookups
+        out[0] = len(scan_results)  # connection_count
         
         session_durations = self._calculate_session_durations(activities)
-        features['avg_session_duration'] = np.mean(session_durations) if session_durations else 0
-        features['std_session_duration'] = np.std(session_durations) if len(session_durations) > 1 else 0
+        out[1] = np.mean(session_durations) if session_durations else 0  # avg_session_duration
+        out[2] = np.std(session_durations) if len(session_durations) > 1 else 0  # std_session_duration
         
-        unique_ips = set(sr.get('ip_address') for sr in scan_results if sr.get('ip_address'))
-        features['unique_ips'] = len(unique_ips)
+        ip_u32 = arrays.ip_u32[arrays.ip_u32 != 0]
+        out[3] = np.unique(ip_u32).size + len(arrays.other_ips)  # unique_ips
         
-        ip_changes = sum(1 for a in activities if a.get('event_type') == 'ip_changed')
-        features['ip_change_frequency'] = ip_changes / max(len(scan_results), 1)
+        ip_changes = arrays.event_counts[EVENT_CODES['ip_changed']]
+        out[4] = ip_changes / max(len(scan_results), 1)  # ip_change_frequency
         
-        rssi_values = [sr.get('rssi') for sr in scan_results if sr.get('rssi') is not None]
-        features['avg_rssi'] = np.mean(rssi_values) if rssi_values else -70
-        features['rssi_variance'] = np.var(rssi_values) if len(rssi_values) > 1 else 0
+        rssi_values = arrays.rssi[~np.isnan(arrays.rssi)]
+        out[5] = rssi_values.mean() if rssi_values.size else -70  # avg_rssi
+        out[6] = rssi_values.var() if rssi_values.size > 1 else 0  # rssi_variance
         
         timestamps = self._parse_timestamps(scan_results)
-        features['hour_entropy'] = self._calculate_hour_entropy(timestamps)
-        features['day_of_week_entropy'] = self._calculate_dow_entropy(timestamps)
-        features['connection_regularity'] = self._calculate_regularity(timestamps)
+        out[7] = self._calculate_hour_entropy(timestamps)  # hour_entropy
+        out[8] = self._calculate_dow_entropy(timestamps)  # day_of_week_entropy
+        out[9] = self._calculate_regularity(timestamps)  # connection_regularity
         
         first_seen = device_info.get('first_seen')
         if isinstance(first_seen, str):
-            first_seen = datetime.fromisoformat(first_seen.replace('Z', '+00:00'))
-        if first_seen:
-            features['time_since_first_seen'] = (datetime.utcnow() - first_seen.replace(tzinfo=None)).days
-        else:
-            features['time_since_first_seen'] = 0
+            first_seen = self._parse_ts(first_seen)
+        elif first_seen is not None and first_seen.tzinfo:
+            first_seen = first_seen.replace(tzinfo=None)
+        # time_since_first_seen
+        out[10] = (datetime.utcnow() - first_seen).days if first_seen else 0
+        
+        response_times = arrays.response_ms[~np.isnan(arrays.response_ms)]
+        out[11] = response_times.mean() if response_times.size else 0  # avg_response_time
+        
+        disconnections = arrays.event_counts[EVENT_CODES['disconnected']]
+        out[12] = disconnections / max(len(activities), 1)  # offline_frequency
         
-        response_times = [sr.get('response_time_ms') for sr in scan_results if sr.get('response_time_ms')]
-        features['avg_response_time'] = np.mean(response_times) if response_times else 0
+        out[13] = 1 if device_info.get('is_trusted') else 0  # is_trusted
+        out[14] = 1 if device_info.get('vendor') else 0  # vendor_known
         
-        disconnections = sum(1 for a in activities if a.get('event_type') == 'disconnected')
-        features['offline_frequency'] = disconnections / max(len(activities), 1)
+        return out
+    
+    def _to_soa(self, scan_results: List[Dict], activities: List[Dict]) -> _DeviceArrays:
+        """
+        Unpack scan results and activities into arrays in one pass each.
         
-        features['is_trusted'] = 1 if device_info.get('is_trusted') else 0
-        features['vendor_known'] = 1 if device_info.get('vendor') else 0
+        Missing RSSI and missing/zero response times become NaN. IPv4
+        addresses are packed to uint32 (0 = missing); anything else, such as
+        IPv6, is kept in a set. Activity event types are reduced to counts
+        per code.
+        """
+        n = len(scan_results)
+        rssi = np.empty(n, dtype=np.float32)
+        response_ms = np.empty(n, dtype=np.float32)
+        ip_u32 = np.zeros(n, dtype=np.uint32)
+        other_ips: Set[str] = set()
         
-        feature_vector = np.array([features.get(name, 0) for name in self.FEATURE_NAMES])
+        for i, sr in enumerate(scan_results):
+            value = sr.get('rssi')
+            rssi[i] = np.nan if value is None else value
+            value = sr.get('response_time_ms')
+            response_ms[i] = value if value else np.nan
+            value = sr.get('ip_address')
+            if value:
+                try:
+                    packed = struct.unpack('!I', socket.inet_pton(socket.AF_INET, value))[0]
+                except (OSError, TypeError):
+                    packed = 0
+                if packed:
+                    ip_u32[i] = packed
+                else:
+                    other_ips.add(value)
         
-        return feature_vector
+        codes = [EVENT_CODES.get(a.get('event_type'), len(EVENT_CODES)) for a in activities]
+        event_counts = np.bincount(
+            np.asarray(codes, dtype=np.int64), minlength=len(EVENT_CODES) + 1
+        )
+        
+        return _DeviceArrays(rssi, response_ms, ip_u32, other_ips, event_counts)
+    
+    def extract_features_batch(self, devices_data: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Extract a feature matrix for many devices at once.
+        
+        Args:
+            devices_data: List of dicts with 'scan_results', 'activities', 'device_info'
+            
+        Returns:
+            Feature matrix of shape (n_devices, n_features)
+        """
+        return self.extract_features_columns(DeviceColumns.from_devices_data(devices_data))
+    
+    def extract_features_columns(self, columns: DeviceColumns) -> np.ndarray:
+        """
+        Vectorized equivalent of extract_features over a DeviceColumns batch.
+        
+        Per-device aggregates are computed with bincount over row -> device
+        indices instead of Python loops over each device's records.
+        
+        Args:
+            columns: Columnar device, scan and activity data
+            
+        Returns:
+            Feature matrix of shape (n_devices, n_features)
+        """
+        n = len(columns)
+        X = np.zeros((n, len(self.FEATURE_NAMES)), dtype=np.float32)
+        if n == 0:
+            return X
+        col = _IDX
+        
+        order = np.argsort(columns.device_ids, kind='stable')
+        sorted_ids = columns.device_ids[order]
+        
+        def rows_for(ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            """Map record device ids to device rows, dropping unknown ids."""
+            pos = np.clip(np.searchsorted(sorted_ids, ids), 0, n - 1)
+            known = sorted_ids[pos] == ids
+            return order[pos[known]], known
+        
+        # Scan results
+        s_row, known = rows_for(columns.scan_device_ids)
+        ips = columns.scan_ips[known]
+        rssi = columns.scan_rssi[known]
+        ts = columns.scan_timestamps[known]
+        resp = columns.scan_response_ms[known]
+        
+        conn_count = np.bincount(s_row, minlength=n)
+        X[:, col['connection_count']] = conn_count
+        
+        has_ip = np.array([bool(ip) for ip in ips], dtype=bool)
+        if has_ip.any():
+            _, ip_codes = np.unique(ips[has_ip].astype(str), return_inverse=True)
+            pairs = np.unique(np.stack([s_row[has_ip], ip_codes.ravel()], axis=1), axis=0)
+            X[:, col['unique_ips']] = np.bincount(pairs[:, 0], minlength=n)
+        
+        has_rssi = ~np.isnan(rssi)
+        rssi_mean, rssi_cnt = self._group_mean(s_row[has_rssi], rssi[has_rssi], n)
+        X[:, col['avg_rssi']] = np.where(rssi_cnt > 0, rssi_mean, -70)
+        rssi_var, _ = self._group_mean(
+            s_row[has_rssi], (rssi[has_rssi] - rssi_mean[s_row[has_rssi]]) ** 2, n
+        )
+        X[:, col['rssi_variance']] = np.where(rssi_cnt > 1, rssi_var, 0)
+        
+        has_resp = ~np.isnan(resp) & (resp != 0)
+        resp_mean, _ = self._group_mean(s_row[has_resp], resp[has_resp], n)
+        X[:, col['avg_response_time']] = resp_mean
+        
+        has_ts = ~np.isnat(ts)
+        t_row, t = s_row[has_ts], ts[has_ts]
+        days = t.astype('datetime64[D]')
+        hours = ((t - days) // np.timedelta64(1, 'h')).astype(np.int64)
+        # 1970-01-01 was a Thursday (weekday 3)
+        weekdays = (days.astype(np.int64) + 3) % 7
+        X[:, col['hour_entropy']] = self._group_entropy(t_row, hours, 24, n)
+        X[:, col['day_of_week_entropy']] = self._group_entropy(t_row, weekdays, 7, n)
+        
+        srt = np.lexsort((t, t_row))
+        t_row, t = t_row[srt], t[srt]
+        same = t_row[1:] == t_row[:-1]
+        i_row = t_row[1:][same]
+        intervals = ((t[1:] - t[:-1]) / np.timedelta64(1, 's'))[same]
+        int_mean, int_cnt = self._group_mean(i_row, intervals, n)
+        int_var, _ = self._group_mean(i_row, (intervals - int_mean[i_row]) ** 2, n)
+        regular = (int_cnt > 0) & (int_mean != 0)
+        X[:, col['connection_regularity']] = np.where(
+            regular, 1 / (1 + np.sqrt(int_var) / np.where(regular, int_mean, 1)), 0.5
+        )
+        
+        # Activities
+        a_row, known = rows_for(columns.activity_device_ids)
+        events = columns.activity_event_types[known]
+        a_ts = columns.activity_timestamps[known]
+        
+        activity_count = np.bincount(a_row, minlength=n)
+        ip_changes = np.bincount(a_row[events == 'ip_changed'], minlength=n)
+        disconnected = events == 'disconnected'
+        X[:, col['ip_change_frequency']] = ip_changes / np.maximum(conn_count, 1)
+        X[:, col['offline_frequency']] = (
+            np.bincount(a_row[disconnected], minlength=n) / np.maximum(activity_count, 1)
+        )
+        
+        # A disconnect closes a session only if the previous connect/disconnect
+        # event of the same device was a connect with a timestamp
+        session = (events == 'connected') | disconnected
+        e_row, e_ts, e_disc = a_row[session], a_ts[session], disconnected[session]
+        srt = np.lexsort((e_ts, e_row))
+        e_row, e_ts, e_disc = e_row[srt], e_ts[srt], e_disc[srt]
+        closes = (
+            (e_row[1:] == e_row[:-1]) & e_disc[1:] & ~e_disc[:-1]
+            & ~np.isnat(e_ts[1:]) & ~np.isnat(e_ts[:-1])
+        )
+        d_row = e_row[1:][closes]
+        durations = ((e_ts[1:] - e_ts[:-1]) / np.timedelta64(1, 's'))[closes]
+        positive = durations > 0
+        d_row, durations = d_row[positive], durations[positive] / 3600
+        dur_mean, dur_cnt = self._group_mean(d_row, durations, n)
+        dur_var, _ = self._group_mean(d_row, (durations - dur_mean[d_row]) ** 2, n)
+        X[:, col['avg_session_duration']] = dur_mean
+        X[:, col['std_session_duration']] = np.where(dur_cnt > 1, np.sqrt(dur_var), 0)
+        
+        # Device metadata
+        now = np.datetime64(datetime.utcnow(), 'us')
+        has_first_seen = ~np.isnat(columns.first_seen)
+        age_days = np.zeros(n, dtype=np.int64)
+        age_days[has_first_seen] = (now - columns.first_seen[has_first_seen]) // np.timedelta64(1, 'D')
+        X[:, col['time_since_first_seen']] = age_days
+        X[:, col['is_trusted']] = columns.is_trusted
+        X[:, col['vendor_known']] = columns.vendor_known
+        
+        return X
+    
+    @staticmethod
+    def _group_mean(rows: np.ndarray, values: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-device mean of values (0 where a device has none) and counts."""
+        counts = np.bincount(rows, minlength=n)
+        sums = np.bincount(rows, weights=values, minlength=n)
+        return np.divide(sums, counts, out=np.zeros(n), where=counts > 0), counts
+    
+    @staticmethod
+    def _group_entropy(rows: np.ndarray, values: np.ndarray, num_bins: int, n: int) -> np.ndarray:
+        """Per-device normalized entropy of integer values in [0, num_bins)."""
+        counts = np.bincount(rows * num_bins + values, minlength=n * num_bins).reshape(n, num_bins)
+        totals = counts.sum(axis=1, keepdims=True)
+        probs = np.divide(counts, totals, out=np.zeros(counts.shape), where=totals > 0)
+        logs = np.log2(probs, out=np.zeros(counts.shape), where=probs > 0)
+        return -(probs * logs).sum(axis=1) / np.log2(num_bins)
+    
+    def _to_naive_array(self, records: List[Dict], key: str) -> np.ndarray:
+        """
+        Collect records[i][key] into a naive datetime64[us] array in one pass.
+        
+        Strings go through the parse cache, which already drops tzinfo, so
+        only tz-aware datetime objects need stripping here. Missing values
+        become NaT.
+        """
+        out = np.empty(len(records), dtype='datetime64[us]')
+        for i, record in enumerate(records):
+            value = record.get(key)
+            if isinstance(value, str):
+                value = self._parse_ts(value)
+            elif value is not None and value.tzinfo:
+                value = value.replace(tzinfo=None)
+            out[i] = value if value else np.datetime64('NaT')
+        return out
     
     def _calculate_session_durations(self, activities: List[Dict]) -> List[float]:
         """Calculate session durations from connect/disconnect events."""
-        durations = []
-        connect_time = None
+        n = len(activities)
+        if n == 0:
+            return []
         
-        sorted_activities = sorted(
-            activities, 
-            key=lambda x: x.get('event_timestamp', '')
+        timestamps = self._to_naive_array(activities, 'event_timestamp')
+        codes = np.array(
+            [EVENT_CODES.get(a.get('event_type'), -1) for a in activities], dtype=np.int8
         )
         
-        for activity in sorted_activities:
-            event_type = activity.get('event_type')
-            timestamp = activity.get('event_timestamp')
-            
-            if isinstance(timestamp, str):
-                timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-            
-            if event_type == 'connected':
-                connect_time = timestamp
-            elif event_type == 'disconnected' and connect_time:
-                if timestamp:
-                    duration = (timestamp.replace(tzinfo=None) - connect_time.replace(tzinfo=None)).total_seconds()
-                    if duration > 0:
-                        durations.append(duration / 3600)
-                connect_time = None
-        
-        return durations
-    
-    def _parse_timestamps(self, scan_results: List[Dict]) -> List[datetime]:
-        """Parse timestamps from scan results."""
-        timestamps = []
-        for sr in scan_results:
-            ts = sr.get('scan_timestamp')
-            if ts:
-                if isinstance(ts, str):
-                    ts = datetime.fromisoformat(ts.replace('Z', '+00:00'))
-                timestamps.append(ts.replace(tzinfo=None) if ts.tzinfo else ts)
-        return timestamps
-    
-    def _calculate_hour_entropy(self, timestamps: List[datetime]) -> float:
+        # NaT is the smallest int64, so missing timestamps sort first
+        order = np.argsort(timestamps.view(np.int64), kind='stable')
+        timestamps, codes = timestamps[order], codes[order]
+        
+        # A disconnect closes a session only when the previous connect/disconnect
+        # event was a connect; both need a timestamp
+        connected, disconnected = EVENT_CODES['connected'], EVENT_CODES['disconnected']
+        session = (codes == connected) | (codes == disconnected)
+        timestamps, codes = timestamps[session], codes[session]
+        closes = (
+            (codes[1:] == disconnected) & (codes[:-1] == connected)
+            & ~np.isnat(timestamps[1:]) & ~np.isnat(timestamps[:-1])
+        )
+        durations = (timestamps[1:][closes] - timestamps[:-1][closes]) / np.timedelta64(1, 'h')
+        
+        return durations[durations > 0].tolist()
+    
+    def _parse_timestamps(self, scan_results: List[Dict]) -> np.ndarray:
+        """Parse scan timestamps into a naive datetime64 array, skipping missing ones."""
+        timestamps = self._to_naive_array(scan_results, 'scan_timestamp')
+        return timestamps[~np.isnat(timestamps)]
+    
+    def _calculate_hour_entropy(self, timestamps: np.ndarray) -> float:
         """Calculate entropy of activity hours."""
-        if not timestamps:
+        if len(timestamps) == 0:
             return 0
         
-        hours = [ts.hour for ts in timestamps]
+        hours = (timestamps - timestamps.astype('datetime64[D]')) // np.timedelta64(1, 'h')
         return self._calculate_entropy(hours, 24)
     
-    def _calculate_dow_entropy(self, timestamps: List[datetime]) -> float:
+    def _calculate_dow_entropy(self, timestamps: np.ndarray) -> float:
         """Calculate entropy of days of week."""
-        if not timestamps:
+        if len(timestamps) == 0:
             return 0
         
-        days = [ts.weekday() for ts in timestamps]
+        # 1970-01-01 was a Thursday (weekday 3)
+        days = (timestamps.astype('datetime64[D]').astype(np.int64) + 3) % 7
         return self._calculate_entropy(days, 7)
     
-    def _calculate_entropy(self, values: List[int], num_bins: int) -> float:
+    def _calculate_entropy(self, values: np.ndarray, num_bins: int) -> float:
         """Calculate normalized entropy."""
-        if not values:
-            return 0
-        
-        counts = Counter(values)
-        probs = np.array([counts.get(i, 0) / len(values) for i in range(num_bins)])
-        probs = probs[probs > 0]
-        
-        if len(probs) == 0:
+        if len(values) == 0:
             return 0
         
-        entropy = -np.sum(probs * np.log2(probs))
-        max_entropy = np.log2(num_bins)
+        arr = np.asarray(values, dtype=np.int64)
+        if NUMBA_AVAILABLE:
+            return norm_entropy(arr, num_bins)
         
-        return entropy / max_entropy if max_entropy > 0 else 0
+        # Without numba the kernel is a Python loop; bincount is one C call
+        counts = np.bincount(arr, minlength=num_bins)
+        probs = counts[counts > 0] / arr.size
+        return float(-(probs * np.log2(probs)).sum() / np.log2(num_bins))
     
-    def _calculate_regularity(self, timestamps: List[datetime]) -> float:
+    def _calculate_regularity(self, timestamps: np.ndarray) -> float:
         """Calculate connection time regularity (0=irregular, 1=regular)."""
         if len(timestamps) < 2:
             return 0.5
         
-        sorted_ts = sorted(timestamps)
-        intervals = [(sorted_ts[i+1] - sorted_ts[i]).total_seconds() 
-                    for i in range(len(sorted_ts)-1)]
+        ts64 = np.sort(timestamps)
+        intervals = np.diff(ts64) / np.timedelta64(1, 's')
         
-        if not intervals:
-            return 0.5
-        
-        mean_interval = np.mean(intervals)
-        std_interval = np.std(intervals)
+        mean_interval = intervals.mean()
+        std_interval = intervals.std()
         
         if mean_interval == 0:
             return 0.5
@@ -195,26 +546,28 @@ class FeatureExtractor:
     
     def normalize_features(self, features: np.ndarray) -> np.ndarray:
         """Normalize feature vector using z-score normalization."""
-        if not self.feature_stats:
+        norm = self._norm
+        if norm is None:
             return features
         
-        normalized = np.zeros_like(features, dtype=float)
-        
-        for i, name in enumerate(self.FEATURE_NAMES):
-            stats = self.feature_stats.get(name, {'mean': 0, 'std': 1})
-            mean = stats['mean']
-            std = stats['std'] if stats['std'] > 0 else 1
-            normalized[i] = (features[i] - mean) / std
-        
-        return normalized
+        return (features.astype(np.float32) - norm.mean) * norm.inv_std
     
     def fit_normalizer(self, feature_matrix: np.ndarray):
         """Fit normalizer on training data."""
-        for i, name in enumerate(self.FEATURE_NAMES):
-            self.feature_stats[name] = {
-                'mean': np.mean(feature_matrix[:, i]),
-                'std': np.std(feature_matrix[:, i])
-            }
+        self._norm = _NormStats(feature_matrix.mean(axis=0), feature_matrix.std(axis=0))
+    
+    @property
+    def feature_stats(self) -> Dict[str, Dict[str, float]]:
+        """Fitted mean / raw std per feature name, built on demand for serialization."""
+        norm = self._norm
+        if norm is None:
+            return {}
+        return {
+            name: {'mean': float(norm.mean[i]), 'std': float(norm.std[i])}
+            for i, name in enumerate(self.FEATURE_NAMES)
+        }
 
+# Column index of each feature in extract_features output
+_IDX = {name: i for i, name in enumerate(FeatureExtractor.FEATURE_NAMES)}
 
 feature_extractor = FeatureExtractor()
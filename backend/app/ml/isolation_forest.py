@@ -3,19 +3,35 @@ Isolation Forest Anomaly Detector - Unsupervised anomaly detection.
 """
 
 import numpy as np
-import pickle
+import os
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Union
 from datetime import datetime
 import logging
 
 try:
     from sklearn.ensemble import IsolationForest
     from sklearn.preprocessing import StandardScaler
+    from joblib import dump as joblib_dump, load as joblib_load
     SKLEARN_AVAILABLE = True
 except ImportError:
     SKLEARN_AVAILABLE = False
 
+try:
+    from skl2onnx import convert_sklearn
+    from skl2onnx.common.data_types import FloatTensorType
+    import onnxruntime as ort
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+try:
+    import treelite
+    import tl2cgen
+    TREELITE_AVAILABLE = True
+except ImportError:
+    TREELITE_AVAILABLE = False
+
 from app.config import settings
 from app.utils.logger import get_logger
 
@@ -28,8 +44,9 @@ class IsolationForestDetector:
     def __init__(
         self,
         contamination: float = 0.1,
-        n_estimators: int = 100,
-        max_samples: str = 'auto',
+        n_estimators: int = 64,
+        max_samples: Union[int, str] = 128,
+        max_features: Union[int, float] = 8,
         random_state: int = 42
     ):
         if not SKLEARN_AVAILABLE:
@@ -38,14 +55,23 @@ class IsolationForestDetector:
         self.contamination = contamination
         self.n_estimators = n_estimators
         self.max_samples = max_samples
+        self.max_features = max_features
         self.random_state = random_state
         
         self.model: Optional[IsolationForest] = None
         self.scaler: Optional[StandardScaler] = None
+        # float32 copies of the scaler parameters for the fast transform
+        self._mean: Optional[np.ndarray] = None
+        self._inv_scale: Optional[np.ndarray] = None
         self.is_trained = False
         self.training_samples = 0
         self.model_path = settings.ML_MODEL_PATH / "isolation_forest.pkl"
         self.scaler_path = settings.ML_MODEL_PATH / "isolation_forest_scaler.pkl"
+        self.onnx_path = settings.ML_MODEL_PATH / "isolation_forest.onnx"
+        self._ort = None
+        self._ort_input: Optional[str] = None
+        self.treelite_path = self.model_path.with_suffix(".dll" if os.name == "nt" else ".so")
+        self._tl = None
         
         self._load_model()
     
@@ -69,11 +95,13 @@ class IsolationForestDetector:
         
         self.scaler = StandardScaler()
         X_scaled = self.scaler.fit_transform(X)
+        self._cache_scaler()
         
         self.model = IsolationForest(
             contamination=self.contamination,
             n_estimators=self.n_estimators,
             max_samples=self.max_samples,
+            max_features=self.max_features,
             random_state=self.random_state,
             n_jobs=-1
         )
@@ -83,15 +111,19 @@ class IsolationForestDetector:
         self.training_samples = len(X)
         
         self._save_model()
+        self._export_onnx(X_scaled.shape[1])
+        self._export_treelite()
         
         scores = self.model.decision_function(X_scaled)
-        predictions = self.model.predict(X_scaled)
+        predictions = np.where(scores < 0, -1, 1)
         
         results = {
             "model_type": "isolation_forest",
             "samples_trained": len(X),
             "contamination": self.contamination,
             "n_estimators": self.n_estimators,
+            "max_samples": self.max_samples,
+            "max_features": self.max_features,
             "anomalies_in_training": int(np.sum(predictions == -1)),
             "score_mean": float(np.mean(scores)),
             "score_std": float(np.std(scores)),
@@ -116,15 +148,52 @@ class IsolationForestDetector:
         if not self.is_trained or self.model is None:
             raise ValueError("Model not trained. Call train() first.")
         
-        X_scaled = self.scaler.transform(X)
+        if X.dtype == np.float32 and X.flags.c_contiguous and self._mean is not None:
+            # Skip sklearn's input validation on the hot scoring path
+            X_scaled = (X - self._mean) * self._inv_scale
+        else:
+            X_scaled = self.scaler.transform(X)
         
-        predictions = self.model.predict(X_scaled)
-        raw_scores = self.model.decision_function(X_scaled)
+        # IsolationForest.predict is decision_function < 0; walk the trees once
+        if self._tl is not None:
+            # Treelite emits -score_samples; decision_function subtracts offset_
+            raw_scores = -self._tl.predict(tl2cgen.DMatrix(X_scaled)).ravel() - self.model.offset_
+        elif self._ort is not None:
+            outputs = self._ort.run(None, {self._ort_input: X_scaled.astype(np.float32, copy=False)})
+            raw_scores = outputs[1].ravel()
+        else:
+            raw_scores = self.model.decision_function(X_scaled)
+        predictions = np.where(raw_scores < 0, -1, 1)
         
         anomaly_scores = 1 - (raw_scores - raw_scores.min()) / (raw_scores.max() - raw_scores.min() + 1e-10)
         
         return predictions, anomaly_scores
     
+    def predict_batch(self, X: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Predict anomalies for many samples with one pass over the forest.
+        
+        Args:
+            X: Feature matrix (n_samples, n_features)
+            
+        Returns:
+            List of prediction results dicts, one per row
+        """
+        predictions, scores = self.predict(X)
+        threshold = float(settings.ANOMALY_THRESHOLD)
+        
+        # Convert numpy types to Python native types for JSON serialization
+        return [
+            {
+                "is_anomaly": is_anomaly,
+                "anomaly_score": score,
+                "threshold": threshold,
+                "model_type": "isolation_forest",
+                "confidence": abs(score - 0.5) * 2
+            }
+            for is_anomaly, score in zip((predictions == -1).tolist(), scores.tolist())
+        ]
+    
     def predict_single(self, features: np.ndarray) -> Dict[str, Any]:
         """
         Predict anomaly for a single sample.
@@ -135,49 +204,118 @@ class IsolationForestDetector:
         Returns:
             Prediction results dict
         """
+        features = np.asarray(features, dtype=np.float32)
         if features.ndim == 1:
             features = features.reshape(1, -1)
         
-        predictions, scores = self.predict(features)
-        
-        # Convert numpy types to Python native types for JSON serialization
-        is_anomaly = bool(predictions[0] == -1)
-        score = float(scores[0])
-        
-        return {
-            "is_anomaly": is_anomaly,
-            "anomaly_score": score,
-            "threshold": float(settings.ANOMALY_THRESHOLD),
-            "model_type": "isolation_forest",
-            "confidence": float(abs(score - 0.5) * 2)
-        }
+        return self.predict_batch(features)[0]
+    
+    def _cache_scaler(self):
+        """Precompute float32 mean and inverse scale from the fitted scaler."""
+        scale = np.where(self.scaler.scale_ == 0, 1, self.scaler.scale_)
+        self._mean = self.scaler.mean_.astype(np.float32)
+        self._inv_scale = (1.0 / scale).astype(np.float32)
     
     def _save_model(self):
         """Save model and scaler to disk."""
         try:
             self.model_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(self.model_path, 'wb') as f:
-                pickle.dump(self.model, f)
-            
-            with open(self.scaler_path, 'wb') as f:
-                pickle.dump(self.scaler, f)
+            # joblib writes the tree arrays as raw buffers instead of pickling them
+            joblib_dump(self.model, self.model_path, compress=0, protocol=5)
+            joblib_dump(self.scaler, self.scaler_path, compress=0, protocol=5)
             
             logger.info(f"Model saved to {self.model_path}")
             
         except Exception as e:
             logger.error(f"Failed to save model: {e}")
     
+    def _export_onnx(self, n_features: int):
+        """Convert the fitted forest to ONNX and open an inference session."""
+        self._ort = None
+        if not ONNX_AVAILABLE:
+            self.onnx_path.unlink(missing_ok=True)
+            return
+        
+        # skl2onnx only converts forests whose trees see every feature
+        if getattr(self.model, "_max_features", n_features) < n_features:
+            logger.debug("Forest uses a feature subset (max_features), skipping ONNX export")
+            self.onnx_path.unlink(missing_ok=True)
+            return
+        
+        try:
+            onnx_model = convert_sklearn(
+                self.model,
+                initial_types=[("X", FloatTensorType([None, n_features]))],
+                target_opset={"": 17, "ai.onnx.ml": 3}
+            )
+            self.onnx_path.write_bytes(onnx_model.SerializeToString())
+            self._load_onnx_session()
+        except Exception as e:
+            logger.warning(f"ONNX export failed, using scikit-learn for inference: {e}")
+            # Never serve a stale forest from a previous training run
+            self.onnx_path.unlink(missing_ok=True)
+    
+    def _load_onnx_session(self):
+        """Create an ONNX Runtime session for the forest if available."""
+        if not ONNX_AVAILABLE or not self.onnx_path.exists():
+            return
+        
+        try:
+            self._ort = ort.InferenceSession(
+                str(self.onnx_path),
+                providers=["CPUExecutionProvider"]
+            )
+            self._ort_input = self._ort.get_inputs()[0].name
+        except Exception as e:
+            logger.warning(f"Could not load ONNX forest: {e}")
+            self._ort = None
+    
+    def _export_treelite(self):
+        """Compile the fitted forest to a native library with Treelite."""
+        # Release the old library before replacing it on disk
+        self._tl = None
+        if not TREELITE_AVAILABLE:
+            self.treelite_path.unlink(missing_ok=True)
+            return
+        
+        tmp_path = self.treelite_path.with_name(f"{self.treelite_path.stem}.tmp{self.treelite_path.suffix}")
+        try:
+            tl2cgen.export_lib(
+                treelite.sklearn.import_model(self.model),
+                toolchain="msvc" if os.name == "nt" else "gcc",
+                libpath=str(tmp_path),
+                params={"parallel_comp": 4}
+            )
+            os.replace(tmp_path, self.treelite_path)
+            self._load_treelite()
+        except Exception as e:
+            logger.warning(f"Treelite compilation failed, using fallback inference: {e}")
+            tmp_path.unlink(missing_ok=True)
+            self.treelite_path.unlink(missing_ok=True)
+    
+    def _load_treelite(self):
+        """Load the compiled forest if one exists."""
+        if not TREELITE_AVAILABLE or not self.treelite_path.exists():
+            return
+        
+        try:
+            self._tl = tl2cgen.Predictor(str(self.treelite_path))
+        except Exception as e:
+            logger.warning(f"Could not load compiled forest: {e}")
+            self._tl = None
+    
     def _load_model(self):
         """Load model and scaler from disk if available."""
         try:
             if self.model_path.exists() and self.scaler_path.exists():
-                with open(self.model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                
-                with open(self.scaler_path, 'rb') as f:
-                    self.scaler = pickle.load(f)
+                # Also reads models saved with plain pickle by older versions
+                self.model = joblib_load(self.model_path)
+                self.scaler = joblib_load(self.scaler_path)
                 
+                self._cache_scaler()
+                self._load_onnx_session()
+                self._load_treelite()
                 self.is_trained = True
                 logger.info("Loaded existing Isolation Forest model")
                 
@@ -9,6 +9,7 @@ from app.models.alert import Alert
 from app.models.ml_prediction import MLPrediction
 from app.models.device_activity import DeviceActivity
 from app.models.settings import Settings
+from app.models.counter import Counter
 
 __all__ = [
     "User",
@@ -18,5 +19,6 @@ __all__ = [
     "Alert",
     "MLPrediction",
     "DeviceActivity",
-    "Settings"
+    "Settings",
+    "Counter"
 ]
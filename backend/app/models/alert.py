@@ -3,11 +3,13 @@ Alert model for security notifications.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, JSON, ForeignKey
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Text, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
+from app.models.ml_prediction import quantize_score
 
 
 class AlertType(str, enum.Enum):
@@ -31,6 +33,12 @@ class Alert(Base):
     """Model for security alerts."""
     
     __tablename__ = "alerts"
+    __table_args__ = (
+        # Newest unacknowledged (or acknowledged) alerts without a filesort
+        Index("ix_alerts_ack_created", "is_acknowledged", "created_at"),
+        # Per-device alert pages seek on (device_id, created_at, id)
+        Index("ix_alerts_device_created", "device_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="SET NULL"), nullable=True)
@@ -74,11 +82,11 @@ class Alert(Base):
         
         return data
     
-    def acknowledge(self, user_id: int):
+    def acknowledge(self, user_id: int, now: Optional[datetime] = None):
         """Mark alert as acknowledged."""
         self.is_acknowledged = True
         self.acknowledged_by = user_id
-        self.acknowledged_at = datetime.utcnow()
+        self.acknowledged_at = now or datetime.utcnow()
     
     @classmethod
     def create_new_device_alert(cls, device_id: int, mac_address: str, vendor: str = None):
@@ -94,7 +102,8 @@ class Alert(Base):
     @classmethod
     def create_anomaly_alert(cls, device_id: int, score: float, model_type: str, mac_address: str):
         """Create alert for ML anomaly detection."""
-        severity = "high" if score > 0.85 else "medium"
+        # 217 / 255 == 0.85, compared on the quantized score stored with predictions
+        severity = "high" if quantize_score(score) > 217 else "medium"
         return cls(
             device_id=device_id,
             alert_type="anomaly_detected",
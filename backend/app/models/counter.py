@@ -0,0 +1,61 @@
+"""
+Denormalized row counters for unfiltered totals.
+"""
+
+from sqlalchemy import Column, String, BigInteger, DDL, event, select
+
+from app.database import Base
+
+
+# Tables with a counter row of the same name, kept current by MySQL triggers
+COUNTED_TABLES = ("devices", "scan_sessions")
+
+
+class Counter(Base):
+    """
+    Running row count for a table.
+    
+    Maintained by AFTER INSERT/DELETE triggers rather than ORM events, so
+    Core bulk inserts are counted too.
+    """
+    
+    __tablename__ = "counters"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<Counter(name='{self.name}', value={self.value})>"
+    
+    @classmethod
+    def value_of(cls, name: str):
+        """
+        Scalar subquery for a counter's value (NULL if the row is missing).
+        
+        A primary key lookup, so it can ride along with a page query in
+        place of COUNT(*) over the whole table.
+        """
+        return select(cls.value).where(cls.name == name).scalar_subquery()
+
+
+def _counter_ddl(table: str):
+    """Triggers and seed row for one counted table."""
+    return [
+        f"CREATE TRIGGER trg_{table}_count_insert AFTER INSERT ON {table} "
+        f"FOR EACH ROW UPDATE counters SET value = value + 1 WHERE name = '{table}'",
+        f"CREATE TRIGGER trg_{table}_count_delete AFTER DELETE ON {table} "
+        f"FOR EACH ROW UPDATE counters SET value = value - 1 WHERE name = '{table}'",
+        f"INSERT INTO counters (name, value) SELECT '{table}', COUNT(*) FROM {table}",
+    ]
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _install_counters(target, connection, tables=(), **kw):
+    """Create the triggers when create_all creates the counters table."""
+    if connection.dialect.name != "mysql":
+        return
+    if Counter.__table__ not in tables:
+        return
+    for table in COUNTED_TABLES:
+        for statement in _counter_ddl(table):
+            connection.execute(DDL(statement))
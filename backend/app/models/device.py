@@ -3,7 +3,8 @@ Device model for tracked network devices.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text
+from typing import Optional
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Computed
 from sqlalchemy.orm import relationship
 
 from app.database import Base
@@ -19,11 +20,22 @@ class Device(Base):
     hostname = Column(String(255), nullable=True)
     vendor = Column(String(100), nullable=True)
     device_type = Column(String(50), nullable=True)
-    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
-    last_seen = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    last_seen = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True)
     is_trusted = Column(Boolean, default=False, nullable=False, index=True)
     is_suspicious = Column(Boolean, default=False, nullable=False)
     notes = Column(Text, nullable=True)
+    # Lowercased MAC, hostname and vendor maintained by MySQL, so the device
+    # search is one LIKE over one indexed column. The unit separator keeps a
+    # pattern from matching across field boundaries.
+    search_text = Column(
+        String(374),
+        Computed(
+            "LOWER(CONCAT_WS(CHAR(31 USING utf8mb4), mac_address, hostname, vendor))",
+            persisted=True
+        ),
+        index=True
+    )
     
     # Relationships
     scan_results = relationship("ScanResult", back_populates="device", cascade="all, delete-orphan")
@@ -55,9 +67,9 @@ class Device(Base):
         
         return data
     
-    def update_last_seen(self):
-        """Update the last_seen timestamp."""
-        self.last_seen = datetime.utcnow()
+    def update_last_seen(self, now: Optional[datetime] = None):
+        """Update the last_seen timestamp (to a caller's snapshot of now, if given)."""
+        self.last_seen = now or datetime.utcnow()
     
     @property
     def is_online(self) -> bool:
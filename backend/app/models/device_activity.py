@@ -3,7 +3,7 @@ Device activity model for tracking connection/disconnection events.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index
 from sqlalchemy.orm import relationship
 import enum
 
@@ -22,9 +22,14 @@ class DeviceActivity(Base):
     """Model for device activity events."""
     
     __tablename__ = "device_activity"
+    __table_args__ = (
+        # Per-device history in time order is an index range scan, no filesort;
+        # its device_id prefix also backs the foreign key
+        Index("ix_device_activity_device_ts", "device_id", "event_timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
     event_type = Column(String(50), nullable=False, index=True)
     old_value = Column(String(100), nullable=True)
     new_value = Column(String(100), nullable=True)
@@ -47,6 +52,16 @@ class DeviceActivity(Base):
             "event_timestamp": self.event_timestamp.isoformat() if self.event_timestamp else None
         }
     
+    def to_row(self, event_timestamp: datetime) -> dict:
+        """Column values for a bulk insert of this (unsaved) event."""
+        return {
+            "device_id": self.device_id,
+            "event_type": self.event_type,
+            "old_value": self.old_value,
+            "new_value": self.new_value,
+            "event_timestamp": event_timestamp
+        }
+    
     @classmethod
     def log_connection(cls, device_id: int, ip_address: str):
         """Create a connection event."""
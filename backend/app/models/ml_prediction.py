@@ -3,12 +3,21 @@ ML Prediction model for storing anomaly detection results.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, Boolean, DateTime, Enum, JSON, ForeignKey
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, Boolean, DateTime, JSON, ForeignKey
+from typing import Union
 from sqlalchemy.orm import relationship
 import enum
 
 from app.database import Base
 
+# Anomaly scores in [0, 1] are also stored quantized to 0..SCORE_Q_MAX
+SCORE_Q_MAX = 255
+
+
+def quantize_score(score: float) -> int:
+    """Quantize an anomaly score in [0, 1] to an integer in 0..SCORE_Q_MAX."""
+    return int(round(max(0.0, min(1.0, score)) * SCORE_Q_MAX))
+
 
 class ModelType(str, enum.Enum):
     """Type of ML model used."""
@@ -24,8 +33,11 @@ class MLPrediction(Base):
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
-    model_type = Column(Enum(ModelType), nullable=False)
+    # Plain string (validated in create_prediction) avoids per-row Enum coercion
+    model_type = Column(String(30), nullable=False, index=True)
     anomaly_score = Column(Float, nullable=False)
+    # Server default so rows written before the column existed stay valid
+    anomaly_score_q = Column(SmallInteger, nullable=False, server_default="0", index=True)
     is_anomaly = Column(Boolean, nullable=False, index=True)
     confidence = Column(Float, nullable=True)
     features = Column(JSON, nullable=True)
@@ -42,7 +54,7 @@ class MLPrediction(Base):
         return {
             "id": self.id,
             "device_id": self.device_id,
-            "model_type": self.model_type.value,
+            "model_type": self.model_type,
             "anomaly_score": self.anomaly_score,
             "is_anomaly": self.is_anomaly,
             "confidence": self.confidence,
@@ -54,7 +66,7 @@ class MLPrediction(Base):
     def create_prediction(
         cls,
         device_id: int,
-        model_type: ModelType,
+        model_type: Union[ModelType, str],
         anomaly_score: float,
         threshold: float = 0.7,
         features: dict = None,
@@ -63,8 +75,9 @@ class MLPrediction(Base):
         """Create a new ML prediction."""
         return cls(
             device_id=device_id,
-            model_type=model_type,
+            model_type=ModelType(model_type).value,
             anomaly_score=anomaly_score,
+            anomaly_score_q=quantize_score(anomaly_score),
             is_anomaly=anomaly_score >= threshold,
             confidence=confidence,
             features=features
@@ -3,8 +3,9 @@ Scan result models for storing network scan data.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum, Text, ForeignKey
-from sqlalchemy.orm import relationship
+from typing import Optional, List, Dict
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Enum, Text, ForeignKey, Index, and_, func
+from sqlalchemy.orm import relationship, Session
 import enum
 
 from app.database import Base
@@ -28,6 +29,10 @@ class ScanSession(Base):
     """Model for tracking scan sessions/batches."""
     
     __tablename__ = "scan_sessions"
+    __table_args__ = (
+        # Completed-scan count and latest completed_at from the index alone
+        Index("ix_scan_sessions_status_completed", "status", "completed_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     started_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -66,16 +71,16 @@ class ScanSession(Base):
             return 0
         return (self.completed_at - self.started_at).total_seconds()
     
-    def mark_completed(self, total_devices: int = 0, new_devices: int = 0):
+    def mark_completed(self, total_devices: int = 0, new_devices: int = 0, now: Optional[datetime] = None):
         """Mark scan session as completed."""
-        self.completed_at = datetime.utcnow()
+        self.completed_at = now or datetime.utcnow()
         self.status = "completed"
         self.total_devices_found = total_devices
         self.new_devices_found = new_devices
     
-    def mark_failed(self, error: str):
+    def mark_failed(self, error: str, now: Optional[datetime] = None):
         """Mark scan session as failed."""
-        self.completed_at = datetime.utcnow()
+        self.completed_at = now or datetime.utcnow()
         self.status = "failed"
         self.error_message = error
 
@@ -84,9 +89,16 @@ class ScanResult(Base):
     """Model for individual scan results per device."""
     
     __tablename__ = "scan_results"
+    __table_args__ = (
+        # Serves "latest/recent scans for a device" without a filesort; its
+        # device_id prefix also backs the foreign key
+        Index("ix_scan_results_device_ts", "device_id", "scan_timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False, index=True)
+    device_id = Column(Integer, ForeignKey("devices.id", ondelete="CASCADE"), nullable=False)
+    # Scan session that produced this row (NULL for rows recorded before it was tracked)
+    session_id = Column(Integer, ForeignKey("scan_sessions.id", ondelete="SET NULL"), nullable=True, index=True)
     ip_address = Column(String(45), nullable=False, index=True)
     rssi = Column(Integer, nullable=True)  # Signal strength in dBm
     scan_timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -110,3 +122,31 @@ class ScanResult(Base):
             "is_connected": self.is_connected,
             "response_time_ms": self.response_time_ms
         }
+    
+    @classmethod
+    def latest_by_device(cls, db: Session, device_ids: List[int]) -> Dict[int, "ScanResult"]:
+        """Fetch the most recent scan result for each device in one query."""
+        if not device_ids:
+            return {}
+        
+        # Groupwise max; MySQL resolves it from ix_scan_results_device_ts
+        latest_ts = db.query(
+            cls.device_id,
+            func.max(cls.scan_timestamp).label("scan_timestamp")
+        ).filter(
+            cls.device_id.in_(device_ids)
+        ).group_by(cls.device_id).subquery()
+        
+        scans = db.query(cls).join(
+            latest_ts,
+            and_(
+                cls.device_id == latest_ts.c.device_id,
+                cls.scan_timestamp == latest_ts.c.scan_timestamp
+            )
+        ).order_by(cls.id.desc()).all()
+        
+        latest = {}
+        for scan in scans:
+            # Several scans can share a device's newest timestamp; keep one
+            latest.setdefault(scan.device_id, scan)
+        return latest
@@ -6,7 +6,11 @@ from datetime import datetime
 from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
 import enum
 
+# Raw strings read as True for BOOL settings
+_TRUE_STRINGS = frozenset({'true', '1', 'yes'})
+
 from app.database import Base
+from app.utils.serialization import dumps, loads
 
 
 class SettingType(str, enum.Enum):
@@ -44,7 +48,19 @@ class Settings(Base):
         }
     
     def get_typed_value(self):
-        """Get setting value with proper type conversion."""
+        """Get setting value with proper type conversion (memoized per raw value)."""
+        raw = self.setting_value
+        cached = self.__dict__.get('_typed_cache')
+        # Keyed on the raw string and type, so direct column edits are never stale
+        if cached is not None and cached[0] is raw and cached[1] == self.setting_type:
+            return cached[2]
+        
+        value = self._parse_value()
+        self.__dict__['_typed_cache'] = (raw, self.setting_type, value)
+        return value
+    
+    def _parse_value(self):
+        """Convert the raw stored string to the setting's type."""
         if self.setting_value is None:
             return None
         
@@ -53,22 +69,23 @@ class Settings(Base):
         elif self.setting_type == SettingType.FLOAT:
             return float(self.setting_value)
         elif self.setting_type == SettingType.BOOL:
-            return self.setting_value.lower() in ('true', '1', 'yes')
+            value = self.setting_value
+            return value in _TRUE_STRINGS or value.lower() in _TRUE_STRINGS
         elif self.setting_type == SettingType.JSON:
-            import json
-            return json.loads(self.setting_value)
+            return loads(self.setting_value)
         else:
             return self.setting_value
     
     def set_typed_value(self, value):
         """Set setting value with proper type conversion."""
+        self.__dict__.pop('_typed_cache', None)
         if value is None:
             self.setting_value = None
             return
         
         if self.setting_type == SettingType.JSON:
-            import json
-            self.setting_value = json.dumps(value)
+            # Text column; non-str keys are stringified like json.dumps does
+            self.setting_value = dumps(value, non_str_keys=True).decode("utf-8")
         elif self.setting_type == SettingType.BOOL:
             self.setting_value = 'true' if value else 'false'
         else:
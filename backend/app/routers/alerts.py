@@ -3,10 +3,11 @@ Alerts router - Alert management endpoints.
 """
 
 from datetime import datetime, timedelta
+import enum
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, case, exists
 
 from app.database import get_db
 from app.models.alert import Alert, AlertType, AlertSeverity
@@ -17,128 +18,185 @@ from app.schemas.alert import (
 )
 from app.routers.auth import get_current_user
 from app.utils.logger import get_logger
+from app.utils.cache import ttl_cache
+from app.utils.pagination import encode_cursor, seek_before
+from app.utils.responses import model_response
+from app.config import settings
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/alerts", tags=["Alerts"])
 
+# Everything an AlertResponse needs, read in one joined row
+ALERT_RESPONSE_COLUMNS = (
+    Alert.id,
+    Alert.device_id,
+    Alert.alert_type,
+    Alert.severity,
+    Alert.message,
+    Alert.details,
+    Alert.is_acknowledged,
+    Alert.acknowledged_by,
+    Alert.created_at,
+    Alert.acknowledged_at,
+    Device.mac_address,
+    Device.hostname,
+    Device.vendor,
+    User.username,
+)
+
+
+# str-based enum members hash like their values, so plain column strings hit too
+_ENUM_VALUES = {
+    member: member.value
+    for enum_cls in (AlertType, AlertSeverity)
+    for member in enum_cls
+}
+
 
 def get_enum_value(value):
     """Safely get value from enum or return string as-is."""
-    if hasattr(value, 'value'):
+    resolved = _ENUM_VALUES.get(value)
+    if resolved is not None:
+        return resolved
+    if isinstance(value, enum.Enum):
         return value.value
     return str(value) if value else None
 
 
+def alert_rows_query(db: Session):
+    """Select ALERT_RESPONSE_COLUMNS with the device and acknowledging user joined in."""
+    return db.query(
+        *ALERT_RESPONSE_COLUMNS
+    ).outerjoin(
+        Device, Alert.device_id == Device.id
+    ).outerjoin(
+        User, Alert.acknowledged_by == User.id
+    )
+
+
+def alert_response_from_row(row) -> AlertResponse:
+    """Build an AlertResponse from an alert_rows_query row, skipping validation."""
+    return AlertResponse.model_construct(
+        id=row.id,
+        device_id=row.device_id,
+        alert_type=get_enum_value(row.alert_type),
+        severity=get_enum_value(row.severity),
+        message=row.message,
+        details=row.details,
+        is_acknowledged=row.is_acknowledged,
+        acknowledged_by=row.acknowledged_by,
+        acknowledged_by_username=row.username,
+        created_at=row.created_at,
+        acknowledged_at=row.acknowledged_at,
+        device=DeviceInfo.model_construct(
+            mac_address=row.mac_address,
+            hostname=row.hostname,
+            vendor=row.vendor
+        ) if row.mac_address is not None else None
+    )
+
+
 @router.get("", response_model=AlertListResponse)
-async def list_alerts(
+def list_alerts(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     alert_type: Optional[str] = None,
     severity: Optional[str] = None,
     is_acknowledged: Optional[bool] = None,
     device_id: Optional[int] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List all alerts with filtering."""
-    query = db.query(Alert)
+    """
+    List all alerts with filtering.
+    
+    Pages can be fetched by offset (page) or, for deep paging, by passing the
+    previous response's next_cursor, which seeks on (created_at, id) instead
+    of scanning and discarding skipped rows.
+    """
+    filters = []
     
     if alert_type:
         try:
-            query = query.filter(Alert.alert_type == AlertType(alert_type))
+            filters.append(Alert.alert_type == AlertType(alert_type))
         except ValueError:
             pass
     
     if severity:
         try:
-            query = query.filter(Alert.severity == AlertSeverity(severity))
+            filters.append(Alert.severity == AlertSeverity(severity))
         except ValueError:
             pass
     
     if is_acknowledged is not None:
-        query = query.filter(Alert.is_acknowledged == is_acknowledged)
+        filters.append(Alert.is_acknowledged == is_acknowledged)
     
     if device_id:
-        query = query.filter(Alert.device_id == device_id)
+        filters.append(Alert.device_id == device_id)
     
-    total = query.count()
+    # Filtered total and global unacknowledged count in one aggregate
+    total, unacknowledged = db.query(
+        func.count(case((and_(*filters), 1))) if filters else func.count(Alert.id),
+        func.count(case((Alert.is_acknowledged == False, 1)))
+    ).one()
     
-    unacknowledged = db.query(Alert).filter(Alert.is_acknowledged == False).count()
+    # Column-only select; responses are built from rows without ORM hydration
+    query = alert_rows_query(db).filter(*filters)
+    query = query.order_by(Alert.created_at.desc(), Alert.id.desc())
     
-    query = query.order_by(Alert.created_at.desc())
+    if cursor:
+        query = query.filter(seek_before(Alert.created_at, Alert.id, cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
     
-    offset = (page - 1) * page_size
-    alerts = query.offset(offset).limit(page_size).all()
+    rows = query.limit(page_size).all()
     
-    alert_responses = []
-    for alert in alerts:
-        device_info = None
-        if alert.device:
-            device_info = DeviceInfo(
-                mac_address=alert.device.mac_address,
-                hostname=alert.device.hostname,
-                vendor=alert.device.vendor
-            )
-        
-        ack_username = None
-        if alert.acknowledged_by_user:
-            ack_username = alert.acknowledged_by_user.username
-        
-        alert_responses.append(AlertResponse(
-            id=alert.id,
-            device_id=alert.device_id,
-            alert_type=get_enum_value(alert.alert_type),
-            severity=get_enum_value(alert.severity),
-            message=alert.message,
-            details=alert.details,
-            is_acknowledged=alert.is_acknowledged,
-            acknowledged_by=alert.acknowledged_by,
-            acknowledged_by_username=ack_username,
-            created_at=alert.created_at,
-            acknowledged_at=alert.acknowledged_at,
-            device=device_info
-        ))
+    alert_responses = [alert_response_from_row(row) for row in rows]
     
-    return AlertListResponse(
+    return model_response(AlertListResponse.model_construct(
         total=total,
         page=page,
         page_size=page_size,
         unacknowledged_count=unacknowledged,
-        alerts=alert_responses
-    )
+        alerts=alert_responses,
+        next_cursor=encode_cursor(rows[-1].created_at, rows[-1].id) if len(rows) == page_size else None
+    ))
 
 
 @router.get("/stats", response_model=AlertStats)
-async def get_alert_stats(
+@ttl_cache(settings.STATS_CACHE_TTL)
+def get_alert_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get alert statistics."""
-    total = db.query(Alert).count()
-    unacknowledged = db.query(Alert).filter(Alert.is_acknowledged == False).count()
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    week_ago = today - timedelta(days=7)
     
+    # One grouped pass; every response field is summed from the buckets
+    buckets = db.query(
+        Alert.severity,
+        Alert.alert_type,
+        func.count(Alert.id),
+        func.count(case((Alert.is_acknowledged == False, 1))),
+        func.count(case((Alert.created_at >= today, 1))),
+        func.count(case((Alert.created_at >= week_ago, 1)))
+    ).group_by(Alert.severity, Alert.alert_type).all()
+    
+    total = unacknowledged = alerts_today = alerts_this_week = 0
     by_severity = {}
-    severity_counts = db.query(
-        Alert.severity, func.count(Alert.id)
-    ).group_by(Alert.severity).all()
-    
-    for severity, count in severity_counts:
-        by_severity[get_enum_value(severity)] = count
-    
     by_type = {}
-    type_counts = db.query(
-        Alert.alert_type, func.count(Alert.id)
-    ).group_by(Alert.alert_type).all()
-    
-    for alert_type, count in type_counts:
-        by_type[get_enum_value(alert_type)] = count
-    
-    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    alerts_today = db.query(Alert).filter(Alert.created_at >= today).count()
-    
-    week_ago = today - timedelta(days=7)
-    alerts_this_week = db.query(Alert).filter(Alert.created_at >= week_ago).count()
+    for severity, alert_type, count, unack_count, today_count, week_count in buckets:
+        severity = get_enum_value(severity)
+        alert_type = get_enum_value(alert_type)
+        by_severity[severity] = by_severity.get(severity, 0) + count
+        by_type[alert_type] = by_type.get(alert_type, 0) + count
+        total += count
+        unacknowledged += unack_count
+        alerts_today += today_count
+        alerts_this_week += week_count
     
     return AlertStats(
         total_alerts=total,
@@ -151,103 +209,63 @@ async def get_alert_stats(
 
 
 @router.get("/{alert_id}", response_model=AlertResponse)
-async def get_alert(
+def get_alert(
     alert_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get alert details."""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
+    row = alert_rows_query(db).filter(Alert.id == alert_id).first()
     
-    if not alert:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Alert not found"
         )
     
-    device_info = None
-    if alert.device:
-        device_info = DeviceInfo(
-            mac_address=alert.device.mac_address,
-            hostname=alert.device.hostname,
-            vendor=alert.device.vendor
-        )
-    
-    ack_username = None
-    if alert.acknowledged_by_user:
-        ack_username = alert.acknowledged_by_user.username
-    
-    return AlertResponse(
-        id=alert.id,
-        device_id=alert.device_id,
-        alert_type=get_enum_value(alert.alert_type),
-        severity=get_enum_value(alert.severity),
-        message=alert.message,
-        details=alert.details,
-        is_acknowledged=alert.is_acknowledged,
-        acknowledged_by=alert.acknowledged_by,
-        acknowledged_by_username=ack_username,
-        created_at=alert.created_at,
-        acknowledged_at=alert.acknowledged_at,
-        device=device_info
-    )
+    return model_response(alert_response_from_row(row))
 
 
 @router.put("/{alert_id}/acknowledge", response_model=AlertResponse)
-async def acknowledge_alert(
+def acknowledge_alert(
     alert_id: int,
     ack_data: AlertAcknowledge = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Acknowledge an alert."""
-    alert = db.query(Alert).filter(Alert.id == alert_id).first()
-    
-    if not alert:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Alert not found"
-        )
-    
-    if alert.is_acknowledged:
+    # Conditional UPDATE does the check and the write in one statement
+    updated = db.query(Alert).filter(
+        Alert.id == alert_id,
+        Alert.is_acknowledged == False
+    ).update({
+        Alert.is_acknowledged: True,
+        Alert.acknowledged_by: current_user.id,
+        Alert.acknowledged_at: datetime.utcnow()
+    }, synchronize_session=False)
+    
+    if not updated:
+        # Only the failure path needs to know which case it was
+        if not db.query(exists().where(Alert.id == alert_id)).scalar():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Alert not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Alert already acknowledged"
         )
     
-    alert.acknowledge(current_user.id)
-    
     db.commit()
-    db.refresh(alert)
+    get_alert_stats.cache_clear()
     
     logger.info(f"Alert {alert_id} acknowledged by {current_user.username}")
     
-    device_info = None
-    if alert.device:
-        device_info = DeviceInfo(
-            mac_address=alert.device.mac_address,
-            hostname=alert.device.hostname,
-            vendor=alert.device.vendor
-        )
-    
-    return AlertResponse(
-        id=alert.id,
-        device_id=alert.device_id,
-        alert_type=get_enum_value(alert.alert_type),
-        severity=get_enum_value(alert.severity),
-        message=alert.message,
-        details=alert.details,
-        is_acknowledged=alert.is_acknowledged,
-        acknowledged_by=alert.acknowledged_by,
-        acknowledged_by_username=current_user.username,
-        created_at=alert.created_at,
-        acknowledged_at=alert.acknowledged_at,
-        device=device_info
-    )
+    return model_response(alert_response_from_row(alert_rows_query(db).filter(Alert.id == alert_id).one()))
 
 
 @router.post("/acknowledge-all", status_code=status.HTTP_200_OK)
-async def acknowledge_all_alerts(
+def acknowledge_all_alerts(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -260,9 +278,10 @@ async def acknowledge_all_alerts(
         Alert.is_acknowledged: True,
         Alert.acknowledged_by: current_user.id,
         Alert.acknowledged_at: now
-    })
+    }, synchronize_session=False)
     
     db.commit()
+    get_alert_stats.cache_clear()
     
     logger.info(f"{result} alerts acknowledged by {current_user.username}")
     
@@ -270,7 +289,7 @@ async def acknowledge_all_alerts(
 
 
 @router.delete("/{alert_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_alert(
+def delete_alert(
     alert_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -286,5 +305,6 @@ async def delete_alert(
     
     db.delete(alert)
     db.commit()
+    get_alert_stats.cache_clear()
     
     logger.info(f"Alert {alert_id} deleted by {current_user.username}")
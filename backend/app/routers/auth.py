@@ -28,7 +28,7 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-async def get_current_user(
+def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: Session = Depends(get_db)
 ) -> User:
@@ -60,7 +60,7 @@ async def get_current_user(
     return user
 
 
-async def get_current_admin(
+def get_current_admin(
     current_user: User = Depends(get_current_user)
 ) -> User:
     """Require admin role."""
@@ -73,7 +73,7 @@ async def get_current_admin(
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
     existing = db.query(User).filter(
         (User.username == user_data.username) | (User.email == user_data.email)
@@ -117,7 +117,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(
+def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
@@ -160,7 +160,7 @@ async def login(
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
     """Refresh access token using refresh token."""
     payload = verify_token_type(refresh_token, "refresh")
     
@@ -211,7 +211,7 @@ async def get_me(current_user: User = Depends(get_current_user)):
 
 
 @router.put("/me", response_model=UserResponse)
-async def update_me(
+def update_me(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -4,9 +4,10 @@ Dashboard router - Dashboard statistics and ML training endpoints.
 
 from datetime import datetime, timedelta
 from typing import Dict, Any
+import threading
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, case, select
 
 from app.database import get_db
 from app.models.device import Device
@@ -15,44 +16,70 @@ from app.models.device_activity import DeviceActivity
 from app.models.alert import Alert
 from app.models.user import User
 from app.routers.auth import get_current_user, get_current_admin
-from app.ml.detector import anomaly_detector
+from app.ml.detector import get_anomaly_detector
+from app.ml.feature_extractor import DeviceColumns
 from app.schemas.device import DeviceStatsResponse
 from app.utils.logger import get_logger
+from app.utils.cache import ttl_cache
+from app.config import settings
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# Rows fetched per round-trip when streaming history for training
+ML_TRAIN_BATCH_SIZE = 5000
+
+# One training run at a time; a second request is refused rather than queued
+_ml_train_lock = threading.Lock()
+
+
+def _stream_rows(db: Session, statement):
+    """
+    Rows of a streamed query, executed only when first iterated.
+    
+    yield_per results hold an unbuffered cursor, and PyMySQL discards the
+    unread rest of one when the next query runs on the connection, so each
+    query must not start until the previous one has been read to the end.
+    """
+    yield from db.execute(statement.execution_options(yield_per=ML_TRAIN_BATCH_SIZE))
+
 
 @router.get("/stats")
-async def get_dashboard_stats(
+@ttl_cache(settings.STATS_CACHE_TTL)
+def get_dashboard_stats(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get dashboard statistics."""
-    total_devices = db.query(Device).count()
-    
-    online_threshold = datetime.utcnow() - timedelta(minutes=10)
-    online_devices = db.query(Device).filter(
-        Device.last_seen >= online_threshold
-    ).count()
+    now = datetime.utcnow()
+    online_threshold = now - timedelta(minutes=10)
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
     
-    trusted_devices = db.query(Device).filter(Device.is_trusted == True).count()
-    suspicious_devices = db.query(Device).filter(Device.is_suspicious == True).count()
+    scan_completed = ScanSession.status == "completed"
     
-    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    new_devices_today = db.query(Device).filter(Device.first_seen >= today).count()
-    
-    total_alerts = db.query(Alert).count()
-    unacknowledged_alerts = db.query(Alert).filter(Alert.is_acknowledged == False).count()
-    
-    total_scans = db.query(ScanSession).filter(
-        ScanSession.status == "completed"
-    ).count()
-    
-    last_scan = db.query(ScanSession).filter(
-        ScanSession.status == "completed"
-    ).order_by(ScanSession.completed_at.desc()).first()
+    # One round-trip for all counters, via conditional aggregates and scalar subqueries
+    (
+        total_devices,
+        online_devices,
+        trusted_devices,
+        suspicious_devices,
+        new_devices_today,
+        total_alerts,
+        unacknowledged_alerts,
+        total_scans,
+        last_scan_time,
+    ) = db.query(
+        func.count(Device.id),
+        func.count(case((Device.last_seen >= online_threshold, 1))),
+        func.count(case((Device.is_trusted == True, 1))),
+        func.count(case((Device.is_suspicious == True, 1))),
+        func.count(case((Device.first_seen >= today, 1))),
+        db.query(func.count(Alert.id)).scalar_subquery(),
+        db.query(func.count(Alert.id)).filter(Alert.is_acknowledged == False).scalar_subquery(),
+        db.query(func.count(ScanSession.id)).filter(scan_completed).scalar_subquery(),
+        db.query(func.max(ScanSession.completed_at)).filter(scan_completed).scalar_subquery(),
+    ).one()
     
     vendor_counts = db.query(
         Device.vendor, func.count(Device.id)
@@ -75,15 +102,15 @@ async def get_dashboard_stats(
         },
         "scans": {
             "total": total_scans,
-            "last_scan_time": last_scan.completed_at.isoformat() if last_scan else None
+            "last_scan_time": last_scan_time.isoformat() if last_scan_time else None
         },
         "devices_by_vendor": devices_by_vendor,
-        "ml_status": anomaly_detector.get_model_status()
+        "ml_status": get_anomaly_detector().get_model_status()
     }
 
 
 @router.get("/activity")
-async def get_activity_timeline(
+def get_activity_timeline(
     hours: int = 24,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -91,13 +118,16 @@ async def get_activity_timeline(
     """Get device activity timeline."""
     cutoff = datetime.utcnow() - timedelta(hours=hours)
     
-    activities = db.query(DeviceActivity).filter(
+    # Devices for the whole page come back in one extra IN query, not one per row
+    activities = db.query(DeviceActivity).options(
+        selectinload(DeviceActivity.device).load_only(Device.mac_address, Device.hostname)
+    ).filter(
         DeviceActivity.event_timestamp >= cutoff
     ).order_by(DeviceActivity.event_timestamp.desc()).limit(100).all()
     
     timeline = []
     for activity in activities:
-        device = db.query(Device).filter(Device.id == activity.device_id).first()
+        device = activity.device
         timeline.append({
             "id": activity.id,
             "event_type": activity.event_type,
@@ -112,33 +142,38 @@ async def get_activity_timeline(
 
 
 @router.get("/device-history")
-async def get_device_count_history(
+@ttl_cache(settings.STATS_CACHE_TTL)
+def get_device_count_history(
     days: int = 7,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get historical device count data for charts."""
-    history = []
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=days)
+    end = today + timedelta(days=1)
     
-    for i in range(days, -1, -1):
-        day = datetime.utcnow().replace(
-            hour=0, minute=0, second=0, microsecond=0
-        ) - timedelta(days=i)
-        
-        next_day = day + timedelta(days=1)
-        
-        count = db.query(Device).filter(
-            Device.first_seen < next_day
-        ).count()
-        
-        new_devices = db.query(Device).filter(
-            Device.first_seen >= day,
-            Device.first_seen < next_day
-        ).count()
+    # Running total starts from devices seen before the window
+    total = db.query(func.count(Device.id)).filter(Device.first_seen < start).scalar()
+    
+    first_day = func.date(Device.first_seen)
+    new_per_day = {
+        str(day): count
+        for day, count in db.query(first_day, func.count(Device.id)).filter(
+            Device.first_seen >= start,
+            Device.first_seen < end
+        ).group_by(first_day).all()
+    }
+    
+    history = []
+    for i in range(days + 1):
+        date = (start + timedelta(days=i)).strftime("%Y-%m-%d")
+        new_devices = new_per_day.get(date, 0)
+        total += new_devices
         
         history.append({
-            "date": day.strftime("%Y-%m-%d"),
-            "total_devices": count,
+            "date": date,
+            "total_devices": total,
             "new_devices": new_devices
         })
     
@@ -146,30 +181,43 @@ async def get_device_count_history(
 
 
 @router.post("/ml/train")
-async def train_ml_models(
+def train_ml_models(
     current_user: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
     """Train ML models on current device data."""
-    devices = db.query(Device).all()
-    
-    devices_data = []
-    for device in devices:
-        scan_results = db.query(ScanResult).filter(
-            ScanResult.device_id == device.id
-        ).all()
-        
-        activities = db.query(DeviceActivity).filter(
-            DeviceActivity.device_id == device.id
-        ).all()
-        
-        devices_data.append({
-            "device_info": device.to_dict(),
-            "scan_results": [sr.to_dict() for sr in scan_results],
-            "activities": [a.to_dict() for a in activities]
-        })
+    if not _ml_train_lock.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="ML training is already in progress"
+        )
+    try:
+        return _train_ml_models(current_user, db)
+    finally:
+        _ml_train_lock.release()
+
+
+def _train_ml_models(current_user: User, db: Session) -> Dict[str, Any]:
+    """Load training history and train the shared detector."""
+    # History tables are streamed in batches straight into column arrays;
+    # from_rows reads each source to the end before starting the next
+    devices_data = DeviceColumns.from_rows(
+        db.execute(select(Device.id, Device.first_seen, Device.is_trusted, Device.vendor)).all(),
+        _stream_rows(db, select(
+            ScanResult.device_id,
+            ScanResult.ip_address,
+            ScanResult.rssi,
+            ScanResult.scan_timestamp,
+            ScanResult.response_time_ms
+        )),
+        _stream_rows(db, select(
+            DeviceActivity.device_id,
+            DeviceActivity.event_type,
+            DeviceActivity.event_timestamp
+        ))
+    )
     
-    results = anomaly_detector.train(devices_data)
+    results = get_anomaly_detector().train(devices_data)
     
     logger.info(f"ML training initiated by {current_user.username}: {results}")
     
@@ -181,11 +229,11 @@ async def get_ml_status(
     current_user: User = Depends(get_current_user)
 ):
     """Get ML model status."""
-    return anomaly_detector.get_model_status()
+    return get_anomaly_detector().get_model_status()
 
 
 @router.get("/network-info")
-async def get_network_info(
+def get_network_info(
     current_user: User = Depends(get_current_user)
 ):
     """Get local network information."""
@@ -198,7 +246,7 @@ async def get_network_info(
 
 
 @router.get("/signal-info")
-async def get_signal_info(
+def get_signal_info(
     current_user: User = Depends(get_current_user)
 ):
     """Get WiFi signal information."""
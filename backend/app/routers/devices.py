@@ -6,39 +6,109 @@ from datetime import datetime, timedelta
 from typing import Optional, List
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, or_, select
 
 from app.database import get_db
 from app.models.device import Device
 from app.models.scan_result import ScanResult
 from app.models.device_activity import DeviceActivity
+from app.models.counter import Counter
 from app.models.user import User
 from app.schemas.device import (
     DeviceResponse, DeviceUpdate, DeviceListResponse,
     DeviceHistoryResponse, DeviceActivityResponse, ScanResultInfo
 )
 from app.routers.auth import get_current_user
-from app.ml.detector import anomaly_detector
+from app.ml.detector import get_anomaly_detector
 from app.utils.logger import get_logger
+from app.utils.pagination import encode_cursor, seek_before
+from app.utils.responses import model_response
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/devices", tags=["Devices"])
 
+# A device counts as online if it was seen within this window
+ONLINE_WINDOW = timedelta(minutes=10)
+
+# Columns a DeviceResponse reads; list pages select just these as plain rows
+DEVICE_RESPONSE_COLUMNS = (
+    Device.id,
+    Device.mac_address,
+    Device.hostname,
+    Device.vendor,
+    Device.device_type,
+    Device.first_seen,
+    Device.last_seen,
+    Device.is_trusted,
+    Device.is_suspicious,
+    Device.notes,
+)
+
+
+def scan_result_info(scan: ScanResult) -> ScanResultInfo:
+    """Build the embedded ScanResultInfo for a scan result."""
+    return ScanResultInfo.model_construct(
+        id=scan.id,
+        ip_address=scan.ip_address,
+        rssi=scan.rssi,
+        scan_timestamp=scan.scan_timestamp,
+        is_connected=scan.is_connected,
+        response_time_ms=scan.response_time_ms
+    )
+
+
+def device_response(
+    device: Device,
+    online_threshold: datetime,
+    latest_scan: Optional[ScanResult] = None
+) -> DeviceResponse:
+    """
+    Build a DeviceResponse; online_threshold is computed once per request.
+    
+    Accepts a Device or a row of DEVICE_RESPONSE_COLUMNS. Values come
+    straight from the database, so field validation is skipped.
+    """
+    return DeviceResponse.model_construct(
+        id=device.id,
+        mac_address=device.mac_address,
+        hostname=device.hostname,
+        vendor=device.vendor,
+        device_type=device.device_type,
+        first_seen=device.first_seen,
+        last_seen=device.last_seen,
+        is_trusted=device.is_trusted,
+        is_suspicious=device.is_suspicious,
+        notes=device.notes,
+        # Naive datetimes compare in C; converting to epoch floats per row costs more
+        is_online=device.last_seen is not None and device.last_seen >= online_threshold,
+        latest_scan=scan_result_info(latest_scan) if latest_scan else None
+    )
+
 
 @router.get("", response_model=DeviceListResponse)
-async def list_devices(
+def list_devices(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     is_trusted: Optional[bool] = None,
     is_suspicious: Optional[bool] = None,
     is_online: Optional[bool] = None,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """List all devices with filtering and pagination."""
-    query = db.query(Device)
+    """
+    List all devices with filtering and pagination.
+    
+    Pass the previous response's next_cursor instead of page to seek on
+    (last_seen, id) rather than scanning and discarding skipped rows.
+    """
+    # Plain column rows: no identity map entries, no unused columns hydrated
+    query = db.query(*DEVICE_RESPONSE_COLUMNS)
+    filtered = any(
+        value is not None for value in (is_trusted, is_suspicious, is_online)
+    ) or bool(search)
     
     if is_trusted is not None:
         query = query.filter(Device.is_trusted == is_trusted)
@@ -47,65 +117,60 @@ async def list_devices(
         query = query.filter(Device.is_suspicious == is_suspicious)
     
     if search:
-        search_pattern = f"%{search}%"
-        query = query.filter(
-            (Device.mac_address.ilike(search_pattern)) |
-            (Device.hostname.ilike(search_pattern)) |
-            (Device.vendor.ilike(search_pattern))
-        )
+        query = query.filter(Device.search_text.like(f"%{search.lower()}%"))
+    
+    online_threshold = datetime.utcnow() - ONLINE_WINDOW
+    
+    # Filtered in SQL so totals and page sizes account for it
+    if is_online is True:
+        query = query.filter(Device.last_seen >= online_threshold)
+    elif is_online is False:
+        query = query.filter(or_(Device.last_seen == None, Device.last_seen < online_threshold))
+    
+    # Total rides along with the page as an uncorrelated scalar subquery
+    # (evaluated once), taken before any cursor seek is applied. Unfiltered,
+    # it is the trigger-maintained counter instead of a COUNT over the table.
+    total_query = query.with_entities(func.count(Device.id))
+    query = query.add_columns(
+        (Counter.value_of("devices") if not filtered else total_query.scalar_subquery()).label("total")
+    )
     
-    total = query.count()
+    query = query.order_by(Device.last_seen.desc(), Device.id.desc())
     
-    query = query.order_by(Device.last_seen.desc())
+    if cursor:
+        query = query.filter(seek_before(Device.last_seen, Device.id, cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
     
-    offset = (page - 1) * page_size
-    devices = query.offset(offset).limit(page_size).all()
+    devices = query.limit(page_size).all()
     
-    online_threshold = datetime.utcnow() - timedelta(minutes=10)
+    if devices and devices[0].total is not None:
+        total = devices[0].total
+    elif devices or cursor or page > 1:
+        # No row to carry the total past the end, or no counter row yet
+        total = total_query.scalar()
+    else:
+        total = 0
     
-    device_responses = []
-    for device in devices:
-        device_online = device.last_seen >= online_threshold if device.last_seen else False
-        
-        if is_online is not None and device_online != is_online:
-            continue
-        
-        latest_scan = db.query(ScanResult).filter(
-            ScanResult.device_id == device.id
-        ).order_by(ScanResult.scan_timestamp.desc()).first()
-        
-        device_responses.append(DeviceResponse(
-            id=device.id,
-            mac_address=device.mac_address,
-            hostname=device.hostname,
-            vendor=device.vendor,
-            device_type=device.device_type,
-            first_seen=device.first_seen,
-            last_seen=device.last_seen,
-            is_trusted=device.is_trusted,
-            is_suspicious=device.is_suspicious,
-            notes=device.notes,
-            is_online=device_online,
-            latest_scan=ScanResultInfo(
-                id=latest_scan.id,
-                ip_address=latest_scan.ip_address,
-                rssi=latest_scan.rssi,
-                scan_timestamp=latest_scan.scan_timestamp,
-                is_connected=latest_scan.is_connected,
-                response_time_ms=latest_scan.response_time_ms
-            ) if latest_scan else None
-        ))
-    
-    return DeviceListResponse(
+    # Latest scan for the whole page in one round trip instead of one per device
+    latest_scans = ScanResult.latest_by_device(db, [device.id for device in devices])
+    
+    device_responses = [
+        device_response(device, online_threshold, latest_scans.get(device.id))
+        for device in devices
+    ]
+    
+    return model_response(DeviceListResponse.model_construct(
         total=total,
         page=page,
         page_size=page_size,
-        devices=device_responses
-    )
+        devices=device_responses,
+        next_cursor=encode_cursor(devices[-1].last_seen, devices[-1].id) if len(devices) == page_size else None
+    ))
 
 
 @router.get("/{device_id}", response_model=DeviceResponse)
-async def get_device(
+def get_device(
     device_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -119,38 +184,13 @@ async def get_device(
             detail="Device not found"
         )
     
-    online_threshold = datetime.utcnow() - timedelta(minutes=10)
-    device_online = device.last_seen >= online_threshold if device.last_seen else False
+    latest_scan = ScanResult.latest_by_device(db, [device.id]).get(device.id)
     
-    latest_scan = db.query(ScanResult).filter(
-        ScanResult.device_id == device.id
-    ).order_by(ScanResult.scan_timestamp.desc()).first()
-    
-    return DeviceResponse(
-        id=device.id,
-        mac_address=device.mac_address,
-        hostname=device.hostname,
-        vendor=device.vendor,
-        device_type=device.device_type,
-        first_seen=device.first_seen,
-        last_seen=device.last_seen,
-        is_trusted=device.is_trusted,
-        is_suspicious=device.is_suspicious,
-        notes=device.notes,
-        is_online=device_online,
-        latest_scan=ScanResultInfo(
-            id=latest_scan.id,
-            ip_address=latest_scan.ip_address,
-            rssi=latest_scan.rssi,
-            scan_timestamp=latest_scan.scan_timestamp,
-            is_connected=latest_scan.is_connected,
-            response_time_ms=latest_scan.response_time_ms
-        ) if latest_scan else None
-    )
+    return model_response(device_response(device, datetime.utcnow() - ONLINE_WINDOW, latest_scan))
 
 
 @router.put("/{device_id}", response_model=DeviceResponse)
-async def update_device(
+def update_device(
     device_id: int,
     update_data: DeviceUpdate,
     current_user: User = Depends(get_current_user),
@@ -165,43 +205,25 @@ async def update_device(
             detail="Device not found"
         )
     
-    if update_data.hostname is not None:
-        device.hostname = update_data.hostname
-    if update_data.device_type is not None:
-        device.device_type = update_data.device_type
-    if update_data.is_trusted is not None:
-        device.is_trusted = update_data.is_trusted
-    if update_data.is_suspicious is not None:
-        device.is_suspicious = update_data.is_suspicious
-    if update_data.notes is not None:
-        device.notes = update_data.notes
-    
-    db.commit()
-    db.refresh(device)
-    
-    logger.info(f"Device {device.mac_address} updated by {current_user.username}")
-    
-    online_threshold = datetime.utcnow() - timedelta(minutes=10)
-    device_online = device.last_seen >= online_threshold if device.last_seen else False
+    changed = False
+    for field in ("hostname", "device_type", "is_trusted", "is_suspicious", "notes"):
+        value = getattr(update_data, field)
+        if value is not None and getattr(device, field) != value:
+            setattr(device, field, value)
+            changed = True
+    
+    # Nothing to write: skip the UPDATE, commit and reload round trips
+    if changed:
+        db.commit()
+        db.refresh(device)
+        
+        logger.info(f"Device {device.mac_address} updated by {current_user.username}")
     
-    return DeviceResponse(
-        id=device.id,
-        mac_address=device.mac_address,
-        hostname=device.hostname,
-        vendor=device.vendor,
-        device_type=device.device_type,
-        first_seen=device.first_seen,
-        last_seen=device.last_seen,
-        is_trusted=device.is_trusted,
-        is_suspicious=device.is_suspicious,
-        notes=device.notes,
-        is_online=device_online,
-        latest_scan=None
-    )
+    return model_response(device_response(device, datetime.utcnow() - ONLINE_WINDOW))
 
 
 @router.delete("/{device_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_device(
+def delete_device(
     device_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -223,7 +245,7 @@ async def delete_device(
 
 
 @router.get("/{device_id}/history", response_model=DeviceHistoryResponse)
-async def get_device_history(
+def get_device_history(
     device_id: int,
     days: int = Query(7, ge=1, le=90),
     current_user: User = Depends(get_current_user),
@@ -238,7 +260,8 @@ async def get_device_history(
             detail="Device not found"
         )
     
-    cutoff = datetime.utcnow() - timedelta(days=days)
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=days)
     
     activities = db.query(DeviceActivity).filter(
         DeviceActivity.device_id == device_id,
@@ -250,26 +273,10 @@ async def get_device_history(
         ScanResult.scan_timestamp >= cutoff
     ).order_by(ScanResult.scan_timestamp.desc()).limit(100).all()
     
-    online_threshold = datetime.utcnow() - timedelta(minutes=10)
-    device_online = device.last_seen >= online_threshold if device.last_seen else False
-    
-    return DeviceHistoryResponse(
-        device=DeviceResponse(
-            id=device.id,
-            mac_address=device.mac_address,
-            hostname=device.hostname,
-            vendor=device.vendor,
-            device_type=device.device_type,
-            first_seen=device.first_seen,
-            last_seen=device.last_seen,
-            is_trusted=device.is_trusted,
-            is_suspicious=device.is_suspicious,
-            notes=device.notes,
-            is_online=device_online,
-            latest_scan=None
-        ),
+    return model_response(DeviceHistoryResponse.model_construct(
+        device=device_response(device, now - ONLINE_WINDOW),
         activities=[
-            DeviceActivityResponse(
+            DeviceActivityResponse.model_construct(
                 id=a.id,
                 device_id=a.device_id,
                 event_type=a.event_type,
@@ -278,21 +285,12 @@ async def get_device_history(
                 event_timestamp=a.event_timestamp
             ) for a in activities
         ],
-        scan_results=[
-            ScanResultInfo(
-                id=s.id,
-                ip_address=s.ip_address,
-                rssi=s.rssi,
-                scan_timestamp=s.scan_timestamp,
-                is_connected=s.is_connected,
-                response_time_ms=s.response_time_ms
-            ) for s in scans
-        ]
-    )
+        scan_results=[scan_result_info(s) for s in scans]
+    ))
 
 
 @router.post("/{device_id}/analyze")
-async def analyze_device(
+def analyze_device(
     device_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -306,26 +304,31 @@ async def analyze_device(
             detail="Device not found"
         )
     
+    anomaly_detector = get_anomaly_detector()
+    
     if not anomaly_detector.is_trained():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="ML models not trained. Train models first."
         )
     
-    scan_results = db.query(ScanResult).filter(
-        ScanResult.device_id == device_id
-    ).all()
-    
-    activities = db.query(DeviceActivity).filter(
-        DeviceActivity.device_id == device_id
-    ).all()
+    # Only the columns the feature extractor reads, as plain row mappings:
+    # no ORM instances or to_dict() copies, and the same raw datetimes that
+    # training reads
+    scan_results = db.execute(select(
+        ScanResult.ip_address,
+        ScanResult.rssi,
+        ScanResult.scan_timestamp,
+        ScanResult.response_time_ms
+    ).where(ScanResult.device_id == device_id)).mappings().all()
+    
+    activities = db.execute(select(
+        DeviceActivity.event_type,
+        DeviceActivity.event_timestamp
+    ).where(DeviceActivity.device_id == device_id)).mappings().all()
     
     device_info = device.to_dict()
     
-    prediction = anomaly_detector.predict(
-        [s.to_dict() for s in scan_results],
-        [a.to_dict() for a in activities],
-        device_info
-    )
+    prediction = anomaly_detector.predict(scan_results, activities, device_info)
     
     return prediction
@@ -2,20 +2,25 @@
 Scans router - Network scanning endpoints.
 """
 
+import asyncio
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Union, Iterator
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 
-from app.database import get_db
+from app.database import get_db, bulk_insert, SessionLocal
 from app.models.device import Device
 from app.models.scan_result import ScanResult, ScanSession, ScanType, ScanStatus
 from app.models.device_activity import DeviceActivity, EventType
 from app.models.alert import Alert
+from app.models.counter import Counter
 from app.models.user import User
 from app.schemas.scan import (
-    ScanRequest, ScanSessionResponse, ScanStatusResponse,
+    ScanRequest, ScanSessionResponse, ScanStatusResponse, ScanHistoryResponse,
     ScanResultsSummary, DiscoveredDevice
 )
 from app.routers.auth import get_current_user, get_current_admin
@@ -24,20 +29,238 @@ from app.services.fingerprinter import fingerprinter
 from app.services.notification import notification_service
 from app.config import settings
 from app.utils.logger import get_logger
+from app.utils.pagination import encode_cursor, seek_before
+from app.utils.responses import model_response
+from app.utils.serialization import dumps
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/scans", tags=["Scans"])
 
-_current_scan_session: Optional[ScanSession] = None
+# Scan result rows fetched and written per chunk when streaming a session's results
+SCAN_RESULTS_STREAM_BATCH = 500
 
 
-async def perform_scan(
+@dataclass
+class ScanSnapshot:
+    """
+    Plain copy of the running scan's session row.
+    
+    Read by status requests on other threads and sessions, so it must not be
+    an ORM instance (whose expired attributes would lazy-load across sessions).
+    """
+    id: int
+    started_at: datetime
+    scan_type: str
+    network_range: Optional[str]
+    status: str = "running"
+    completed_at: Optional[datetime] = None
+    total_devices_found: int = 0
+    new_devices_found: int = 0
+    error_message: Optional[str] = None
+    
+    @classmethod
+    def from_session(cls, session: ScanSession) -> "ScanSnapshot":
+        """Snapshot a freshly committed scan session."""
+        return cls(
+            id=session.id,
+            started_at=session.started_at,
+            scan_type=session.scan_type,
+            network_range=session.network_range,
+            status=session.status,
+            completed_at=session.completed_at,
+            total_devices_found=session.total_devices_found or 0,
+            new_devices_found=session.new_devices_found or 0,
+            error_message=session.error_message
+        )
+    
+    @property
+    def duration_seconds(self) -> float:
+        """Seconds elapsed since the scan started."""
+        return ((self.completed_at or datetime.utcnow()) - self.started_at).total_seconds()
+
+
+# Per-process; the lock serializes start_scan's check-and-set across threadpool requests
+_current_scan_session: Optional[ScanSnapshot] = None
+_scan_start_lock = threading.Lock()
+
+
+def session_response(session: Union[ScanSession, ScanSnapshot]) -> ScanSessionResponse:
+    """
+    Build a ScanSessionResponse from a ScanSession or ScanSnapshot.
+    
+    Values are trusted, so validation is skipped.
+    """
+    return ScanSessionResponse.model_construct(
+        id=session.id,
+        started_at=session.started_at,
+        completed_at=session.completed_at,
+        total_devices_found=session.total_devices_found,
+        new_devices_found=session.new_devices_found,
+        scan_type=session.scan_type,
+        network_range=session.network_range,
+        status=session.status,
+        error_message=session.error_message,
+        duration_seconds=session.duration_seconds
+    )
+
+
+async def perform_scan(scan_request: ScanRequest, session_id: int):
+    """
+    Background task to perform network scan.
+    
+    Runs after the response is sent, so it opens its own session rather than
+    borrowing the request's, which the dependency has already closed.
+    """
+    with SessionLocal() as db:
+        await run_scan(scan_request, session_id, db)
+
+
+def record_scan_results(db: Session, session: ScanSession, results: list):
+    """
+    Write one scan's results and complete its session.
+    
+    Plain blocking ORM work; run_scan calls it on a worker thread so the
+    event loop keeps serving other requests while a large batch is written.
+    Returns (total_devices, new_devices, alert_payloads, device_events).
+    """
+    session_id = session.id
+    new_devices = 0
+    total_devices = len(results)
+    scan_rows = []
+    activity_rows = []
+    # Notifications go out together once the batch is committed
+    alert_payloads = []
+    device_events = []
+    # One clock read for the whole batch: last_seen, scan rows and completed_at
+    now = datetime.utcnow()
+    
+    # Resolve every MAC in the batch with set-based queries up front
+    # instead of per-result lookups inside the loop
+    devices_by_mac = {
+        device.mac_address: device
+        for device in db.query(Device).filter(
+            Device.mac_address.in_(list({result.mac_address for result in results}))
+        )
+    }
+    last_scans = ScanResult.latest_by_device(
+        db, [device.id for device in devices_by_mac.values()]
+    )
+    
+    # First sighting of each unknown MAC, fingerprinted as one batch
+    unseen = {}
+    for result in results:
+        if result.mac_address not in devices_by_mac:
+            unseen.setdefault(result.mac_address, result)
+    fingerprints = fingerprinter.fingerprint_batch([
+        (result.mac_address, result.hostname, result.ip_address)
+        for result in unseen.values()
+    ])
+    
+    new_device_rows = {}
+    for result, fingerprint in zip(unseen.values(), fingerprints):
+        new_device_rows[result.mac_address] = {
+            "mac_address": result.mac_address,
+            "hostname": result.hostname,
+            "vendor": fingerprint.get("vendor"),
+            "device_type": fingerprint.get("device_type"),
+            "first_seen": now,
+            "last_seen": now
+        }
+    
+    if new_device_rows:
+        # MySQL has no INSERT ... RETURNING; read the new ids back by MAC
+        bulk_insert(db, Device, list(new_device_rows.values()))
+        devices_by_mac.update(
+            (device.mac_address, device)
+            for device in db.query(Device).filter(
+                Device.mac_address.in_(list(new_device_rows))
+            )
+        )
+    
+    seen_ids = set()
+    for result in results:
+        device = devices_by_mac[result.mac_address]
+        
+        # A MAC reported twice is only new on its first appearance
+        is_new = result.mac_address in new_device_rows and device.id not in seen_ids
+        seen_ids.add(device.id)
+        
+        if is_new:
+            new_devices += 1
+            
+            if settings.ALERT_NEW_DEVICES:
+                alert = Alert.create_new_device_alert(
+                    device.id,
+                    device.mac_address,
+                    device.vendor
+                )
+                db.add(alert)
+                alert_payloads.append(alert.to_dict())
+            
+            activity_rows.append(
+                DeviceActivity.log_connection(device.id, result.ip_address).to_row(now)
+            )
+        else:
+            last_scan = last_scans.get(device.id)
+            
+            if last_scan and last_scan.ip_address != result.ip_address:
+                activity_rows.append(DeviceActivity.log_ip_change(
+                    device.id, last_scan.ip_address, result.ip_address
+                ).to_row(now))
+            
+            if result.hostname and device.hostname != result.hostname:
+                old_hostname = device.hostname
+                device.hostname = result.hostname
+                # Set explicitly so this row's UPDATE doesn't fall back to onupdate
+                device.update_last_seen(now)
+                
+                activity_rows.append(DeviceActivity.log_hostname_change(
+                    device.id, old_hostname, result.hostname
+                ).to_row(now))
+        
+        scan_rows.append({
+            "device_id": device.id,
+            "session_id": session_id,
+            "ip_address": result.ip_address,
+            "rssi": None,
+            "scan_timestamp": now,
+            "response_time_ms": result.response_time_ms,
+            "is_connected": True
+        })
+        
+        device_events.append((
+            {"mac_address": device.mac_address, "is_new": is_new},
+            "discovered" if is_new else "updated"
+        ))
+    
+    # last_seen for every device already on record in one UPDATE; new ones
+    # were inserted with it
+    seen_before = [
+        device.id for mac, device in devices_by_mac.items()
+        if mac not in new_device_rows
+    ]
+    if seen_before:
+        db.query(Device).filter(Device.id.in_(seen_before)).update(
+            {Device.last_seen: now}, synchronize_session=False
+        )
+    
+    # One multi-row INSERT per batch instead of a round-trip per result
+    bulk_insert(db, ScanResult, scan_rows)
+    bulk_insert(db, DeviceActivity, activity_rows)
+    
+    session.mark_completed(total_devices, new_devices, now=now)
+    db.commit()
+    
+    return total_devices, new_devices, alert_payloads, device_events
+
+
+async def run_scan(
     scan_request: ScanRequest,
     session_id: int,
     db: Session
 ):
-    """Background task to perform network scan."""
+    """Scan the network and record the results against a scan session."""
     global _current_scan_session
     
     try:
@@ -50,91 +273,28 @@ async def perform_scan(
             timeout=scan_request.timeout
         )
         
+        # The scan blocks for seconds; keep it off the event loop
         if scan_request.scan_type == "arp":
-            results = scanner.arp_scan()
+            results = await scanner.async_arp_scan()
         elif scan_request.scan_type == "icmp":
-            results = scanner.icmp_scan()
+            results = await scanner.async_icmp_scan()
         else:
-            results = scanner.full_scan()
-        
-        new_devices = 0
-        total_devices = len(results)
+            results = await scanner.async_full_scan()
         
-        for result in results:
-            device = db.query(Device).filter(
-                Device.mac_address == result.mac_address
-            ).first()
-            
-            is_new = False
-            
-            if not device:
-                fingerprint = fingerprinter.fingerprint(
-                    result.mac_address,
-                    result.hostname
-                )
-                
-                device = Device(
-                    mac_address=result.mac_address,
-                    hostname=result.hostname,
-                    vendor=fingerprint.get("vendor"),
-                    device_type=fingerprint.get("device_type")
-                )
-                db.add(device)
-                db.flush()
-                
-                is_new = True
-                new_devices += 1
-                
-                if settings.ALERT_NEW_DEVICES:
-                    alert = Alert.create_new_device_alert(
-                        device.id,
-                        device.mac_address,
-                        device.vendor
-                    )
-                    db.add(alert)
-                    
-                    await notification_service.send_alert(alert.to_dict())
-                
-                activity = DeviceActivity.log_connection(device.id, result.ip_address)
-                db.add(activity)
-            else:
-                last_scan = db.query(ScanResult).filter(
-                    ScanResult.device_id == device.id
-                ).order_by(ScanResult.scan_timestamp.desc()).first()
-                
-                if last_scan and last_scan.ip_address != result.ip_address:
-                    activity = DeviceActivity.log_ip_change(
-                        device.id, last_scan.ip_address, result.ip_address
-                    )
-                    db.add(activity)
-                
-                if result.hostname and device.hostname != result.hostname:
-                    old_hostname = device.hostname
-                    device.hostname = result.hostname
-                    
-                    activity = DeviceActivity.log_hostname_change(
-                        device.id, old_hostname, result.hostname
-                    )
-                    db.add(activity)
-                
-                device.update_last_seen()
-            
-            scan_result = ScanResult(
-                device_id=device.id,
-                ip_address=result.ip_address,
-                rssi=None,
-                response_time_ms=result.response_time_ms,
-                is_connected=True
-            )
-            db.add(scan_result)
-            
-            await notification_service.send_device_update(
-                {"mac_address": device.mac_address, "is_new": is_new},
-                "discovered" if is_new else "updated"
-            )
+        # The DB phase is synchronous; run it off the event loop as well
+        total_devices, new_devices, alert_payloads, device_events = await asyncio.to_thread(
+            record_scan_results, db, session, results
+        )
         
-        session.mark_completed(total_devices, new_devices)
-        db.commit()
+        # Overlap the sends (email/webhook for alerts) instead of awaiting each in turn
+        outcomes = await asyncio.gather(
+            *(notification_service.send_alert(payload) for payload in alert_payloads),
+            *(notification_service.send_device_update(device, event) for device, event in device_events),
+            return_exceptions=True
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                logger.error(f"Scan notification failed: {outcome}")
         
         await notification_service.send_scan_update({
             "status": "completed",
@@ -160,136 +320,135 @@ async def perform_scan(
         })
     
     finally:
-        _current_scan_session = None
+        if _current_scan_session is not None and _current_scan_session.id == session_id:
+            _current_scan_session = None
 
 
-@router.post("/start", response_model=ScanSessionResponse)
-async def start_scan(
+@router.post("/start", response_model=ScanSessionResponse, status_code=status.HTTP_202_ACCEPTED)
+def start_scan(
     scan_request: ScanRequest,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Start a new network scan."""
+    """
+    Start a new network scan.
+    
+    Returns 202 with the running session as soon as it is recorded; poll
+    /scans/status or the WebSocket for completion.
+    """
     global _current_scan_session
     
-    if _current_scan_session and _current_scan_session.status == "running":
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="A scan is already in progress"
+    with _scan_start_lock:
+        if _current_scan_session and _current_scan_session.status == "running":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A scan is already in progress"
+            )
+        
+        session = ScanSession(
+            scan_type=scan_request.scan_type,
+            network_range=scan_request.network_range or settings.DEFAULT_NETWORK_RANGE,
+            status="running"
         )
+        
+        db.add(session)
+        db.commit()
+        db.refresh(session)
+        
+        _current_scan_session = ScanSnapshot.from_session(session)
     
-    session = ScanSession(
-        scan_type=scan_request.scan_type,
-        network_range=scan_request.network_range or settings.DEFAULT_NETWORK_RANGE,
-        status="running"
-    )
-    
-    db.add(session)
-    db.commit()
-    db.refresh(session)
-    
-    _current_scan_session = session
-    
-    background_tasks.add_task(perform_scan, scan_request, session.id, db)
+    background_tasks.add_task(perform_scan, scan_request, session.id)
     
     logger.info(f"Scan started by {current_user.username}: {session.id}")
     
-    return ScanSessionResponse(
-        id=session.id,
-        started_at=session.started_at,
-        completed_at=session.completed_at,
-        total_devices_found=session.total_devices_found,
-        new_devices_found=session.new_devices_found,
-        scan_type=session.scan_type,
-        network_range=session.network_range,
-        status=session.status,
-        error_message=session.error_message,
-        duration_seconds=session.duration_seconds
-    )
+    return model_response(session_response(session), status_code=status.HTTP_202_ACCEPTED)
 
 
 @router.get("/status", response_model=ScanStatusResponse)
-async def get_scan_status(
+def get_scan_status(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get current scan status."""
-    global _current_scan_session
+    # One read of the global; the scan task may clear it concurrently
+    current = _current_scan_session
     
-    is_scanning = _current_scan_session is not None and _current_scan_session.status == "running"
+    is_scanning = current is not None and current.status == "running"
     
     last_session = db.query(ScanSession).filter(
         ScanSession.status == "completed"
     ).order_by(ScanSession.completed_at.desc()).first()
     
     current_session = None
-    if _current_scan_session:
-        current_session = ScanSessionResponse(
-            id=_current_scan_session.id,
-            started_at=_current_scan_session.started_at,
-            completed_at=_current_scan_session.completed_at,
-            total_devices_found=_current_scan_session.total_devices_found,
-            new_devices_found=_current_scan_session.new_devices_found,
-            scan_type=_current_scan_session.scan_type,
-            network_range=_current_scan_session.network_range,
-            status=_current_scan_session.status,
-            error_message=_current_scan_session.error_message,
-            duration_seconds=_current_scan_session.duration_seconds
-        )
+    if current:
+        current_session = session_response(current)
     
     return ScanStatusResponse(
         is_scanning=is_scanning,
         current_session=current_session,
         last_scan_time=last_session.completed_at if last_session else None,
         next_scheduled_scan=None,
-        devices_found_in_current_scan=_current_scan_session.total_devices_found if _current_scan_session else 0
+        devices_found_in_current_scan=current.total_devices_found if current else 0
     )
 
 
-@router.get("/history")
-async def get_scan_history(
+@router.get("/history", response_model=ScanHistoryResponse)
+def get_scan_history(
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get scan history."""
-    total = db.query(ScanSession).count()
-    
-    offset = (page - 1) * page_size
-    sessions = db.query(ScanSession).order_by(
-        ScanSession.started_at.desc()
-    ).offset(offset).limit(page_size).all()
-    
-    return {
-        "total": total,
-        "page": page,
-        "page_size": page_size,
-        "sessions": [
-            ScanSessionResponse(
-                id=s.id,
-                started_at=s.started_at,
-                completed_at=s.completed_at,
-                total_devices_found=s.total_devices_found,
-                new_devices_found=s.new_devices_found,
-                scan_type=s.scan_type,
-                network_range=s.network_range,
-                status=s.status,
-                error_message=s.error_message,
-                duration_seconds=s.duration_seconds
-            ) for s in sessions
-        ]
-    }
+    """Get scan history, by page or by the previous response's next_cursor."""
+    # Total is the trigger-maintained counter, riding along with the page
+    total_query = db.query(func.count(ScanSession.id))
+    
+    query = db.query(
+        ScanSession,
+        Counter.value_of("scan_sessions").label("total")
+    ).order_by(
+        ScanSession.started_at.desc(), ScanSession.id.desc()
+    )
+    
+    if cursor:
+        query = query.filter(seek_before(ScanSession.started_at, ScanSession.id, cursor))
+    else:
+        query = query.offset((page - 1) * page_size)
+    
+    rows = query.limit(page_size).all()
+    sessions = [session for session, _ in rows]
+    
+    if rows and rows[0].total is not None:
+        total = rows[0].total
+    elif rows or cursor or page > 1:
+        # No row to carry the total past the end, or no counter row yet
+        total = total_query.scalar()
+    else:
+        total = 0
+    
+    return model_response(ScanHistoryResponse.model_construct(
+        total=total,
+        page=page,
+        page_size=page_size,
+        next_cursor=encode_cursor(sessions[-1].started_at, sessions[-1].id) if len(sessions) == page_size else None,
+        sessions=[session_response(s) for s in sessions]
+    ))
 
 
 @router.get("/results/{session_id}")
-async def get_scan_results(
+def get_scan_results(
     session_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get results for a specific scan session."""
+    """
+    Get results for a specific scan session.
+    
+    The body is streamed from a server-side cursor, so memory stays at one
+    chunk of rows however large the session is.
+    """
     session = db.query(ScanSession).filter(ScanSession.id == session_id).first()
     
     if not session:
@@ -298,23 +457,31 @@ async def get_scan_results(
             detail="Scan session not found"
         )
     
-    results = db.query(ScanResult).filter(
-        ScanResult.scan_timestamp >= session.started_at,
-        ScanResult.scan_timestamp <= (session.completed_at or datetime.utcnow())
-    ).all()
+    header = b'{"session":' + dumps(session_response(session).model_dump(mode="json")) + b',"results":['
     
-    return {
-        "session": ScanSessionResponse(
-            id=session.id,
-            started_at=session.started_at,
-            completed_at=session.completed_at,
-            total_devices_found=session.total_devices_found,
-            new_devices_found=session.new_devices_found,
-            scan_type=session.scan_type,
-            network_range=session.network_range,
-            status=session.status,
-            error_message=session.error_message,
-            duration_seconds=session.duration_seconds
-        ),
-        "results": [r.to_dict() for r in results]
-    }
+    return StreamingResponse(
+        _stream_scan_results(session_id, header),
+        media_type="application/json"
+    )
+
+
+def _stream_scan_results(session_id: int, header: bytes) -> Iterator[bytes]:
+    """Yield the results body chunk by chunk after the header."""
+    yield header
+    
+    # Own session: the body outlives the request handler and its dependency
+    with SessionLocal() as db:
+        # Equality on the indexed FK; a timestamp window could pick up rows
+        # from overlapping sessions
+        results = db.execute(
+            select(ScanResult).where(
+                ScanResult.session_id == session_id
+            ).execution_options(yield_per=SCAN_RESULTS_STREAM_BATCH)
+        ).scalars()
+        
+        separator = b""
+        for chunk in results.partitions():
+            yield separator + b",".join(dumps(r.to_dict()) for r in chunk)
+            separator = b","
+    
+    yield b"]}"
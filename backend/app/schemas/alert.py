@@ -58,6 +58,8 @@ class AlertListResponse(BaseModel):
     page_size: int
     unacknowledged_count: int
     alerts: List[AlertResponse]
+    # Pass back as ?cursor= to fetch the next page by keyset; None on the last page
+    next_cursor: Optional[str] = None
 
 
 class AlertStats(BaseModel):
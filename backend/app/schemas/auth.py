@@ -7,6 +7,27 @@ from typing import Optional
 from pydantic import BaseModel, EmailStr, Field, validator
 import re
 
+# Compiled once at import rather than looked up in re's cache per validation
+_UPPER = re.compile(r'[A-Z]')
+_LOWER = re.compile(r'[a-z]')
+_DIGIT = re.compile(r'\d')
+_USERNAME = re.compile(r'^[a-zA-Z0-9_]+$')
+
+_PASSWORD_CLASSES = (
+    (_UPPER, 'uppercase letter'),
+    (_LOWER, 'lowercase letter'),
+    (_DIGIT, 'digit'),
+)
+
+
+def _validate_password_strength(v: str) -> str:
+    """Require an uppercase letter, a lowercase letter and a digit, reporting all that are missing."""
+    missing = [name for pattern, name in _PASSWORD_CLASSES if not pattern.search(v)]
+    if missing:
+        required = ', one '.join(missing[:-1]) + ' and one ' + missing[-1] if len(missing) > 1 else missing[0]
+        raise ValueError(f'Password must contain at least one {required}')
+    return v
+
 
 class UserBase(BaseModel):
     """Base user schema."""
@@ -22,13 +43,7 @@ class UserCreate(UserBase):
     @validator('password')
     def validate_password(cls, v):
         """Validate password strength."""
-        if not re.search(r'[A-Z]', v):
-            raise ValueError('Password must contain at least one uppercase letter')
-        if not re.search(r'[a-z]', v):
-            raise ValueError('Password must contain at least one lowercase letter')
-        if not re.search(r'\d', v):
-            raise ValueError('Password must contain at least one digit')
-        return v
+        return _validate_password_strength(v)
     
     @validator('confirm_password')
     def passwords_match(cls, v, values):
@@ -40,7 +55,7 @@ class UserCreate(UserBase):
     @validator('username')
     def validate_username(cls, v):
         """Validate username format."""
-        if not re.match(r'^[a-zA-Z0-9_]+$', v):
+        if not _USERNAME.match(v):
             raise ValueError('Username can only contain letters, numbers, and underscores')
         return v
 
@@ -63,12 +78,7 @@ class UserUpdate(BaseModel):
         if v and not values.get('current_password'):
             raise ValueError('Current password is required to change password')
         if v:
-            if not re.search(r'[A-Z]', v):
-                raise ValueError('Password must contain at least one uppercase letter')
-            if not re.search(r'[a-z]', v):
-                raise ValueError('Password must contain at least one lowercase letter')
-            if not re.search(r'\d', v):
-                raise ValueError('Password must contain at least one digit')
+            _validate_password_strength(v)
         return v
 
 
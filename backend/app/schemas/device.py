@@ -3,25 +3,30 @@ Device schemas for request/response validation.
 """
 
 from datetime import datetime
-from typing import Optional, List
-from pydantic import BaseModel, Field, validator
+from typing import Optional, List, Annotated
+from pydantic import AfterValidator, BaseModel, Field
 import re
 
+_MAC_ADDRESS = re.compile(r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$')
+
+
+def _validate_mac_address(v: str) -> str:
+    """Validate MAC address format and normalize to upper case."""
+    if not _MAC_ADDRESS.match(v):
+        raise ValueError('Invalid MAC address format. Expected: XX:XX:XX:XX:XX:XX')
+    return v.upper()
+
+
+# Reusable validated MAC string; one shared validator instead of one per field
+MacAddress = Annotated[str, Field(min_length=17, max_length=17), AfterValidator(_validate_mac_address)]
+
 
 class DeviceBase(BaseModel):
     """Base device schema."""
-    mac_address: str = Field(..., min_length=17, max_length=17)
+    mac_address: MacAddress
     hostname: Optional[str] = None
     vendor: Optional[str] = None
     device_type: Optional[str] = None
-    
-    @validator('mac_address')
-    def validate_mac_address(cls, v):
-        """Validate MAC address format."""
-        mac_pattern = r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'
-        if not re.match(mac_pattern, v):
-            raise ValueError('Invalid MAC address format. Expected: XX:XX:XX:XX:XX:XX')
-        return v.upper()
 
 
 class DeviceCreate(DeviceBase):
@@ -78,6 +83,7 @@ class DeviceListResponse(BaseModel):
     page: int
     page_size: int
     devices: List[DeviceResponse]
+    next_cursor: Optional[str] = None
 
 
 class DeviceActivityResponse(BaseModel):
@@ -3,15 +3,18 @@ Scan-related schemas.
 """
 
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Literal
 from pydantic import BaseModel, Field, validator
 import re
 
+_CIDR = re.compile(r'^(\d{1,3}\.){3}\d{1,3}/\d{1,2}$')
+
 
 class ScanRequest(BaseModel):
     """Schema for initiating a network scan."""
     network_range: Optional[str] = None
-    scan_type: str = Field(default="arp", pattern="^(arp|icmp|full)$")
+    # A literal is a set-membership check in pydantic-core, no regex engine
+    scan_type: Literal["arp", "icmp", "full"] = "arp"
     timeout: int = Field(default=3, ge=1, le=30)
     
     @validator('network_range')
@@ -19,8 +22,7 @@ class ScanRequest(BaseModel):
         """Validate CIDR network range format."""
         if v is None:
             return v
-        cidr_pattern = r'^(\d{1,3}\.){3}\d{1,3}/\d{1,2}$'
-        if not re.match(cidr_pattern, v):
+        if not _CIDR.match(v):
             raise ValueError('Invalid network range format. Expected: X.X.X.X/XX')
         return v
 
@@ -59,6 +61,15 @@ class ScanSessionResponse(BaseModel):
         from_attributes = True
 
 
+class ScanHistoryResponse(BaseModel):
+    """Schema for a page of scan history."""
+    total: int
+    page: int
+    page_size: int
+    next_cursor: Optional[str] = None
+    sessions: List[ScanSessionResponse]
+
+
 class ScanStatusResponse(BaseModel):
     """Schema for current scan status."""
     is_scanning: bool
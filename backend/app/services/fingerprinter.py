@@ -2,22 +2,180 @@
 Device Fingerprinting Module - Identify devices by MAC, hostname, and behavior.
 """
 
+import re
 import socket
 import struct
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple
 import logging
 
-from app.utils.oui_lookup import oui_lookup
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+from app.utils.oui_lookup import OUILookup, get_oui_lookup
 from app.utils.logger import get_logger
+from app.utils.cache import ttl_cache
 
 logger = get_logger(__name__)
 
+# Distinct OUIs remembered by the vendor/device-type cache
+OUI_CACHE_SIZE = 4096
+
+# Distinct (MAC, hostname) pairs remembered by the fingerprint cache
+FINGERPRINT_CACHE_SIZE = 8192
+
+# Per-IP reverse DNS / NetBIOS answers; misses are retried sooner so a host
+# that comes up mid-sweep is named on a later scan
+HOSTNAME_CACHE_TTL = 300
+HOSTNAME_NEGATIVE_TTL = 60
+HOSTNAME_CACHE_SIZE = 4096
+
+# Reverse DNS gets this many seconds per IP, counted from when the lookup
+# starts; a lookup stuck on an unresponsive resolver is treated as a miss
+# instead of holding up the scan
+HOSTNAME_LOOKUP_TIMEOUT = 0.5
+# Lookups still queued for a worker this long after submission are cancelled
+HOSTNAME_QUEUE_TIMEOUT = 5.0
+_dns_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="dns")
+
+# ASCII hex digit -> nibble value, for reading MAC flag bits without int()
+_HEX_NIBBLE = bytes.maketrans(b"0123456789ABCDEFabcdef", bytes(range(16)) + bytes(range(10, 16)))
+
+# NBSTAT query for the wildcard name "*", sent to UDP 137
+_NETBIOS_REQUEST = (
+    b'\x80\x94\x00\x00\x00\x01\x00\x00'
+    b'\x00\x00\x00\x00\x20CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA\x00\x00\x21\x00\x01'
+)
+
+# Hostname substrings per guess, in priority order (first matching category wins)
+_OS_HOSTNAME_PATTERNS = {
+    "windows": ["desktop-", "laptop-", "win-", "-pc", "windows"],
+    "macos": ["macbook", "imac", "mac-", "macpro", "macmini"],
+    "linux": ["linux", "ubuntu", "debian", "fedora", "centos", "raspberrypi"],
+    "android": ["android", "galaxy", "pixel", "oneplus", "xiaomi", "redmi"],
+    "ios": ["iphone", "ipad", "ipod"]
+}
+
+_DEVICE_HOSTNAME_PATTERNS = {
+    "Mobile": ["iphone", "android", "phone", "galaxy", "pixel", "mobile"],
+    "Tablet": ["ipad", "tablet", "tab"],
+    "Computer": ["desktop", "laptop", "pc", "workstation", "macbook", "imac"],
+    "Smart TV": ["tv", "roku", "firetv", "chromecast", "appletv"],
+    "Printer": ["printer", "canon", "epson", "hp-", "brother"],
+    "IoT Device": ["nest", "echo", "alexa", "google-home", "hue", "ring"],
+    "Gaming Console": ["xbox", "playstation", "ps4", "ps5", "nintendo", "switch"]
+}
+
+
+def _compile_categories(categories: Dict[str, list]) -> Tuple[Tuple[str, "re.Pattern"], ...]:
+    """One alternation per category, so each is a single regex search."""
+    return tuple(
+        (name, re.compile("|".join(map(re.escape, patterns))))
+        for name, patterns in categories.items()
+    )
+
+
+# Searched category by category rather than as one combined alternation:
+# a combined regex would return the leftmost match, not the highest-priority one
+_OS_HOSTNAME_RES = _compile_categories(_OS_HOSTNAME_PATTERNS)
+_DEVICE_HOSTNAME_RES = _compile_categories(_DEVICE_HOSTNAME_PATTERNS)
+
+# Result keys for the two pattern tables, indexed by the automaton's kind field
+_HOSTNAME_RESULT_KEYS = ("os_guess", "device_type")
+
+
+def _build_hostname_automaton():
+    """
+    One Aho-Corasick automaton over every hostname pattern.
+    
+    Each pattern maps to all (kind, priority, label) entries it appears in,
+    so a single pass over the hostname finds every category that matches.
+    """
+    entries = {}
+    for kind, categories in enumerate((_OS_HOSTNAME_PATTERNS, _DEVICE_HOSTNAME_PATTERNS)):
+        for priority, (label, patterns) in enumerate(categories.items()):
+            for pattern in patterns:
+                entries.setdefault(pattern, []).append((kind, priority, label))
+    
+    automaton = ahocorasick.Automaton()
+    for pattern, hits in entries.items():
+        automaton.add_word(pattern, tuple(hits))
+    automaton.make_automaton()
+    return automaton
+
+
+_HOSTNAME_AUTOMATON = _build_hostname_automaton() if AHOCORASICK_AVAILABLE else None
+
+
+class _HostnameLookup:
+    """A reverse DNS lookup running on the DNS pool, timed from when a worker picks it up."""
+    
+    __slots__ = ("ip_address", "submitted_at", "started_at", "started", "future")
+    
+    def __init__(self, lookup, ip_address: str):
+        self.ip_address = ip_address
+        self.submitted_at = time.monotonic()
+        self.started_at = None
+        self.started = threading.Event()
+        self.future = _dns_pool.submit(self._run, lookup)
+    
+    def _run(self, lookup) -> Optional[str]:
+        self.started_at = time.monotonic()
+        self.started.set()
+        return lookup(self.ip_address)
+    
+    def result(self) -> Optional[str]:
+        """The hostname, or None on a miss, a timeout or a cancelled lookup."""
+        queue_left = self.submitted_at + HOSTNAME_QUEUE_TIMEOUT - time.monotonic()
+        # cancel() fails once a worker has taken the lookup, which then runs as usual
+        if not self.started.wait(max(queue_left, 0)) and self.future.cancel():
+            logger.debug("Hostname resolution for %s never started", self.ip_address)
+            return None
+        self.started.wait()
+        
+        try:
+            return self.future.result(
+                timeout=max(self.started_at + HOSTNAME_LOOKUP_TIMEOUT - time.monotonic(), 0)
+            )
+        except FutureTimeoutError:
+            # The lookup finishes in the background and caches its answer
+            # for the next scan
+            self.future.cancel()
+            logger.debug("Hostname resolution timed out for %s", self.ip_address)
+            return None
+        except Exception as e:
+            logger.debug(f"Hostname resolution failed for {self.ip_address}: {e}")
+            return None
+
 
 class DeviceFingerprinter:
     """Device fingerprinting and identification service."""
     
     def __init__(self):
-        self.oui_lookup = oui_lookup
+        # Vendor and vendor-derived device type depend only on the OUI, so
+        # devices sharing a vendor prefix skip the substring heuristics
+        self._by_oui = lru_cache(maxsize=OUI_CACHE_SIZE)(self._lookup_oui)
+        # The whole fingerprint is a pure function of (MAC, hostname), and the
+        # same pairs come back every scan cycle
+        self._fingerprint_cached = lru_cache(maxsize=FINGERPRINT_CACHE_SIZE)(self._compute_fingerprint)
+        # Last MAC seen at each IP, so a cached name is dropped when the address moves
+        self._mac_by_ip: Dict[str, str] = {}
+    
+    @property
+    def oui_lookup(self) -> OUILookup:
+        """The shared OUI table, loaded the first time a lookup needs it."""
+        return get_oui_lookup()
+    
+    def _lookup_oui(self, oui: str) -> Tuple[Optional[str], Optional[str]]:
+        """Vendor and vendor-based device type for a normalized OUI (XX:XX:XX)."""
+        vendor = self.oui_lookup.lookup(oui)
+        return vendor, self.oui_lookup.get_device_type(vendor) if vendor else None
     
     def fingerprint(self, mac_address: str, hostname: str = None, ip_address: str = None) -> Dict[str, Any]:
         """
@@ -31,82 +189,125 @@ class DeviceFingerprinter:
         Returns:
             Dict with vendor, device_type, and confidence
         """
+        # Upper-cased once; the OUI key and the first-octet flags read from it
+        mac_upper = mac_address.upper() if mac_address else None
+        
+        vendor, device_type, os_guess, confidence, is_local = self._fingerprint_cached(mac_upper, hostname)
+        
         fingerprint = {
-            "mac_address": mac_address.upper() if mac_address else None,
-            "vendor": None,
-            "device_type": "Unknown",
-            "os_guess": None,
+            "mac_address": mac_upper,
+            "vendor": vendor,
+            "device_type": device_type,
+            "os_guess": os_guess,
             "hostname": hostname,
-            "confidence": 0.0
+            "confidence": confidence
         }
+        if is_local:
+            fingerprint["is_locally_administered"] = True
         
-        if mac_address:
-            fingerprint["vendor"] = self.oui_lookup.lookup(mac_address)
-            if fingerprint["vendor"]:
-                fingerprint["device_type"] = self.oui_lookup.get_device_type(fingerprint["vendor"])
-                fingerprint["confidence"] += 0.3
+        return fingerprint
+    
+    def _compute_fingerprint(
+        self,
+        mac_upper: Optional[str],
+        hostname: Optional[str]
+    ) -> Tuple[Optional[str], str, Optional[str], float, bool]:
+        """(vendor, device_type, os_guess, confidence, is_local) for an upper-cased MAC and hostname."""
+        vendor = None
+        device_type = "Unknown"
+        os_guess = None
+        confidence = 0.0
+        is_local = False
+        
+        if mac_upper:
+            oui_vendor, oui_device_type = self._by_oui(mac_upper[:8].replace('-', ':'))
+            if oui_vendor:
+                vendor = oui_vendor
+                device_type = oui_device_type
+                confidence += 0.3
         
         if hostname:
             hostname_info = self._analyze_hostname(hostname)
-            fingerprint["os_guess"] = hostname_info.get("os_guess")
+            os_guess = hostname_info.get("os_guess")
             
             if hostname_info.get("device_type"):
-                if fingerprint["device_type"] == "Unknown":
-                    fingerprint["device_type"] = hostname_info["device_type"]
-                fingerprint["confidence"] += 0.2
+                if device_type == "Unknown":
+                    device_type = hostname_info["device_type"]
+                confidence += 0.2
         
-        if mac_address:
-            mac_info = self._analyze_mac_pattern(mac_address)
+        if mac_upper:
+            mac_info = self._analyze_mac_pattern(mac_upper)
             if mac_info.get("is_local"):
-                fingerprint["is_locally_administered"] = True
-                fingerprint["confidence"] -= 0.1
+                is_local = True
+                confidence -= 0.1
         
-        fingerprint["confidence"] = min(max(fingerprint["confidence"], 0.0), 1.0)
+        return vendor, device_type, os_guess, min(max(confidence, 0.0), 1.0), is_local
+    
+    def fingerprint_batch(
+        self,
+        items: List[Tuple[str, Optional[str], Optional[str]]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fingerprint many devices in one call.
         
-        return fingerprint
+        Args:
+            items: (mac_address, hostname, ip_address) tuples
+            
+        Returns:
+            One fingerprint dict per item, in order. A (mac, hostname) pair
+            repeated within the batch is analyzed once.
+        """
+        analyzed: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        fingerprints = []
+        for mac_address, hostname, ip_address in items:
+            key = (mac_address, hostname)
+            fingerprint = analyzed.get(key)
+            if fingerprint is None:
+                fingerprint = analyzed[key] = self.fingerprint(mac_address, hostname, ip_address)
+                fingerprints.append(fingerprint)
+            else:
+                fingerprints.append(dict(fingerprint))
+        return fingerprints
     
     def _analyze_hostname(self, hostname: str) -> Dict[str, Any]:
         """Analyze hostname for device/OS information."""
         result = {}
         hostname_lower = hostname.lower()
         
-        os_patterns = {
-            "windows": ["desktop-", "laptop-", "win-", "-pc", "windows"],
-            "macos": ["macbook", "imac", "mac-", "macpro", "macmini"],
-            "linux": ["linux", "ubuntu", "debian", "fedora", "centos", "raspberrypi"],
-            "android": ["android", "galaxy", "pixel", "oneplus", "xiaomi", "redmi"],
-            "ios": ["iphone", "ipad", "ipod"]
-        }
+        if _HOSTNAME_AUTOMATON is not None:
+            # Single pass; keep the highest-priority (lowest index) label per kind
+            best = [None, None]
+            for _, hits in _HOSTNAME_AUTOMATON.iter(hostname_lower):
+                for kind, priority, label in hits:
+                    current = best[kind]
+                    if current is None or priority < current[0]:
+                        best[kind] = (priority, label)
+            for key, hit in zip(_HOSTNAME_RESULT_KEYS, best):
+                if hit is not None:
+                    result[key] = hit[1]
+            return result
         
-        for os_name, patterns in os_patterns.items():
-            if any(p in hostname_lower for p in patterns):
+        for os_name, pattern in _OS_HOSTNAME_RES:
+            if pattern.search(hostname_lower):
                 result["os_guess"] = os_name
                 break
         
-        device_patterns = {
-            "Mobile": ["iphone", "android", "phone", "galaxy", "pixel", "mobile"],
-            "Tablet": ["ipad", "tablet", "tab"],
-            "Computer": ["desktop", "laptop", "pc", "workstation", "macbook", "imac"],
-            "Smart TV": ["tv", "roku", "firetv", "chromecast", "appletv"],
-            "Printer": ["printer", "canon", "epson", "hp-", "brother"],
-            "IoT Device": ["nest", "echo", "alexa", "google-home", "hue", "ring"],
-            "Gaming Console": ["xbox", "playstation", "ps4", "ps5", "nintendo", "switch"]
-        }
-        
-        for device_type, patterns in device_patterns.items():
-            if any(p in hostname_lower for p in patterns):
+        for device_type, pattern in _DEVICE_HOSTNAME_RES:
+            if pattern.search(hostname_lower):
                 result["device_type"] = device_type
                 break
         
         return result
     
     def _analyze_mac_pattern(self, mac_address: str) -> Dict[str, Any]:
-        """Analyze MAC address patterns."""
+        """Analyze MAC address patterns (XX:XX:.., XX-XX-.. or bare hex)."""
         result = {}
         
-        first_byte = int(mac_address.replace(":", "").replace("-", "")[:2], 16)
-        result["is_local"] = bool(first_byte & 0x02)
-        result["is_multicast"] = bool(first_byte & 0x01)
+        # The local/multicast bits are the low nibble of the first octet,
+        # i.e. the second character in every accepted format
+        nibble = _HEX_NIBBLE[ord(mac_address[1])]
+        result["is_local"] = bool(nibble & 0x02)
+        result["is_multicast"] = bool(nibble & 0x01)
         
         return result
     
@@ -124,29 +325,58 @@ class DeviceFingerprinter:
                 return self.oui_lookup.get_device_type(v)
         return "Unknown"
     
+    def cache_clear(self):
+        """Drop cached fingerprints and OUI, hostname and NetBIOS lookups."""
+        self._fingerprint_cached.cache_clear()
+        self._by_oui.cache_clear()
+        self._lookup_hostname.cache_clear()
+        self.get_netbios_name.cache_clear()
+    
+    def note_host_mac(self, ip_address: str, mac_address: str):
+        """Record the MAC answering at an IP; a different MAC invalidates its cached names."""
+        previous = self._mac_by_ip.get(ip_address)
+        if previous == mac_address:
+            return
+        if len(self._mac_by_ip) >= HOSTNAME_CACHE_SIZE:
+            self._mac_by_ip.clear()
+        self._mac_by_ip[ip_address] = mac_address
+        if previous is not None:
+            DeviceFingerprinter._lookup_hostname.cache_evict(self, ip_address)
+            DeviceFingerprinter.get_netbios_name.cache_evict(self, ip_address)
+    
     def resolve_hostname(self, ip_address: str) -> Optional[str]:
-        """Resolve hostname from IP address."""
+        """Resolve hostname from IP address, giving up after HOSTNAME_LOOKUP_TIMEOUT."""
+        return _HostnameLookup(self._lookup_hostname, ip_address).result()
+    
+    def resolve_hostnames(self, ip_addresses: List[str]) -> List[Optional[str]]:
+        """
+        Resolve many IP addresses concurrently on the shared DNS pool.
+        
+        Args:
+            ip_addresses: Addresses to look up
+            
+        Returns:
+            Hostname or None for each address, in the same order
+        """
+        lookups = [_HostnameLookup(self._lookup_hostname, ip) for ip in ip_addresses]
+        return [lookup.result() for lookup in lookups]
+    
+    @ttl_cache(HOSTNAME_CACHE_TTL, maxsize=HOSTNAME_CACHE_SIZE, negative_ttl=HOSTNAME_NEGATIVE_TTL)
+    def _lookup_hostname(self, ip_address: str) -> Optional[str]:
+        """Blocking reverse DNS lookup; runs on a DNS pool worker."""
         try:
-            hostname = socket.gethostbyaddr(ip_address)[0]
-            return hostname
+            return socket.gethostbyaddr(ip_address)[0]
         except (socket.herror, socket.gaierror):
             return None
-        except Exception as e:
-            logger.debug(f"Hostname resolution failed for {ip_address}: {e}")
-            return None
     
+    @ttl_cache(HOSTNAME_CACHE_TTL, maxsize=HOSTNAME_CACHE_SIZE, negative_ttl=HOSTNAME_NEGATIVE_TTL)
     def get_netbios_name(self, ip_address: str, timeout: int = 2) -> Optional[str]:
         """Get NetBIOS name (Windows only)."""
         try:
             sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             sock.settimeout(timeout)
             
-            request = (
-                b'\x80\x94\x00\x00\x00\x01\x00\x00'
-                b'\x00\x00\x00\x00\x20CKAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA\x00\x00\x21\x00\x01'
-            )
-            
-            sock.sendto(request, (ip_address, 137))
+            sock.sendto(_NETBIOS_REQUEST, (ip_address, 137))
             
             try:
                 data, _ = sock.recvfrom(1024)
@@ -154,9 +384,9 @@ class DeviceFingerprinter:
                 if len(data) > 57:
                     num_names = data[56]
                     if num_names > 0:
-                        name_start = 57
-                        name = data[name_start:name_start+15].decode('ascii', errors='ignore').strip()
-                        return name
+                        # First name entry: 15 space-padded bytes after the count;
+                        # trimmed as bytes so only the final str is allocated
+                        return data[57:72].strip().decode('ascii', errors='ignore')
             except socket.timeout:
                 pass
             finally:
@@ -3,10 +3,8 @@ Notification Service - Alert delivery via multiple channels.
 """
 
 import smtplib
-import json
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import Optional, Dict, Any, List
+from email.header import Header
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 import asyncio
 import logging
@@ -17,11 +15,80 @@ try:
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    import aiosmtplib
+    AIOSMTPLIB_AVAILABLE = True
+except ImportError:
+    AIOSMTPLIB_AVAILABLE = False
+
 from app.config import settings
 from app.utils.logger import get_logger
+from app.utils.serialization import dumps
 
 logger = get_logger(__name__)
 
+# Messages queued for a client within this window go out as one frame
+WEBSOCKET_BATCH_WINDOW = 0.01
+
+# Frames a client may fall behind by before it is disconnected as stuck
+WEBSOCKET_QUEUE_SIZE = 1000
+
+# Alerts raised within this window go out as one email (and, with
+# WEBHOOK_BATCH, one webhook POST)
+ALERT_BATCH_WINDOW = 0.1
+
+# Webhook delivery: per-request timeout and the pooled client's connection limits
+WEBHOOK_TIMEOUT = 10
+WEBHOOK_MAX_CONNECTIONS = 64
+WEBHOOK_KEEPALIVE_EXPIRY = 30
+
+# Fixed plain-text alert format: headers are filled in per message and the
+# UTF-8 body appended, instead of building MIME objects for every alert
+_EMAIL_TEMPLATE = (
+    b"From: %s\r\n"
+    b"To: %s\r\n"
+    b"Subject: %s\r\n"
+    b"MIME-Version: 1.0\r\n"
+    b"Content-Type: text/plain; charset=utf-8\r\n"
+    b"Content-Transfer-Encoding: 8bit\r\n"
+    b"\r\n"
+)
+
+# Alert email text, filled with %-formatting per alert
+_SUBJECT_FMT = "[WiFi Tracker] %s: %s"
+_DIGEST_SUBJECT_FMT = "[WiFi Tracker] %d alerts"
+_BODY_FMT = "\nWiFi Tracker Alert\n\n%s\n\n---\nWiFi Tracker System\n            "
+_DIGEST_BODY_FMT = "\nWiFi Tracker Alerts\n\n%s\n\n---\nWiFi Tracker System\n            "
+_ALERT_TEXT_FMT = (
+    "Type: %s\n"
+    "Severity: %s\n"
+    "Time: %s\n"
+    "\n"
+    "Message:\n"
+    "%s\n"
+    "\n"
+    "Details:\n"
+    "%s"
+)
+
+# Subject labels for the severities alerts are raised with
+_SEVERITY_UPPER = {"low": "LOW", "medium": "MEDIUM", "high": "HIGH", "critical": "CRITICAL"}
+
+
+def _header_value(value: Any) -> bytes:
+    """Encode a header value on one line; non-ASCII text is RFC 2047 encoded."""
+    text = " ".join(str(value or "").splitlines())
+    try:
+        return text.encode("ascii")
+    except UnicodeEncodeError:
+        return Header(text, "utf-8").encode().encode("ascii")
+
 
 class NotificationService:
     """Service for sending notifications via various channels."""
@@ -29,121 +96,314 @@ class NotificationService:
     def __init__(self):
         self.email_enabled = settings.EMAIL_ENABLED
         self.webhook_url = settings.WEBHOOK_URL
-        self.websocket_clients: List[Any] = []
+        self.websocket_clients: Dict[Any, asyncio.Queue] = {}
+        self._drain_tasks: Dict[Any, asyncio.Task] = {}
+        self._http_client = None
+        # Email/webhook delivery queue; None until start() runs in the event loop
+        self._alert_queue: Optional[asyncio.Queue] = None
+        self._alert_task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        """Start the background task that batches alert email and webhooks."""
+        if self._alert_task is None:
+            self._alert_queue = asyncio.Queue()
+            self._alert_task = asyncio.create_task(self._alert_loop(self._alert_queue))
+    
+    def _get_http_client(self):
+        """Pooled async HTTP client, created on first use inside the event loop."""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                timeout=WEBHOOK_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=WEBHOOK_MAX_CONNECTIONS,
+                    keepalive_expiry=WEBHOOK_KEEPALIVE_EXPIRY
+                )
+            )
+        return self._http_client
+    
+    async def close(self):
+        """Flush queued alerts and close pooled connections; called on application shutdown."""
+        if self._alert_task is not None:
+            # Sentinel: the loop delivers what it has collected, then exits
+            self._alert_queue.put_nowait(None)
+            await self._alert_task
+            self._alert_task = None
+            self._alert_queue = None
+        
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
     
     async def send_alert(self, alert: Dict[str, Any]):
-        """Send alert through all configured channels."""
-        tasks = []
+        """
+        Send alert through all configured channels.
         
-        tasks.append(self.broadcast_websocket(alert))
+        WebSocket clients get it right away. Email and webhook delivery is
+        queued so a burst becomes one combined email, and one combined
+        webhook POST when WEBHOOK_BATCH is set.
+        """
+        # One timestamp for the event, shared by every channel
+        timestamp = datetime.utcnow()
         
-        if self.email_enabled and settings.ALERT_EMAIL:
-            tasks.append(self.send_email_alert(alert))
+        await self.broadcast_websocket(alert, timestamp)
         
-        if self.webhook_url:
-            tasks.append(self.send_webhook(alert))
+        if self._alert_queue is not None:
+            self._alert_queue.put_nowait((alert, timestamp))
+        else:
+            await self._deliver_alerts([(alert, timestamp)])
+    
+    async def _alert_loop(self, queue: asyncio.Queue):
+        """Collect alerts for ALERT_BATCH_WINDOW after the first, then deliver them together."""
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = loop.time() + ALERT_BATCH_WINDOW
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            await self._deliver_alerts(batch)
+            if stopping:
+                return
+    
+    async def _deliver_alerts(self, batch: List[Tuple[Dict[str, Any], datetime]]):
+        """Send (alert, timestamp) pairs by email and webhook, combined where enabled."""
+        tasks = []
+        
+        if len(batch) == 1:
+            alert, timestamp = batch[0]
+            if self.email_enabled and settings.ALERT_EMAIL:
+                tasks.append(self.send_email_alert(alert, timestamp))
+            if self.webhook_url:
+                tasks.append(self.send_webhook(alert, timestamp))
+        else:
+            if self.email_enabled and settings.ALERT_EMAIL:
+                tasks.append(self.send_email_digest(batch))
+            if self.webhook_url and settings.WEBHOOK_BATCH:
+                tasks.append(self.send_webhook_batch(batch))
+            elif self.webhook_url:
+                # Receivers written for the single-alert payload keep getting it
+                tasks.extend(self.send_webhook(alert, timestamp) for alert, timestamp in batch)
         
         await asyncio.gather(*tasks, return_exceptions=True)
     
-    async def broadcast_websocket(self, data: Dict[str, Any]):
+    async def broadcast_websocket(self, data: Dict[str, Any], timestamp: Optional[datetime] = None):
         """Broadcast message to all connected WebSocket clients."""
-        message = json.dumps({
+        self._enqueue({
             "type": "alert",
             "data": data,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": timestamp or datetime.utcnow()
         })
+    
+    def _enqueue(self, message: Dict[str, Any]):
+        """Serialize a message once and queue it for every client."""
+        payload = dumps(message)
+        stalled = []
+        for websocket, queue in self.websocket_clients.items():
+            try:
+                queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                stalled.append(websocket)
+        
+        for websocket in stalled:
+            # Dropping frames would leave the client silently stale; closing
+            # it makes the frontend reconnect
+            logger.warning("WebSocket client is not keeping up, disconnecting")
+            self.unregister_websocket(websocket)
+            asyncio.create_task(self._close_websocket(websocket))
+    
+    @staticmethod
+    async def _close_websocket(websocket):
+        """Close a client connection, ignoring one that is already gone."""
+        try:
+            await websocket.close(code=1013)  # Try again later
+        except Exception as e:
+            logger.debug(f"WebSocket close failed: {e}")
+    
+    async def _drain(self, websocket, queue: asyncio.Queue):
+        """
+        Send queued messages to one client as text frames.
         
-        disconnected = []
-        for client in self.websocket_clients:
+        A lone message goes out as its JSON object; messages arriving within
+        WEBSOCKET_BATCH_WINDOW of each other share one frame as a JSON array.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + WEBSOCKET_BATCH_WINDOW
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            
+            frame = batch[0] if len(batch) == 1 else b"[" + b",".join(batch) + b"]"
             try:
-                await client.send_text(message)
+                await websocket.send_text(frame.decode("utf-8"))
             except Exception as e:
                 logger.debug(f"WebSocket send failed: {e}")
-                disconnected.append(client)
-        
-        for client in disconnected:
-            self.websocket_clients.remove(client)
+                self.unregister_websocket(websocket)
+                return
     
-    def register_websocket(self, websocket):
-        """Register a WebSocket client."""
+    def register_websocket(self, websocket) -> asyncio.Queue:
+        """Register a WebSocket client and start its send loop."""
         if websocket not in self.websocket_clients:
-            self.websocket_clients.append(websocket)
+            queue: asyncio.Queue = asyncio.Queue(maxsize=WEBSOCKET_QUEUE_SIZE)
+            self.websocket_clients[websocket] = queue
+            self._drain_tasks[websocket] = asyncio.create_task(self._drain(websocket, queue))
             logger.info(f"WebSocket client registered. Total: {len(self.websocket_clients)}")
+        return self.websocket_clients[websocket]
     
     def unregister_websocket(self, websocket):
-        """Unregister a WebSocket client."""
+        """Unregister a WebSocket client and stop its send loop."""
         if websocket in self.websocket_clients:
-            self.websocket_clients.remove(websocket)
+            del self.websocket_clients[websocket]
+            task = self._drain_tasks.pop(websocket, None)
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
             logger.info(f"WebSocket client unregistered. Total: {len(self.websocket_clients)}")
     
-    async def send_email_alert(self, alert: Dict[str, Any]):
+    async def send_email_alert(self, alert: Dict[str, Any], timestamp: Optional[datetime] = None):
         """Send alert via email."""
         if not self.email_enabled:
             return
         
         try:
-            subject = f"[WiFi Tracker] {alert.get('severity', 'INFO').upper()}: {alert.get('alert_type', 'Alert')}"
+            severity = alert.get('severity', 'INFO')
+            subject = _SUBJECT_FMT % (
+                _SEVERITY_UPPER.get(severity) or severity.upper(),
+                alert.get('alert_type', 'Alert')
+            )
+            body = _BODY_FMT % self._alert_text(alert, timestamp or datetime.utcnow())
             
-            body = f"""
-WiFi Tracker Alert
-
-Type: {alert.get('alert_type', 'Unknown')}
-Severity: {alert.get('severity', 'Unknown')}
-Time: {datetime.utcnow().isoformat()}
-
-Message:
-{alert.get('message', 'No message')}
-
-Details:
-{json.dumps(alert.get('details', {}), indent=2)}
-
----
-WiFi Tracker System
-            """
+            await self._deliver_email(subject, body)
             
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, self._send_email, subject, body)
+        except Exception as e:
+            logger.error(f"Failed to send email alert: {e}")
+    
+    async def send_email_digest(self, batch: List[Tuple[Dict[str, Any], datetime]]):
+        """Send several (alert, timestamp) pairs as one email."""
+        if not self.email_enabled:
+            return
+        
+        try:
+            subject = _DIGEST_SUBJECT_FMT % len(batch)
+            body = _DIGEST_BODY_FMT % "\n\n".join(
+                "[%d]\n%s" % (number, self._alert_text(alert, timestamp))
+                for number, (alert, timestamp) in enumerate(batch, 1)
+            )
             
-            logger.info(f"Email alert sent: {subject}")
+            await self._deliver_email(subject, body)
             
         except Exception as e:
             logger.error(f"Failed to send email alert: {e}")
     
-    def _send_email(self, subject: str, body: str):
-        """Synchronous email sending."""
-        msg = MIMEMultipart()
-        msg['From'] = settings.SMTP_USER
-        msg['To'] = settings.ALERT_EMAIL
-        msg['Subject'] = subject
-        msg.attach(MIMEText(body, 'plain'))
+    def _alert_text(self, alert: Dict[str, Any], timestamp: datetime) -> str:
+        """Plain-text description of one alert for email bodies."""
+        return _ALERT_TEXT_FMT % (
+            alert.get('alert_type', 'Unknown'),
+            alert.get('severity', 'Unknown'),
+            timestamp.isoformat(),
+            alert.get('message', 'No message'),
+            dumps(alert.get('details', {}), indent=True).decode("utf-8")
+        )
+    
+    async def _deliver_email(self, subject: str, body: str):
+        """Send an alert email to the configured recipient."""
+        message = self._build_email(subject, body)
+        if AIOSMTPLIB_AVAILABLE:
+            # Native async SMTP: no executor thread held for the handshake
+            await aiosmtplib.send(
+                message,
+                sender=settings.SMTP_USER,
+                recipients=[settings.ALERT_EMAIL],
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USER,
+                password=settings.SMTP_PASSWORD,
+                start_tls=True
+            )
+        else:
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._send_email, message)
         
+        logger.info(f"Email alert sent: {subject}")
+    
+    def _build_email(self, subject: str, body: str) -> bytes:
+        """Build the alert email as raw message bytes with CRLF line endings."""
+        headers = _EMAIL_TEMPLATE % (
+            _header_value(settings.SMTP_USER),
+            _header_value(settings.ALERT_EMAIL),
+            _header_value(subject)
+        )
+        return headers + body.replace("\r\n", "\n").replace("\n", "\r\n").encode("utf-8")
+    
+    def _send_email(self, msg: bytes):
+        """Synchronous email sending (fallback when aiosmtplib is unavailable)."""
         with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
             server.starttls()
             server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+            server.sendmail(settings.SMTP_USER, [settings.ALERT_EMAIL], msg)
     
-    async def send_webhook(self, alert: Dict[str, Any]):
+    async def send_webhook(self, alert: Dict[str, Any], timestamp: Optional[datetime] = None):
         """Send alert to webhook URL."""
-        if not self.webhook_url or not REQUESTS_AVAILABLE:
+        await self._post_webhook({
+            "event": "wifi_tracker_alert",
+            "timestamp": (timestamp or datetime.utcnow()).isoformat(),
+            "alert": alert
+        })
+    
+    async def send_webhook_batch(self, batch: List[Tuple[Dict[str, Any], datetime]]):
+        """Send several (alert, timestamp) pairs to the webhook URL in one POST."""
+        await self._post_webhook({
+            "event": "wifi_tracker_alerts",
+            "timestamp": batch[0][1].isoformat(),
+            "alerts": [
+                {"timestamp": timestamp.isoformat(), "alert": alert}
+                for alert, timestamp in batch
+            ]
+        })
+    
+    async def _post_webhook(self, payload: Dict[str, Any]):
+        """POST a JSON payload to the webhook URL."""
+        if not self.webhook_url or not (HTTPX_AVAILABLE or REQUESTS_AVAILABLE):
             return
         
         try:
-            payload = {
-                "event": "wifi_tracker_alert",
-                "timestamp": datetime.utcnow().isoformat(),
-                "alert": alert
-            }
-            
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(
-                None, 
-                lambda: requests.post(
+            if HTTPX_AVAILABLE:
+                # Kept-alive connections: one TCP/TLS handshake across many alerts
+                await self._get_http_client().post(
                     self.webhook_url,
-                    json=payload,
-                    timeout=10,
+                    content=dumps(payload),
                     headers={"Content-Type": "application/json"}
                 )
-            )
+            else:
+                loop = asyncio.get_event_loop()
+                await loop.run_in_executor(
+                    None, 
+                    lambda: requests.post(
+                        self.webhook_url,
+                        json=payload,
+                        timeout=WEBHOOK_TIMEOUT,
+                        headers={"Content-Type": "application/json"}
+                    )
+                )
             
             logger.info(f"Webhook alert sent to {self.webhook_url}")
             
@@ -152,32 +412,19 @@ WiFi Tracker System
     
     async def send_device_update(self, device: Dict[str, Any], event: str):
         """Broadcast device update to WebSocket clients."""
-        message = json.dumps({
+        self._enqueue({
             "type": "device_update",
             "event": event,
             "data": device,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         })
-        
-        for client in self.websocket_clients:
-            try:
-                await client.send_text(message)
-            except Exception:
-                pass
     
     async def send_scan_update(self, scan_data: Dict[str, Any]):
         """Broadcast scan progress/results to WebSocket clients."""
-        message = json.dumps({
+        self._enqueue({
             "type": "scan_update",
             "data": scan_data,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         })
-        
-        for client in self.websocket_clients:
-            try:
-                await client.send_text(message)
-            except Exception:
-                pass
-
 
 notification_service = NotificationService()
@@ -3,7 +3,9 @@ Network Scanner Module - ARP and ICMP scanning for device discovery.
 Requires administrator/root privileges.
 """
 
+import re
 import socket
+import struct
 import subprocess
 import platform
 import ipaddress
@@ -11,7 +13,8 @@ import asyncio
 import time
 import sys
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator
+from itertools import islice
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 import logging
@@ -76,11 +79,45 @@ if SCAPY_AVAILABLE:
     except Exception:
         pass
 
+try:
+    from icmplib import multiping, async_multiping, ICMPLibError
+    ICMPLIB_AVAILABLE = True
+except ImportError:
+    ICMPLIB_AVAILABLE = False
+
 from app.config import settings
 from app.utils.logger import get_logger
+from app.utils.compat import DATACLASS_SLOTS
+from app.services.fingerprinter import fingerprinter
 
 logger = get_logger(__name__)
 
+# Upper bound on echo requests icmplib keeps in flight at once
+ICMP_CONCURRENT_TASKS = 512
+
+# Hosts handed to icmplib per sweep; larger ranges go through chunk by chunk
+ICMP_SWEEP_CHUNK = 4096
+
+# Ping children in flight at once when sweeping without ICMP sockets
+PING_SWEEP_CONCURRENCY = 256
+
+# Address formats accepted from ARP output
+_MAC_RE = re.compile(r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$')
+_IPV4_OCTET = r'(?:25[0-5]|2[0-4][0-9]|1[0-9][0-9]|[1-9]?[0-9])'
+_IPV4_RE = re.compile(rf'{_IPV4_OCTET}(?:\.{_IPV4_OCTET}){{3}}\Z')
+_IPV4_PACK = struct.Struct('!I').pack
+
+
+def _chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Successive lists of up to size items, drawn lazily from items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 # Log pcap status once at module load
 if SCAPY_AVAILABLE and not PCAP_AVAILABLE:
     logger.info("Npcap/WinPcap not detected - using fallback scanning methods (ARP table + ping)")
@@ -88,7 +125,7 @@ elif SCAPY_AVAILABLE and PCAP_AVAILABLE:
     logger.info("Scapy with pcap support available - full scanning enabled")
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class ScanResult:
     """Data class for scan results."""
     ip_address: str
@@ -107,6 +144,13 @@ class NetworkScanner:
         self.max_workers = settings.MAX_CONCURRENT_SCANS
         self.is_windows = platform.system().lower() == 'windows'
         
+        # Ping argv for one echo request, short of the target address;
+        # fixed once the timeout is known
+        if self.is_windows:
+            self._ping_argv = ["ping", "-n", "1", "-w", str(int(self.timeout * 1000))]
+        else:
+            self._ping_argv = ["ping", "-c", "1", "-W", str(self.timeout)]
+        
         if SCAPY_AVAILABLE:
             conf.verb = 0
     
@@ -153,17 +197,15 @@ class NetworkScanner:
             
             for sent, received in answered:
                 try:
-                    hostname = self._resolve_hostname(received.psrc)
                     response_time = (time.time() - start_time) * 1000
                     
                     results.append(ScanResult(
                         ip_address=received.psrc,
                         mac_address=received.hwsrc.upper(),
-                        hostname=hostname,
                         response_time_ms=round(response_time, 2)
                     ))
                 except Exception as e:
-                    logger.debug(f"Error processing response: {e}")
+                    logger.debug("Error processing response: %s", e)
             
             logger.info(f"ARP scan complete: {len(results)} devices found")
             
@@ -171,53 +213,76 @@ class NetworkScanner:
             logger.warning("ARP scan requires administrator privileges, using fallback")
             return self._get_arp_table_with_ping(target)
         except Exception as e:
-            logger.debug(f"ARP scan not available: {e}")
+            logger.debug("ARP scan not available: %s", e)
             return self._get_arp_table_with_ping(target)
         
-        return results
+        return self._resolve_hostnames(results)
     
-    def _get_arp_table(self) -> List[ScanResult]:
-        """Get devices from system ARP table (fallback method)."""
-        results = []
+    def _read_arp_table(self) -> Dict[str, str]:
+        """Run the system ARP command once and parse every entry into ip -> MAC."""
+        arp_map: Dict[str, str] = {}
         
+        if self.is_windows:
+            # Use full path to arp.exe on Windows
+            args, mac_column = [r"C:\Windows\System32\ARP.EXE", "-a"], 1
+        else:
+            args, mac_column = ["arp", "-n"], 2
+        
+        # Entries are parsed line by line as arp writes them, without holding
+        # the whole output as bytes, then as str, then as a list of lines
+        with subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL if self.is_windows else None,
+            encoding='utf-8',
+            errors='ignore'
+        ) as process:
+            lines = process.stdout
+            if not self.is_windows:
+                next(lines, None)  # column headers
+            
+            for line in lines:
+                parts = line.split()
+                if len(parts) >= 3:
+                    ip = parts[0]
+                    mac = parts[mac_column].replace('-', ':').upper()
+                    if self._is_valid_ip(ip) and self._is_valid_mac(mac):
+                        # First entry wins when an IP is listed on several interfaces
+                        arp_map.setdefault(ip, mac)
+        
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, args)
+        
+        return arp_map
+    
+    def _arp_snapshot(self) -> Dict[str, str]:
+        """
+        The system ARP table as ip -> MAC, from one read.
+        
+        Every caller reads right after the ping sweep that fills the table,
+        so the snapshot is not kept between calls.
+        """
         try:
-            if self.is_windows:
-                # Use full path to arp.exe on Windows
-                output = subprocess.check_output(
-                    [r"C:\Windows\System32\ARP.EXE", "-a"], 
-                    stderr=subprocess.DEVNULL
-                ).decode('utf-8', errors='ignore')
-                for line in output.split('\n'):
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        ip = parts[0]
-                        mac = parts[1].replace('-', ':').upper()
-                        if self._is_valid_ip(ip) and self._is_valid_mac(mac):
-                            hostname = self._resolve_hostname(ip)
-                            results.append(ScanResult(
-                                ip_address=ip,
-                                mac_address=mac,
-                                hostname=hostname
-                            ))
-            else:
-                output = subprocess.check_output(["arp", "-n"]).decode('utf-8', errors='ignore')
-                for line in output.split('\n')[1:]:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        ip = parts[0]
-                        mac = parts[2].upper()
-                        if self._is_valid_ip(ip) and self._is_valid_mac(mac):
-                            hostname = self._resolve_hostname(ip)
-                            results.append(ScanResult(
-                                ip_address=ip,
-                                mac_address=mac,
-                                hostname=hostname
-                            ))
+            return self._read_arp_table()
         except Exception as e:
             logger.error(f"Failed to read ARP table: {e}")
-        
+            return {}
+    
+    def _fill_macs(self, results: List[ScanResult]) -> List[ScanResult]:
+        """Set MACs for results still carrying the placeholder, from one fresh ARP read."""
+        arp_map = self._arp_snapshot()
+        for result in results:
+            if result.mac_address == "00:00:00:00:00:00":
+                result.mac_address = arp_map.get(result.ip_address, result.mac_address)
         return results
     
+    def _get_arp_table(self) -> List[ScanResult]:
+        """Get devices from system ARP table (fallback method); hostnames are left unresolved."""
+        return [
+            ScanResult(ip_address=ip, mac_address=mac)
+            for ip, mac in self._arp_snapshot().items()
+        ]
+    
     def _get_arp_table_with_ping(self, network_range: str = None) -> List[ScanResult]:
         """
         Enhanced fallback method: ping sweep to populate ARP table, then read it.
@@ -225,62 +290,24 @@ class NetworkScanner:
         """
         target = network_range or self.network_range
         results = []
-        seen_ips = set()
         
         try:
             logger.info(f"Starting fallback scan on {target} (ping + ARP table)")
             
-            # First, do a quick ping sweep to populate the ARP table
             network = ipaddress.ip_network(target, strict=False)
-            hosts = list(network.hosts())
-            
-            # Limit to first 254 hosts for /24 networks
-            hosts = hosts[:254]
-            
-            # Quick parallel ping to populate ARP table
-            with ThreadPoolExecutor(max_workers=min(50, len(hosts))) as executor:
-                futures = []
-                for host in hosts:
-                    if self.is_windows:
-                        cmd = f"ping -n 1 -w 500 {host}"
-                    else:
-                        cmd = f"ping -c 1 -W 1 {host}"
-                    futures.append(executor.submit(
-                        subprocess.run, 
-                        cmd, 
-                        shell=True, 
-                        capture_output=True, 
-                        timeout=2
-                    ))
-                
-                # Wait for all pings to complete (they populate ARP cache)
-                for future in futures:
-                    try:
-                        future.result(timeout=3)
-                    except Exception:
-                        pass
-            
-            # Now read the populated ARP table
-            results = self._get_arp_table()
             
-            # Also check which hosts are actually responding
-            responding_hosts = []
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                ping_futures = {executor.submit(self._ping_host, str(host)): host for host in hosts}
-                for future in ping_futures:
-                    try:
-                        result = future.result(timeout=5)
-                        if result and result.ip_address not in seen_ips:
-                            seen_ips.add(result.ip_address)
-                            responding_hosts.append(result)
-                    except Exception:
-                        pass
+            # One sweep both populates the ARP cache and tells us who
+            # answered, so the hosts are not pinged a second time.
+            # Limited to the first 254 hosts, as for a /24.
+            alive = self._multiping(self._host_ips(network, 254))
+            if alive is not None:
+                responders = self._alive_results(alive)
+            else:
+                responders = self._ping_sweep(self._host_ips(network, 254))
             
-            # Merge results - prefer ARP results (have MAC) but add ping-only results
-            arp_ips = {r.ip_address for r in results}
-            for host in responding_hosts:
-                if host.ip_address not in arp_ips:
-                    results.append(host)
+            # Prefer ARP results (have MAC) but add ping-only results; the
+            # table is read after the sweep, so it already has every MAC
+            results = self._merge_results(self._get_arp_table(), responders)
             
             logger.info(f"Fallback scan complete: {len(results)} devices found")
             
@@ -289,7 +316,7 @@ class NetworkScanner:
             # Last resort: just return ARP table
             results = self._get_arp_table()
         
-        return results
+        return self._resolve_hostnames(results)
     
     def icmp_scan(self, network_range: str = None) -> List[ScanResult]:
         """Perform ICMP ping scan to discover active hosts."""
@@ -298,96 +325,243 @@ class NetworkScanner:
         
         try:
             network = ipaddress.ip_network(target, strict=False)
-            hosts = list(network.hosts())
             
-            logger.info(f"Starting ICMP scan on {len(hosts)} hosts")
+            logger.info(f"Starting ICMP scan on {network} ({network.num_addresses} addresses)")
             
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                futures = {executor.submit(self._ping_host, str(host)): host for host in hosts}
-                
-                for future in futures:
-                    result = future.result()
-                    if result:
-                        results.append(result)
+            alive = self._multiping(self._host_ips(network))
+            if alive is not None:
+                results = self._fill_macs(self._alive_results(alive))
+                logger.info(f"ICMP scan complete: {len(results)} hosts responding")
+                return self._resolve_hostnames(results)
+            
+            results = self._ping_sweep(self._host_ips(network))
+            
+            # One ARP read for every responder instead of one per host
+            self._fill_macs(results)
             
             logger.info(f"ICMP scan complete: {len(results)} hosts responding")
             
         except Exception as e:
             logger.error(f"ICMP scan failed: {e}")
         
-        return results
+        return self._resolve_hostnames(results)
+    
+    def _multiping_args(self, hosts: List[str]) -> Dict:
+        """Keyword arguments for one batched icmplib sweep over hosts."""
+        return dict(
+            count=1,
+            timeout=self.timeout,
+            concurrent_tasks=max(1, min(len(hosts), ICMP_CONCURRENT_TASKS))
+        )
+    
+    def _multiping(self, hosts: Iterable[str]) -> Optional[List[Tuple[str, float]]]:
+        """
+        Ping hosts from one ICMP socket; (ip, rtt_ms) for those that answered.
+        
+        Hosts are drawn ICMP_SWEEP_CHUNK at a time, so large ranges are never
+        held in memory whole. Tries raw sockets, then unprivileged ICMP
+        datagram sockets. Returns None when icmplib is missing or neither is
+        permitted, so callers fall back to spawning ping.
+        """
+        if not ICMPLIB_AVAILABLE:
+            return None
+        
+        alive = []
+        modes = (True, False)
+        for chunk in _chunked(hosts, ICMP_SWEEP_CHUNK):
+            for privileged in modes:
+                try:
+                    replies = multiping(chunk, privileged=privileged, **self._multiping_args(chunk))
+                except ICMPLibError as e:
+                    logger.debug("ICMP sweep unavailable (privileged=%s): %s", privileged, e)
+                    continue
+                # Later chunks go straight to the socket type that worked
+                modes = (privileged,)
+                alive.extend((h.address, round(h.avg_rtt, 2)) for h in replies if h.is_alive)
+                break
+            else:
+                return None
+        return alive
+    
+    async def _async_multiping(self, hosts: Iterable[str]) -> Optional[List[Tuple[str, float]]]:
+        """Event-loop version of _multiping."""
+        if not ICMPLIB_AVAILABLE:
+            return None
+        
+        alive = []
+        modes = (True, False)
+        for chunk in _chunked(hosts, ICMP_SWEEP_CHUNK):
+            for privileged in modes:
+                try:
+                    replies = await async_multiping(chunk, privileged=privileged, **self._multiping_args(chunk))
+                except ICMPLibError as e:
+                    logger.debug("ICMP sweep unavailable (privileged=%s): %s", privileged, e)
+                    continue
+                modes = (privileged,)
+                alive.extend((h.address, round(h.avg_rtt, 2)) for h in replies if h.is_alive)
+                break
+            else:
+                return None
+        return alive
+    
+    @staticmethod
+    def _host_ips(network, limit: Optional[int] = None) -> Iterator[str]:
+        """The network's host addresses as strings, generated lazily (at most limit of them)."""
+        if network.version == 4 and network.prefixlen < 31:
+            # Formatted in C from the integer range, not by IPv4Address.__str__;
+            # /31 and /32 keep hosts()'s special cases
+            first = int(network.network_address) + 1
+            last = int(network.broadcast_address)
+            if limit is not None:
+                last = min(last, first + limit)
+            return map(socket.inet_ntoa, map(_IPV4_PACK, range(first, last)))
+        return map(str, islice(network.hosts(), limit))
+    
+    @staticmethod
+    def _alive_results(alive: List[Tuple[str, float]]) -> List[ScanResult]:
+        """ScanResults for ICMP sweep responders; MACs and hostnames are filled in later."""
+        return [
+            ScanResult(ip_address=ip, mac_address="00:00:00:00:00:00", response_time_ms=rtt)
+            for ip, rtt in alive
+        ]
     
     def _ping_host(self, ip: str) -> Optional[ScanResult]:
-        """Ping a single host and return result if alive."""
+        """Ping a single host and return result if alive; MAC and hostname are filled in later."""
         try:
-            if self.is_windows:
-                cmd = f"ping -n 1 -w {self.timeout * 1000} {ip}"
-            else:
-                cmd = f"ping -c 1 -W {self.timeout} {ip}"
-            
+            # No shell in between, and only the exit status is read
             start_time = time.time()
             result = subprocess.run(
-                cmd, 
-                shell=True, 
-                capture_output=True, 
+                self._ping_argv + [ip], 
+                stdout=subprocess.DEVNULL, 
+                stderr=subprocess.DEVNULL, 
                 timeout=self.timeout + 1
             )
             response_time = (time.time() - start_time) * 1000
             
             if result.returncode == 0:
-                mac = self._get_mac_for_ip(ip)
-                hostname = self._resolve_hostname(ip)
-                
                 return ScanResult(
                     ip_address=ip,
-                    mac_address=mac or "00:00:00:00:00:00",
-                    hostname=hostname,
+                    mac_address="00:00:00:00:00:00",
                     response_time_ms=round(response_time, 2)
                 )
         except subprocess.TimeoutExpired:
             pass
         except Exception as e:
-            logger.debug(f"Ping failed for {ip}: {e}")
+            logger.debug("Ping failed for %s: %s", ip, e)
         
         return None
     
-    def _get_mac_for_ip(self, ip: str) -> Optional[str]:
-        """Get MAC address for an IP from ARP table."""
+    async def _async_ping_host(self, ip: str) -> Optional[ScanResult]:
+        """Event-loop version of _ping_host: the ping child is awaited, not waited on by a thread."""
         try:
-            if self.is_windows:
-                output = subprocess.check_output(
-                    [r"C:\Windows\System32\ARP.EXE", "-a", ip],
-                    stderr=subprocess.DEVNULL
-                ).decode('utf-8', errors='ignore')
-                for line in output.split('\n'):
-                    if ip in line:
-                        parts = line.split()
-                        if len(parts) >= 2:
-                            mac = parts[1].replace('-', ':').upper()
-                            if self._is_valid_mac(mac):
-                                return mac
-            else:
-                output = subprocess.check_output(["arp", "-n", ip]).decode('utf-8', errors='ignore')
-                for line in output.split('\n'):
-                    if ip in line:
-                        parts = line.split()
-                        if len(parts) >= 3:
-                            mac = parts[2].upper()
-                            if self._is_valid_mac(mac):
-                                return mac
-        except Exception:
-            pass
+            start_time = time.time()
+            process = await asyncio.create_subprocess_exec(
+                *self._ping_argv, ip,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+            try:
+                returncode = await asyncio.wait_for(process.wait(), timeout=self.timeout + 1)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return None
+            response_time = (time.time() - start_time) * 1000
+            
+            if returncode == 0:
+                return ScanResult(
+                    ip_address=ip,
+                    mac_address="00:00:00:00:00:00",
+                    response_time_ms=round(response_time, 2)
+                )
+        except NotImplementedError:
+            # Event loop without subprocess support (Windows selector loop)
+            raise
+        except Exception as e:
+            logger.debug("Ping failed for %s: %s", ip, e)
+        
         return None
     
-    def _resolve_hostname(self, ip: str) -> Optional[str]:
-        """Resolve hostname for IP address."""
+    async def _async_ping_sweep(self, hosts: Iterable[str]) -> List[ScanResult]:
+        """
+        Ping every host from the event loop; results for those that answered, in host order.
+        
+        PING_SWEEP_CONCURRENCY workers pull hosts from one shared iterator, so
+        no more ping children or coroutines than that exist at once, however
+        large the range. Raises NotImplementedError on loops without
+        subprocess support.
+        """
+        pending = enumerate(hosts)
+        answered: List[Tuple[int, ScanResult]] = []
+        
+        async def worker():
+            for index, ip in pending:
+                result = await self._async_ping_host(ip)
+                if result:
+                    answered.append((index, result))
+        
+        await asyncio.gather(*(worker() for _ in range(PING_SWEEP_CONCURRENCY)))
+        answered.sort(key=lambda item: item[0])
+        return [result for _, result in answered]
+    
+    def _ping_sweep(self, hosts: Iterable[str]) -> List[ScanResult]:
+        """Blocking _async_ping_sweep on a private event loop, for the sync scans."""
+        # The fallback must see every host, not what the async attempt left unread
+        hosts = list(hosts)
         try:
-            hostname = socket.gethostbyaddr(ip)[0]
-            return hostname
-        except socket.herror:
-            return None
-        except Exception:
-            return None
+            return asyncio.run(self._async_ping_sweep(hosts))
+        except NotImplementedError:
+            # No subprocess support: one blocking ping per worker thread instead
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                return [result for result in executor.map(self._ping_host, hosts) if result]
+    
+    def _lookup_hostnames(self, results: List[ScanResult]) -> List[Optional[str]]:
+        """
+        Resolve hostnames for results' IPs (cached across scans by the fingerprinter).
+        
+        The MAC answering at each IP is noted first: if it changed since the
+        last scan, the cached name belonged to another device and is dropped.
+        """
+        for result in results:
+            mac = self._known_mac(result)
+            if mac:
+                fingerprinter.note_host_mac(result.ip_address, mac)
+        return fingerprinter.resolve_hostnames([result.ip_address for result in results])
+    
+    @staticmethod
+    def _known_mac(result: ScanResult) -> Optional[str]:
+        """The result's MAC, or None for the placeholder used when none was found."""
+        return result.mac_address if result.mac_address != "00:00:00:00:00:00" else None
+    
+    def _resolve_hostnames(self, results: List[ScanResult]) -> List[ScanResult]:
+        """
+        Fill in hostnames for a scan's results, resolving concurrently.
+        
+        Probing finishes first, so reverse-DNS waits overlap with each other
+        instead of queueing behind every ping and ARP reply.
+        """
+        pending = [r for r in results if r.hostname is None]
+        if not pending:
+            return results
+        
+        for result, name in zip(pending, self._lookup_hostnames(pending)):
+            result.hostname = name
+        
+        return results
+    
+    async def _async_resolve_hostnames(self, results: List[ScanResult]) -> List[ScanResult]:
+        """Event-loop version of _resolve_hostnames; the loop is not blocked on the waits."""
+        loop = asyncio.get_event_loop()
+        pending = [r for r in results if r.hostname is None]
+        if not pending:
+            return results
+        
+        # The lookups run on the fingerprinter's DNS pool; one executor thread waits for them
+        names = await loop.run_in_executor(None, self._lookup_hostnames, pending)
+        for result, name in zip(pending, names):
+            result.hostname = name
+        
+        return results
     
     def full_scan(self, network_range: str = None) -> List[ScanResult]:
         """Perform comprehensive scan combining ARP and ICMP."""
@@ -396,6 +570,11 @@ class NetworkScanner:
         arp_results = self.arp_scan(target)
         icmp_results = self.icmp_scan(target)
         
+        return self._merge_results(arp_results, icmp_results)
+    
+    @staticmethod
+    def _merge_results(arp_results: List[ScanResult], icmp_results: List[ScanResult]) -> List[ScanResult]:
+        """ARP results plus ICMP-only hosts."""
         seen_ips = {r.ip_address for r in arp_results}
         for result in icmp_results:
             if result.ip_address not in seen_ips:
@@ -406,6 +585,11 @@ class NetworkScanner:
     @staticmethod
     def _is_valid_ip(ip: str) -> bool:
         """Validate IP address format."""
+        # Dotted-quad fast path; only candidates for IPv6 go through ipaddress
+        if _IPV4_RE.match(ip):
+            return True
+        if ':' not in ip:
+            return False
         try:
             ipaddress.ip_address(ip)
             return True
@@ -415,16 +599,51 @@ class NetworkScanner:
     @staticmethod
     def _is_valid_mac(mac: str) -> bool:
         """Validate MAC address format."""
-        import re
-        pattern = r'^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$'
-        return bool(re.match(pattern, mac)) and mac != "00:00:00:00:00:00"
+        return _MAC_RE.match(mac) is not None and mac != "00:00:00:00:00:00"
     
     async def async_arp_scan(self, network_range: str = None) -> List[ScanResult]:
         """Async wrapper for ARP scan."""
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(None, self.arp_scan, network_range)
     
-    async def async_full_scan(self, network_range: str = None) -> List[ScanResult]:
-        """Async wrapper for full scan."""
+    async def async_icmp_scan(self, network_range: str = None) -> List[ScanResult]:
+        """
+        Async ICMP scan.
+        
+        The icmplib sweep, or failing that the ping children, are awaited on
+        the event loop itself; only the blocking ARP and DNS lookups for
+        responding hosts use the executor, with every reverse-DNS lookup in
+        flight at once.
+        """
         loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.full_scan, network_range)
+        target = network_range or self.network_range
+        
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError as e:
+            logger.error(f"ICMP scan failed: {e}")
+            return []
+        
+        logger.info(f"Starting ICMP scan on {network} ({network.num_addresses} addresses)")
+        alive = await self._async_multiping(self._host_ips(network))
+        if alive is not None:
+            results = self._alive_results(alive)
+        else:
+            # No ICMP sockets: one ping child per host
+            try:
+                results = await self._async_ping_sweep(self._host_ips(network))
+            except NotImplementedError:
+                return await loop.run_in_executor(None, self.icmp_scan, network_range)
+        
+        results = await loop.run_in_executor(None, self._fill_macs, results)
+        logger.info(f"ICMP scan complete: {len(results)} hosts responding")
+        return await self._async_resolve_hostnames(results)
+    
+    async def async_full_scan(self, network_range: str = None) -> List[ScanResult]:
+        """Async full scan: ARP scan, then an ICMP sweep awaited on the event loop."""
+        target = network_range or self.network_range
+        
+        arp_results = await self.async_arp_scan(target)
+        icmp_results = await self.async_icmp_scan(target)
+        
+        return self._merge_results(arp_results, icmp_results)
@@ -5,17 +5,99 @@ Signal Strength Analyzer - RSSI collection and quality metrics.
 import subprocess
 import platform
 import re
-from typing import Optional, Dict, List, Any
-from dataclasses import dataclass
+from typing import Optional, Dict, Any, Deque
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 import logging
 
+import numpy as np
+
 from app.utils.logger import get_logger
+from app.utils.compat import DATACLASS_SLOTS
 
 logger = get_logger(__name__)
 
+# Signal samples older than this drop out of a device's statistics
+SIGNAL_HISTORY_WINDOW = timedelta(hours=24)
 
-@dataclass
+# Samples averaged at each end of the window for the trend
+TREND_SAMPLES = 5
+
+# netsh wlan show interfaces fields. Each pattern applies to lines containing
+# its label and runs over the whole output at once; [^\n]*? keeps the
+# leftmost value on the line
+_WIN_SIGNAL_RE = re.compile(r"^(?=[^\n]*Signal)[^\n]*?(\d+)%", re.M)
+_WIN_CHANNEL_RE = re.compile(r"^(?=[^\n]*Channel)[^\n]*?:\s*(\d+)", re.M)
+_WIN_RADIO_RE = re.compile(r"^[^\n]*Radio type[^\n]*", re.M)
+_WIN_RATE_RE = re.compile(r"^(?=[^\n]*(?:Receive|Transmit) rate)[^\n]*?(\d+\.?\d*)\s*(Mbps|Gbps)", re.M)
+
+# iwconfig / iw fields (first occurrence in the output)
+_LINUX_SIGNAL_RE = re.compile(r'Signal level[=:]?\s*(-?\d+)\s*dBm')
+_LINUX_QUALITY_RE = re.compile(r'Link Quality[=:]?\s*(\d+)/(\d+)')
+_LINUX_NOISE_RE = re.compile(r'Noise level[=:]?\s*(-?\d+)\s*dBm')
+_LINUX_FREQ_RE = re.compile(r'Frequency[=:]?\s*(\d+\.?\d*)\s*GHz')
+_LINUX_RATE_RE = re.compile(r'Bit Rate[=:]?\s*(\d+\.?\d*)\s*(Mb/s|Gb/s)')
+
+# Initial per-device sample capacity; the ring buffers double when full
+SIGNAL_RING_CAPACITY = 64
+
+
+def _rssi_quality_curve(rssi: int) -> int:
+    """Quality percentage for an RSSI (dBm), piecewise linear per 10 dBm band."""
+    if rssi >= -50:
+        return 100
+    elif rssi >= -60:
+        return 80 + (rssi + 60) * 2
+    elif rssi >= -70:
+        return 60 + (rssi + 70) * 2
+    elif rssi >= -80:
+        return 40 + (rssi + 80) * 2
+    elif rssi >= -90:
+        return 20 + (rssi + 90) * 2
+    else:
+        return max(0, 10 + (rssi + 100))
+
+
+def _quality_rssi_curve(quality: int) -> int:
+    """RSSI (dBm) estimate for a quality percentage; inverse of _rssi_quality_curve."""
+    if quality >= 100:
+        return -50
+    elif quality >= 80:
+        return -60 + (quality - 80) // 2
+    elif quality >= 60:
+        return -70 + (quality - 60) // 2
+    elif quality >= 40:
+        return -80 + (quality - 40) // 2
+    elif quality >= 20:
+        return -90 + (quality - 20) // 2
+    else:
+        return -100 + quality
+
+
+# The curves tabulated over the ranges where they vary: RSSI -110..-50 dBm
+# (flat at 0 below, 100 above) and quality 0..100%
+_QUALITY_BY_RSSI = tuple(_rssi_quality_curve(rssi) for rssi in range(-110, -49))
+_RSSI_BY_QUALITY = tuple(_quality_rssi_curve(quality) for quality in range(101))
+
+
+def _rssi_to_quality(rssi: int) -> int:
+    """Convert RSSI (dBm) to quality percentage."""
+    if rssi >= -50:
+        return 100
+    if rssi <= -110:
+        return 0
+    return _QUALITY_BY_RSSI[rssi + 110]
+
+
+def _quality_to_rssi(quality: int) -> int:
+    """Estimate RSSI from quality percentage."""
+    if 0 <= quality <= 100:
+        return _RSSI_BY_QUALITY[quality]
+    return _quality_rssi_curve(quality)
+
+
+@dataclass(**DATACLASS_SLOTS)
 class SignalMetrics:
     """Signal strength metrics."""
     rssi: Optional[int]
@@ -26,12 +108,113 @@ class SignalMetrics:
     channel: Optional[int]
 
 
+@dataclass
+class SignalState:
+    """
+    A device's signal samples within the history window plus running aggregates.
+    
+    Samples live in parallel datetime64/int16 ring buffers (10 bytes each
+    rather than a tuple, datetime and int object per sample), addressed by
+    a running sequence number. Sums are exact integers and min/max come
+    from monotonic deques of sequence numbers, so a sample entering or
+    leaving the window is O(1) (amortized) and statistics never rescan the
+    history.
+    """
+    times: np.ndarray = field(default_factory=lambda: np.empty(SIGNAL_RING_CAPACITY, dtype="datetime64[us]"))
+    values: np.ndarray = field(default_factory=lambda: np.empty(SIGNAL_RING_CAPACITY, dtype=np.int16))
+    # Sequence numbers of the oldest sample and one past the newest
+    first: int = 0
+    end: int = 0
+    # Timestamps of readings without an RSSI: kept only so the window knows about them
+    missing: Deque[datetime] = field(default_factory=deque)
+    total: int = 0
+    total_sq: int = 0
+    # Sequence numbers of candidates for the window max (values non-increasing)
+    # and min (values non-decreasing)
+    max_candidates: Deque[int] = field(default_factory=deque)
+    min_candidates: Deque[int] = field(default_factory=deque)
+    
+    @property
+    def count(self) -> int:
+        """Samples with an RSSI in the window."""
+        return self.end - self.first
+    
+    def value(self, seq: int) -> int:
+        """RSSI of the sample with sequence number seq."""
+        return int(self.values[seq % len(self.values)])
+    
+    def _grow(self):
+        """Double the ring buffers, keeping each sample at its sequence position."""
+        old_positions = np.arange(self.first, self.end) % len(self.values)
+        capacity = len(self.values) * 2
+        new_positions = np.arange(self.first, self.end) % capacity
+        
+        times = np.empty(capacity, dtype=self.times.dtype)
+        values = np.empty(capacity, dtype=self.values.dtype)
+        times[new_positions] = self.times[old_positions]
+        values[new_positions] = self.values[old_positions]
+        self.times, self.values = times, values
+    
+    def add(self, timestamp: datetime, rssi: Optional[int]):
+        """Append a reading taken at timestamp."""
+        if rssi is None:
+            self.missing.append(timestamp)
+            return
+        
+        if self.count == len(self.values):
+            self._grow()
+        
+        seq = self.end
+        position = seq % len(self.values)
+        self.times[position] = timestamp
+        self.values[position] = rssi
+        self.end += 1
+        
+        self.total += rssi
+        self.total_sq += rssi * rssi
+        while self.max_candidates and self.value(self.max_candidates[-1]) < rssi:
+            self.max_candidates.pop()
+        self.max_candidates.append(seq)
+        while self.min_candidates and self.value(self.min_candidates[-1]) > rssi:
+            self.min_candidates.pop()
+        self.min_candidates.append(seq)
+    
+    def evict(self, cutoff: datetime):
+        """Drop readings taken at or before cutoff."""
+        cutoff_us = np.datetime64(cutoff, "us")
+        capacity = len(self.values)
+        while self.first < self.end and self.times[self.first % capacity] <= cutoff_us:
+            rssi = self.value(self.first)
+            self.total -= rssi
+            self.total_sq -= rssi * rssi
+            self.first += 1
+        
+        while self.max_candidates and self.max_candidates[0] < self.first:
+            self.max_candidates.popleft()
+        while self.min_candidates and self.min_candidates[0] < self.first:
+            self.min_candidates.popleft()
+        
+        while self.missing and self.missing[0] <= cutoff:
+            self.missing.popleft()
+    
+    def head_mean(self, n: int) -> float:
+        """Mean RSSI of the n oldest samples in the window."""
+        return sum(self.value(seq) for seq in range(self.first, self.first + n)) / n
+    
+    def tail_mean(self, n: int) -> float:
+        """Mean RSSI of the n newest samples in the window."""
+        return sum(self.value(seq) for seq in range(self.end - n, self.end)) / n
+    
+    def __len__(self) -> int:
+        return self.count + len(self.missing)
+
+
 class SignalAnalyzer:
     """Analyze WiFi signal strength and quality."""
     
     def __init__(self):
         self.is_windows = platform.system().lower() == 'windows'
-        self.signal_history: Dict[str, List[Dict]] = {}
+        self.signal_history: Dict[str, SignalState] = {}
     
     def get_wifi_signal_info(self) -> Optional[SignalMetrics]:
         """Get current WiFi signal information from local adapter."""
@@ -58,30 +241,25 @@ class SignalAnalyzer:
             frequency = None
             link_speed = None
             
-            for line in output.split('\n'):
-                line = line.strip()
-                
-                if 'Signal' in line and '%' in line:
-                    match = re.search(r'(\d+)%', line)
-                    if match:
-                        quality = int(match.group(1))
-                        rssi = self._quality_to_rssi(quality)
-                
-                if 'Channel' in line:
-                    match = re.search(r':\s*(\d+)', line)
-                    if match:
-                        channel = int(match.group(1))
-                
-                if 'Radio type' in line:
-                    if '5 GHz' in line or '5GHz' in line:
-                        frequency = "5 GHz"
-                    elif '2.4 GHz' in line or '2.4GHz' in line:
-                        frequency = "2.4 GHz"
-                
-                if 'Receive rate' in line or 'Transmit rate' in line:
-                    match = re.search(r'(\d+\.?\d*)\s*(Mbps|Gbps)', line)
-                    if match and not link_speed:
-                        link_speed = f"{match.group(1)} {match.group(2)}"
+            # Later lines override earlier ones, except for the link speed
+            for match in _WIN_SIGNAL_RE.finditer(output):
+                quality = int(match.group(1))
+            if quality is not None:
+                rssi = _quality_to_rssi(quality)
+            
+            for match in _WIN_CHANNEL_RE.finditer(output):
+                channel = int(match.group(1))
+            
+            for match in _WIN_RADIO_RE.finditer(output):
+                line = match.group(0)
+                if '5 GHz' in line or '5GHz' in line:
+                    frequency = "5 GHz"
+                elif '2.4 GHz' in line or '2.4GHz' in line:
+                    frequency = "2.4 GHz"
+            
+            match = _WIN_RATE_RE.search(output)
+            if match:
+                link_speed = f"{match.group(1)} {match.group(2)}"
             
             return SignalMetrics(
                 rssi=rssi,
@@ -111,27 +289,27 @@ class SignalAnalyzer:
             frequency = None
             link_speed = None
             
-            signal_match = re.search(r'Signal level[=:]?\s*(-?\d+)\s*dBm', output)
+            signal_match = _LINUX_SIGNAL_RE.search(output)
             if signal_match:
                 rssi = int(signal_match.group(1))
-                quality = self._rssi_to_quality(rssi)
+                quality = _rssi_to_quality(rssi)
             
-            quality_match = re.search(r'Link Quality[=:]?\s*(\d+)/(\d+)', output)
+            quality_match = _LINUX_QUALITY_RE.search(output)
             if quality_match:
                 curr = int(quality_match.group(1))
                 max_val = int(quality_match.group(2))
                 quality = int((curr / max_val) * 100)
             
-            noise_match = re.search(r'Noise level[=:]?\s*(-?\d+)\s*dBm', output)
+            noise_match = _LINUX_NOISE_RE.search(output)
             if noise_match:
                 noise = int(noise_match.group(1))
             
-            freq_match = re.search(r'Frequency[=:]?\s*(\d+\.?\d*)\s*GHz', output)
+            freq_match = _LINUX_FREQ_RE.search(output)
             if freq_match:
                 freq = float(freq_match.group(1))
                 frequency = f"{freq} GHz"
             
-            rate_match = re.search(r'Bit Rate[=:]?\s*(\d+\.?\d*)\s*(Mb/s|Gb/s)', output)
+            rate_match = _LINUX_RATE_RE.search(output)
             if rate_match:
                 link_speed = f"{rate_match.group(1)} {rate_match.group(2)}"
             
@@ -150,25 +328,19 @@ class SignalAnalyzer:
     
     def record_signal(self, mac_address: str, rssi: int):
         """Record signal strength for historical analysis."""
-        if mac_address not in self.signal_history:
-            self.signal_history[mac_address] = []
-        
-        self.signal_history[mac_address].append({
-            "timestamp": datetime.utcnow(),
-            "rssi": rssi
-        })
+        state = self.signal_history.get(mac_address)
+        if state is None:
+            state = self.signal_history[mac_address] = SignalState()
         
-        cutoff = datetime.utcnow() - timedelta(hours=24)
-        self.signal_history[mac_address] = [
-            r for r in self.signal_history[mac_address]
-            if r["timestamp"] > cutoff
-        ]
+        now = datetime.utcnow()
+        state.add(now, rssi)
+        state.evict(now - SIGNAL_HISTORY_WINDOW)
     
     def get_signal_stats(self, mac_address: str) -> Dict[str, Any]:
         """Get signal statistics for a device."""
-        history = self.signal_history.get(mac_address, [])
+        state = self.signal_history.get(mac_address)
         
-        if not history:
+        if not state:
             return {
                 "samples": 0,
                 "avg_rssi": None,
@@ -178,69 +350,38 @@ class SignalAnalyzer:
                 "trend": None
             }
         
-        rssi_values = [r["rssi"] for r in history if r["rssi"] is not None]
+        count = state.count
         
-        if not rssi_values:
+        if not count:
             return {"samples": 0}
         
-        avg_rssi = sum(rssi_values) / len(rssi_values)
-        min_rssi = min(rssi_values)
-        max_rssi = max(rssi_values)
-        variance = sum((x - avg_rssi) ** 2 for x in rssi_values) / len(rssi_values)
+        avg_rssi = state.total / count
+        min_rssi = state.value(state.min_candidates[0])
+        max_rssi = state.value(state.max_candidates[0])
+        # Population variance from the exact integer sums
+        variance = (count * state.total_sq - state.total * state.total) / (count * count)
         
         trend = None
-        if len(rssi_values) >= 5:
-            recent = rssi_values[-5:]
-            older = rssi_values[:5]
-            if sum(recent) / 5 > sum(older) / 5 + 3:
+        if count >= TREND_SAMPLES:
+            recent = state.tail_mean(TREND_SAMPLES)
+            older = state.head_mean(TREND_SAMPLES)
+            if recent > older + 3:
                 trend = "improving"
-            elif sum(recent) / 5 < sum(older) / 5 - 3:
+            elif recent < older - 3:
                 trend = "degrading"
             else:
                 trend = "stable"
         
         return {
-            "samples": len(rssi_values),
+            "samples": count,
             "avg_rssi": round(avg_rssi, 1),
             "min_rssi": min_rssi,
             "max_rssi": max_rssi,
             "variance": round(variance, 2),
             "trend": trend,
-            "quality": self._rssi_to_quality(int(avg_rssi))
+            "quality": _rssi_to_quality(int(avg_rssi))
         }
     
-    @staticmethod
-    def _rssi_to_quality(rssi: int) -> int:
-        """Convert RSSI (dBm) to quality percentage."""
-        if rssi >= -50:
-            return 100
-        elif rssi >= -60:
-            return 80 + (rssi + 60) * 2
-        elif rssi >= -70:
-            return 60 + (rssi + 70) * 2
-        elif rssi >= -80:
-            return 40 + (rssi + 80) * 2
-        elif rssi >= -90:
-            return 20 + (rssi + 90) * 2
-        else:
-            return max(0, 10 + (rssi + 100))
-    
-    @staticmethod
-    def _quality_to_rssi(quality: int) -> int:
-        """Estimate RSSI from quality percentage."""
-        if quality >= 100:
-            return -50
-        elif quality >= 80:
-            return -60 + (quality - 80) // 2
-        elif quality >= 60:
-            return -70 + (quality - 60) // 2
-        elif quality >= 40:
-            return -80 + (quality - 40) // 2
-        elif quality >= 20:
-            return -90 + (quality - 20) // 2
-        else:
-            return -100 + quality
-    
     @staticmethod
     def get_signal_quality_label(rssi: int) -> str:
         """Get human-readable signal quality label."""
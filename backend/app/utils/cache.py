@@ -0,0 +1,75 @@
+"""
+Short-lived in-process caching for read-mostly endpoints.
+"""
+
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+def ttl_cache(
+    ttl: float,
+    maxsize: int = 64,
+    ignore: Iterable[str] = ("db", "current_user"),
+    negative_ttl: Optional[float] = None
+) -> Callable:
+    """
+    Cache a sync function's result for ttl seconds.
+    
+    The key is built from the call arguments minus the names in ``ignore``
+    (per-request dependencies such as the DB session). Concurrent callers
+    with the same key share one computation instead of each querying the
+    database. The wrapper keeps the original signature for FastAPI and
+    exposes ``cache_clear()`` for explicit invalidation, and
+    ``cache_evict(*args, **kwargs)`` to drop the entry for one call.
+    
+    With ``negative_ttl``, a None result is kept for that long instead, so
+    failed lookups are retried sooner than successful ones are refreshed.
+    """
+    ignored = frozenset(ignore)
+    none_ttl = ttl if negative_ttl is None else negative_ttl
+    
+    def decorator(func: Callable) -> Callable:
+        entries: Dict[Hashable, Tuple[float, Any]] = {}
+        locks: Dict[Hashable, threading.Lock] = {}
+        guard = threading.Lock()
+        
+        def fresh(key: Hashable):
+            hit = entries.get(key)
+            if hit is not None and time.monotonic() - hit[0] < (ttl if hit[1] is not None else none_ttl):
+                return hit
+            return None
+        
+        def make_key(args: tuple, kwargs: Dict[str, Any]) -> Hashable:
+            return (args, tuple(sorted(
+                (name, value) for name, value in kwargs.items() if name not in ignored
+            )))
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            
+            hit = fresh(key)
+            if hit is not None:
+                return hit[1]
+            
+            with guard:
+                if len(locks) >= maxsize:
+                    entries.clear()
+                    locks.clear()
+                lock = locks.setdefault(key, threading.Lock())
+            
+            with lock:
+                hit = fresh(key)
+                if hit is not None:
+                    return hit[1]
+                result = func(*args, **kwargs)
+                entries[key] = (time.monotonic(), result)
+                return result
+        
+        wrapper.cache_clear = entries.clear
+        wrapper.cache_evict = lambda *args, **kwargs: entries.pop(make_key(args, kwargs), None)
+        return wrapper
+    
+    return decorator
@@ -0,0 +1,9 @@
+"""
+Python version compatibility helpers.
+"""
+
+import sys
+
+# dataclass(**DATACLASS_SLOTS) gives slotted instances without a per-instance
+# __dict__ on Python 3.10+ and a regular dataclass on older versions
+DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
@@ -0,0 +1,95 @@
+"""
+Lightweight CORS middleware with precomputed origin set and preflight headers.
+"""
+
+from typing import Iterable
+
+
+class CachedCORSMiddleware:
+    """
+    Pure ASGI CORS middleware.
+
+    Allowed origins are resolved once into a frozenset of raw header bytes and
+    the static part of the preflight response is built at construction, so a
+    request costs one header scan and a set lookup.
+    """
+
+    def __init__(
+        self,
+        app,
+        allow_origins: Iterable[str],
+        allow_methods: Iterable[str] = ("GET", "POST", "PUT", "DELETE", "OPTIONS"),
+        max_age: int = 600
+    ):
+        self.app = app
+        origins = {o.strip() for o in allow_origins if o.strip()}
+        self.allow_all = "*" in origins
+        self.origins = frozenset(o.encode("latin-1") for o in origins)
+        self._preflight_headers = [
+            (b"access-control-allow-methods", ", ".join(allow_methods).encode("latin-1")),
+            (b"access-control-max-age", str(max_age).encode("latin-1")),
+            (b"vary", b"Origin"),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        request_method = None
+        request_headers = None
+        for key, value in scope["headers"]:
+            if key == b"origin":
+                origin = value
+            elif key == b"access-control-request-method":
+                request_method = value
+            elif key == b"access-control-request-headers":
+                request_headers = value
+
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed = self.allow_all or origin in self.origins
+
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight_response(send, origin, allowed, request_headers)
+            return
+
+        if not allowed:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"access-control-allow-origin", origin))
+                headers.append((b"vary", b"Origin"))
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    async def _preflight_response(self, send, origin: bytes, allowed: bool, request_headers):
+        """Answer a CORS preflight without touching the application."""
+        if not allowed:
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        headers = [(b"access-control-allow-origin", origin), *self._preflight_headers]
+        if request_headers:
+            # Mirror requested headers; Authorization is not covered by a "*" wildcard
+            headers.append((b"access-control-allow-headers", request_headers))
+
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
@@ -4,11 +4,12 @@ Structured logging utilities.
 
 import logging
 import sys
+import time
 from pathlib import Path
 from datetime import datetime
-import json
 
 from app.config import settings
+from app.utils.serialization import dumps
 
 
 class JSONFormatter(logging.Formatter):
@@ -16,7 +17,8 @@ class JSONFormatter(logging.Formatter):
     
     def format(self, record):
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            # dumps() formats the datetime itself, as isoformat() would
+            "timestamp": datetime.utcnow(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -25,7 +27,7 @@ class JSONFormatter(logging.Formatter):
         }
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
-        return json.dumps(log_data)
+        return dumps(log_data).decode("utf-8")
 
 
 class ColoredFormatter(logging.Formatter):
@@ -40,10 +42,25 @@ class ColoredFormatter(logging.Formatter):
         'RESET': '\033[0m'
     }
     
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (epoch second, formatted) of the last record; bursts of records
+        # within one second reuse the string
+        self._last_timestamp = (None, "")
+    
+    def _timestamp(self, created: float) -> str:
+        """Local 'YYYY-MM-DD HH:MM:SS' for a record's creation time."""
+        second = int(created)
+        cached_second, timestamp = self._last_timestamp
+        if cached_second != second:
+            timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+            self._last_timestamp = (second, timestamp)
+        return timestamp
+    
     def format(self, record):
         color = self.COLORS.get(record.levelname, self.COLORS['RESET'])
         reset = self.COLORS['RESET']
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = self._timestamp(record.created)
         msg = f"{color}[{timestamp}] [{record.levelname}]{reset} {record.name}: {record.getMessage()}"
         if record.exc_info:
             msg += f"\n{self.formatException(record.exc_info)}"
@@ -3,26 +3,49 @@ OUI (Organizationally Unique Identifier) lookup for MAC vendor identification.
 """
 
 import re
+import sys
+from functools import cache
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import logging
 
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# "XX-XX-XX   (hex)\t\tVendor" lines of the IEEE oui.txt, matched unstripped
+_OUI_LINE_RE = re.compile(r'\s*([0-9A-F]{2}-[0-9A-F]{2}-[0-9A-F]{2})\s+\(hex\)\s+(\S.*)$')
+
+# Vendor substrings per device type, in priority order (first matching type wins)
+_VENDOR_DEVICE_TYPES = {
+    "Mobile/Tablet": ['apple', 'iphone', 'ipad'],
+    "Mobile": ['samsung', 'lg', 'huawei', 'xiaomi', 'oneplus', 'oppo', 'vivo'],
+    "Computer": ['intel', 'dell', 'hp', 'lenovo', 'asus', 'acer', 'microsoft'],
+    "Network Device": ['cisco', 'netgear', 'tp-link', 'linksys', 'd-link', 'belkin', 'zyxel'],
+    "Virtual Machine": ['vmware', 'virtualbox', 'qemu', 'hyper-v', 'parallels'],
+    "IoT Device": ['raspberry', 'arduino', 'espressif'],
+    "Smart Home": ['amazon', 'google', 'nest', 'ring', 'philips hue'],
+    "Storage": ['western digital', 'seagate', 'synology', 'qnap'],
+    "Streaming Device": ['roku', 'chromecast', 'fire tv', 'nvidia shield'],
+    "Printer": ['canon', 'epson', 'hp', 'brother'],
+    "Gaming Console": ['sony', 'nintendo', 'microsoft xbox', 'playstation'],
+}
+
+# One alternation per type, searched in priority order: a single combined
+# regex would return the leftmost match, not the highest-priority type
+_VENDOR_DEVICE_TYPE_RES: Tuple[Tuple[str, "re.Pattern"], ...] = tuple(
+    (device_type, re.compile("|".join(map(re.escape, keywords))))
+    for device_type, keywords in _VENDOR_DEVICE_TYPES.items()
+)
+
 
 class OUILookup:
     """MAC address vendor lookup using OUI database."""
     
-    _instance = None
-    _oui_data: Dict[str, str] = {}
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._load_oui_database()
-        return cls._instance
+    def __init__(self):
+        self._oui_data: Dict[str, str] = {}
+        self._vendor_types: Dict[str, str] = {}
+        self._load_oui_database()
     
     def _load_oui_database(self):
         """Load OUI database from file or create default."""
@@ -38,18 +61,26 @@ class OUILookup:
         else:
             logger.warning("OUI database not found, using defaults")
             self._load_default_oui()
+        
+        # The vendor set is closed once loaded, so every vendor lookup() can
+        # return is classified here instead of on each query
+        self._vendor_types = {
+            vendor: self._classify_vendor(vendor) for vendor in set(self._oui_data.values())
+        }
     
     def _parse_oui_file(self, path: Path):
         """Parse IEEE OUI file format."""
-        pattern = re.compile(r'^([0-9A-F]{2}-[0-9A-F]{2}-[0-9A-F]{2})\s+\(hex\)\s+(.+)$')
-        
         with open(path, 'r', encoding='utf-8', errors='ignore') as f:
             for line in f:
-                match = pattern.match(line.strip())
+                # Most lines are address/company continuation lines
+                if '(hex)' not in line:
+                    continue
+                match = _OUI_LINE_RE.match(line)
                 if match:
                     oui = match.group(1).replace('-', ':')
                     vendor = match.group(2).strip()
-                    self._oui_data[oui.upper()] = vendor
+                    # Interned: a few vendors own most prefixes, so they share one string
+                    self._oui_data[oui.upper()] = sys.intern(vendor)
     
     def _load_default_oui(self):
         """Load common vendor prefixes as fallback."""
@@ -218,8 +249,8 @@ class OUILookup:
         if not mac_address:
             return None
         
-        mac = mac_address.upper().replace('-', ':')
-        oui = mac[:8]
+        # Only the OUI prefix is normalized, not the whole address
+        oui = mac_address[:8].upper().replace('-', ':')
         
         return self._oui_data.get(oui)
     
@@ -228,32 +259,32 @@ class OUILookup:
         if not vendor:
             return "Unknown"
         
+        device_type = self._vendor_types.get(vendor)
+        if device_type is None:
+            # A vendor name that did not come from the OUI table
+            device_type = self._classify_vendor(vendor)
+        return device_type
+    
+    @staticmethod
+    def _classify_vendor(vendor: str) -> str:
+        """Device type for a vendor name from its keywords."""
         vendor_lower = vendor.lower()
         
-        if any(x in vendor_lower for x in ['apple', 'iphone', 'ipad']):
-            return "Mobile/Tablet"
-        elif any(x in vendor_lower for x in ['samsung', 'lg', 'huawei', 'xiaomi', 'oneplus', 'oppo', 'vivo']):
-            return "Mobile"
-        elif any(x in vendor_lower for x in ['intel', 'dell', 'hp', 'lenovo', 'asus', 'acer', 'microsoft']):
-            return "Computer"
-        elif any(x in vendor_lower for x in ['cisco', 'netgear', 'tp-link', 'linksys', 'd-link', 'belkin', 'zyxel']):
-            return "Network Device"
-        elif any(x in vendor_lower for x in ['vmware', 'virtualbox', 'qemu', 'hyper-v', 'parallels']):
-            return "Virtual Machine"
-        elif any(x in vendor_lower for x in ['raspberry', 'arduino', 'espressif']):
-            return "IoT Device"
-        elif any(x in vendor_lower for x in ['amazon', 'google', 'nest', 'ring', 'philips hue']):
-            return "Smart Home"
-        elif any(x in vendor_lower for x in ['western digital', 'seagate', 'synology', 'qnap']):
-            return "Storage"
-        elif any(x in vendor_lower for x in ['roku', 'chromecast', 'fire tv', 'nvidia shield']):
-            return "Streaming Device"
-        elif any(x in vendor_lower for x in ['canon', 'epson', 'hp', 'brother']):
-            return "Printer"
-        elif any(x in vendor_lower for x in ['sony', 'nintendo', 'microsoft xbox', 'playstation']):
-            return "Gaming Console"
+        for device_type, pattern in _VENDOR_DEVICE_TYPE_RES:
+            if pattern.search(vendor_lower):
+                return device_type
         
         return "Unknown"
 
 
-oui_lookup = OUILookup()
+@cache
+def get_oui_lookup() -> OUILookup:
+    """The shared OUILookup, loaded on first use rather than at import."""
+    return OUILookup()
+
+
+def __getattr__(name: str):
+    # Lazy module attribute: `oui_lookup` is the shared instance
+    if name == "oui_lookup":
+        return get_oui_lookup()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,37 @@
+"""
+Keyset (seek) pagination helpers.
+"""
+
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encode a row's (timestamp, id) sort key as a keyset cursor."""
+    return f"{timestamp.isoformat()}_{row_id}"
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a keyset cursor produced by encode_cursor."""
+    try:
+        timestamp, row_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def seek_before(timestamp_column, id_column, cursor: str):
+    """
+    Filter clause for rows after a cursor in (timestamp desc, id desc) order.
+
+    Written as an expanded row comparison; MySQL only seeks an index on this form.
+    """
+    cursor_ts, cursor_id = decode_cursor(cursor)
+    return (timestamp_column < cursor_ts) | (
+        and_(timestamp_column == cursor_ts, id_column < cursor_id)
+    )
@@ -0,0 +1,23 @@
+"""
+Response helpers for pre-built response models.
+"""
+
+from fastapi import Response, status
+from pydantic import BaseModel
+
+
+def model_response(model: BaseModel, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Serialize an already-built response model straight to JSON bytes.
+    
+    Returning the model instead makes FastAPI dump it, re-validate the dump
+    against the route's response_model and encode it a second time. Handlers
+    build these from trusted rows with model_construct, so a single
+    pydantic-core serialization pass is enough; response_model on the route
+    still documents the shape.
+    """
+    return Response(
+        content=model.model_dump_json(),
+        media_type="application/json",
+        status_code=status_code
+    )
@@ -2,32 +2,103 @@
 Security utilities for JWT authentication and password hashing.
 """
 
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Union
 from jose import JWTError, jwt
 import bcrypt
-import secrets
+import hashlib
+import hmac
+import json
+import time
+from os import urandom
 
 from app.config import settings
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+def _b64url(data: bytes) -> str:
+    """Unpadded base64url, as JWS segments are written."""
+    return urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+# HS256 tokens are signed and checked here with a precomputed header and key;
+# python-jose rebuilds both on every call. Anything else goes through jose.
+_HS256 = settings.ALGORITHM == "HS256"
+_SIGNING_KEY = settings.SECRET_KEY.encode("utf-8")
+# The header segment python-jose writes for HS256 (sorted keys, no spaces)
+_HS256_HEADER = _b64url(b'{"alg":"HS256","typ":"JWT"}')
+# Claims the fast path does not validate; tokens carrying them go through jose
+_JOSE_ONLY_CLAIMS = frozenset(("nbf", "aud", "iss", "at_hash"))
+
+
+def _sign_hs256(signing_input: str) -> str:
+    """Encoded HS256 signature segment for 'header.payload'."""
+    return _b64url(hmac.new(_SIGNING_KEY, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+
+def _encode_token(claims: Dict[str, Any]) -> str:
+    """Sign claims, whose time claims are already epoch seconds, as a JWT."""
+    if not _HS256:
+        return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    
+    payload = _b64url(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    signing_input = f"{_HS256_HEADER}.{payload}"
+    return f"{signing_input}.{_sign_hs256(signing_input)}"
+
+
+def _decode_issued_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Claims of a valid token in exactly the form _encode_token issues.
+    
+    Returns None for anything else, including invalid or expired tokens,
+    so the caller can hand those to python-jose for the full checks.
+    """
+    if not isinstance(token, str):
+        return None
+    parts = token.split(".")
+    if len(parts) != 3 or parts[0] != _HS256_HEADER:
+        return None
+    
+    header, payload, signature = parts
+    try:
+        if not hmac.compare_digest(_sign_hs256(f"{header}.{payload}"), signature):
+            return None
+        claims = json.loads(urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (ValueError, TypeError):
+        return None
+    
+    if not isinstance(claims, dict) or not _JOSE_ONLY_CLAIMS.isdisjoint(claims):
+        return None
+    # Same claim rules as jose.jwt.decode, with no leeway
+    for time_claim in ("exp", "iat"):
+        if time_claim in claims and type(claims[time_claim]) is not int:
+            return None
+    if "exp" in claims and claims["exp"] < int(time.time()):
+        return None
+    for string_claim in ("sub", "jti"):
+        if string_claim in claims and not isinstance(claims[string_claim], str):
+            return None
+    return claims
+
+
+def verify_password(plain_password: str, hashed_password: Union[str, bytes]) -> bool:
     """
     Verify a password against its hash.
     
     Args:
         plain_password: The plain text password to verify
-        hashed_password: The hashed password to compare against
+        hashed_password: The hashed password to compare against, as stored
+            (str) or already encoded (bytes)
         
     Returns:
         True if password matches, False otherwise
     """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
     try:
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'), 
-            hashed_password.encode('utf-8')
-        )
-    except Exception:
+        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password)
+    except (ValueError, TypeError):
+        # Malformed or missing stored hash
         return False
 
 
@@ -59,26 +130,16 @@ def create_access_token(
     Returns:
         The encoded JWT token
     """
-    to_encode = data.copy()
-    
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # NumericDates straight from the clock, with no datetime round trip
+    now = time.time()
+    lifetime = expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({
-        "exp": expire,
-        "iat": datetime.utcnow(),
+    return _encode_token({
+        **data,
+        "exp": int(now + lifetime.total_seconds()),
+        "iat": int(now),
         "type": "access"
     })
-    
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.SECRET_KEY, 
-        algorithm=settings.ALGORITHM
-    )
-    
-    return encoded_jwt
 
 
 def create_refresh_token(
@@ -95,27 +156,17 @@ def create_refresh_token(
     Returns:
         The encoded JWT refresh token
     """
-    to_encode = data.copy()
+    # NumericDates straight from the clock, with no datetime round trip
+    now = time.time()
+    lifetime = expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    
-    to_encode.update({
-        "exp": expire,
-        "iat": datetime.utcnow(),
+    return _encode_token({
+        **data,
+        "exp": int(now + lifetime.total_seconds()),
+        "iat": int(now),
         "type": "refresh",
-        "jti": secrets.token_hex(16)  # Unique token ID
+        "jti": urandom(16).hex()  # Unique token ID
     })
-    
-    encoded_jwt = jwt.encode(
-        to_encode, 
-        settings.SECRET_KEY, 
-        algorithm=settings.ALGORITHM
-    )
-    
-    return encoded_jwt
 
 
 def decode_token(token: str) -> Optional[Dict[str, Any]]:
@@ -128,6 +179,10 @@ def decode_token(token: str) -> Optional[Dict[str, Any]]:
     Returns:
         The decoded token data or None if invalid
     """
+    payload = _decode_issued_token(token)
+    if payload is not None:
+        return payload
+    
     try:
         payload = jwt.decode(
             token, 
@@ -161,9 +216,9 @@ def generate_api_key() -> str:
     Generate a secure API key.
     
     Returns:
-        A random 32-character hex string
+        A random 64-character hex string (32 bytes)
     """
-    return secrets.token_hex(32)
+    return urandom(32).hex()
 
 
 def is_token_expired(payload: Dict[str, Any]) -> bool:
@@ -180,7 +235,7 @@ def is_token_expired(payload: Dict[str, Any]) -> bool:
     if not exp:
         return True
     
-    if isinstance(exp, int):
-        exp = datetime.fromtimestamp(exp)
+    if isinstance(exp, datetime):
+        return datetime.utcnow() > exp
     
-    return datetime.utcnow() > exp
+    return time.time() > exp
@@ -0,0 +1,46 @@
+"""
+JSON encoding through orjson when installed, the stdlib json module otherwise.
+"""
+
+from datetime import datetime
+from typing import Any, Union
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _json_default(value: Any) -> str:
+    """Encode datetimes for the stdlib fallback the way orjson does natively."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, indent: bool = False, non_str_keys: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes; datetimes become ISO 8601 strings.
+    
+    Args:
+        obj: The value to encode
+        indent: Pretty-print with a 2-space indent
+        non_str_keys: Stringify non-str dict keys, as json.dumps always does
+    """
+    if ORJSON_AVAILABLE:
+        option = 0
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if non_str_keys:
+            option |= orjson.OPT_NON_STR_KEYS
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=_json_default).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse a JSON document."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -37,28 +37,23 @@ def fix_database():
         except Exception as e:
             print(f"Error checking device_activity: {e}")
         
-        # Check devices count for ML training
+        # Devices and scan_results counts, fetched in one round trip
         print("\nChecking device count for ML training...")
         try:
-            result = conn.execute(text("SELECT COUNT(*) FROM devices"))
-            count = result.scalar()
-            print(f"Total devices: {count}")
+            device_count, scan_count = conn.execute(text(
+                "SELECT (SELECT COUNT(*) FROM devices), (SELECT COUNT(*) FROM scan_results)"
+            )).one()
+            print(f"Total devices: {device_count}")
             
-            if count >= 10:
+            if device_count >= 10:
                 print("✓ Sufficient devices for ML training (minimum: 10)")
             else:
-                print(f"✗ Need at least 10 devices for ML training (current: {count})")
-        except Exception as e:
-            print(f"Error checking devices: {e}")
-        
-        # Check scan_results count
-        print("\nChecking scan_results count...")
-        try:
-            result = conn.execute(text("SELECT COUNT(*) FROM scan_results"))
-            count = result.scalar()
-            print(f"Total scan results: {count}")
+                print(f"✗ Need at least 10 devices for ML training (current: {device_count})")
+            
+            print("\nChecking scan_results count...")
+            print(f"Total scan results: {scan_count}")
         except Exception as e:
-            print(f"Error checking scan_results: {e}")
+            print(f"Error checking devices and scan_results: {e}")
         
         conn.commit()
         print("\n✓ Database check complete!")
@@ -4,8 +4,10 @@ sys.path.insert(0, '.')
 
 import bcrypt
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
 
-engine = create_engine("mysql+pymysql://root:@localhost:3306/wifi_tracker")
+# One-shot script: a single unpooled connection, closed on exit
+engine = create_engine("mysql+pymysql://root:@localhost:3306/wifi_tracker", poolclass=NullPool)
 with engine.connect() as conn:
     result = conn.execute(text("SELECT id, username, password_hash FROM users WHERE username='admin'"))
     row = result.fetchone()
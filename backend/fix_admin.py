@@ -4,6 +4,7 @@ sys.path.insert(0, '.')
 
 import bcrypt
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import NullPool
 
 # Generate hash
 password = "admin123"
@@ -12,15 +13,15 @@ hashed = bcrypt.hashpw(password.encode('utf-8'), salt).decode('utf-8')
 print(f"Generated hash: {hashed}")
 
 # Update database
-engine = create_engine("mysql+pymysql://root:@localhost:3306/wifi_tracker")
-with engine.connect() as conn:
+# One-shot script: a single unpooled connection, closed on exit
+engine = create_engine("mysql+pymysql://root:@localhost:3306/wifi_tracker", poolclass=NullPool)
+with engine.begin() as conn:
     # First check if user exists
     result = conn.execute(text("SELECT id, password_hash FROM users WHERE username='admin'"))
     row = result.fetchone()
     if row:
         print(f"Current hash in DB: {row[1]}")
         conn.execute(text(f"UPDATE users SET password_hash=:hash WHERE username='admin'"), {"hash": hashed})
-        conn.commit()
         print("Password updated successfully!")
     else:
         print("Admin user not found!")
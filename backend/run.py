@@ -3,7 +3,6 @@ Application runner script.
 Run with: python run.py
 """
 
-import uvicorn
 from app.config import settings
 
 if __name__ == "__main__":
@@ -19,6 +18,10 @@ if __name__ == "__main__":
     Press CTRL+C to stop the server.
     """)
     
+    # Deferred so the banner (and any config error) shows before the
+    # server stack is imported; the app itself loads from the import string
+    import uvicorn
+    
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
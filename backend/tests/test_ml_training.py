@@ -0,0 +1,94 @@
+"""
+Tests for the ML training endpoint's history loading.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import dashboard
+
+
+class UnbufferedSession:
+    """
+    Session stand-in with PyMySQL unbuffered-cursor semantics.
+    
+    Running a query throws away whatever the previous query has not yet
+    returned, as PyMySQL does before sending the next command.
+    """
+    
+    def __init__(self, rows_by_table):
+        self.rows_by_table = rows_by_table
+        self._pending = None
+    
+    def execute(self, statement):
+        if self._pending is not None:
+            self._pending.clear()
+        table = statement.get_final_froms()[0].name
+        self._pending = list(self.rows_by_table[table])
+        return UnbufferedResult(self._pending)
+
+
+class UnbufferedResult:
+    """Rows handed out one at a time from the session's open cursor."""
+    
+    def __init__(self, pending):
+        self._pending = pending
+    
+    def __iter__(self):
+        while self._pending:
+            yield self._pending.pop(0)
+    
+    def all(self):
+        return list(self)
+
+
+class RecordingDetector:
+    """Detector stand-in that keeps the columns it was trained on."""
+    
+    def __init__(self):
+        self.columns = None
+    
+    def train(self, columns):
+        self.columns = columns
+        return {"trained": True}
+
+
+def test_train_reads_every_history_row(monkeypatch):
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    n_scans, n_activities = 25, 7
+    db = UnbufferedSession({
+        "devices": [(1, now, False, "Apple"), (2, now, True, None)],
+        "scan_results": [
+            (1 + i % 2, f"192.168.1.{i}", -50 - i, now + timedelta(minutes=i), 1.5)
+            for i in range(n_scans)
+        ],
+        "device_activity": [
+            (1, "connected", now + timedelta(minutes=i)) for i in range(n_activities)
+        ],
+    })
+    detector = RecordingDetector()
+    monkeypatch.setattr(dashboard, "get_anomaly_detector", lambda: detector)
+    
+    dashboard.train_ml_models(current_user=SimpleNamespace(username="admin"), db=db)
+    
+    columns = detector.columns
+    assert len(columns.device_ids) == 2
+    assert len(columns.scan_device_ids) == n_scans
+    assert columns.scan_rssi.tolist() == [-50.0 - i for i in range(n_scans)]
+    assert len(columns.activity_device_ids) == n_activities
+
+
+def test_train_refuses_concurrent_run(monkeypatch):
+    detector = RecordingDetector()
+    monkeypatch.setattr(dashboard, "get_anomaly_detector", lambda: detector)
+    db = UnbufferedSession({"devices": [], "scan_results": [], "device_activity": []})
+    
+    with dashboard._ml_train_lock:
+        with pytest.raises(HTTPException) as excinfo:
+            dashboard.train_ml_models(current_user=SimpleNamespace(username="admin"), db=db)
+    
+    assert excinfo.value.status_code == 409
+    assert detector.columns is None
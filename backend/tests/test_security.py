@@ -0,0 +1,131 @@
+"""
+Tests that the HS256 fast path decodes tokens exactly as python-jose does.
+"""
+
+import json
+from base64 import urlsafe_b64decode
+from datetime import timedelta
+
+import pytest
+from jose import JWTError, jwt
+
+from app.config import settings
+from app.utils import security
+from app.utils.security import (
+    _HS256_HEADER,
+    _b64url,
+    _decode_issued_token,
+    _sign_hs256,
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+)
+
+
+def _jose_decode(token: str):
+    """Claims as python-jose decodes them, or None where it rejects the token."""
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+
+
+def _segment(obj) -> str:
+    return _b64url(json.dumps(obj, separators=(",", ":")).encode("utf-8"))
+
+
+def _signed(payload: str, header: str = _HS256_HEADER) -> str:
+    """A token over raw header and payload segments with a valid HS256 signature."""
+    signing_input = f"{header}.{payload}"
+    return f"{signing_input}.{_sign_hs256(signing_input)}"
+
+
+def _assert_matches_jose(token: str):
+    expected = _jose_decode(token)
+    fast = _decode_issued_token(token)
+    # The fast path may defer to jose, but never disagrees with it
+    assert fast is None or fast == expected
+    assert decode_token(token) == expected
+    return expected, fast
+
+
+@pytest.fixture(autouse=True)
+def _require_hs256():
+    if not security._HS256:
+        pytest.skip("fast path only covers HS256")
+
+
+def test_valid_tokens_take_fast_path():
+    for token in (
+        create_access_token({"sub": "admin", "role": "admin"}),
+        create_refresh_token({"sub": "admin"}),
+    ):
+        expected, fast = _assert_matches_jose(token)
+        assert expected is not None
+        assert fast == expected
+
+
+def test_expired_token():
+    token = create_access_token({"sub": "admin"}, expires_delta=timedelta(seconds=-10))
+    expected, _ = _assert_matches_jose(token)
+    assert expected is None
+
+
+def test_tampered_signature():
+    header, payload, _ = create_access_token({"sub": "admin"}).split(".")
+    forged = _sign_hs256(f"{header}.{_segment({'sub': 'someone-else'})}")
+    expected, _ = _assert_matches_jose(f"{header}.{payload}.{forged}")
+    assert expected is None
+
+
+def test_tampered_payload():
+    header, payload, signature = create_access_token({"sub": "user", "role": "viewer"}).split(".")
+    claims = json.loads(urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    claims["role"] = "admin"
+    expected, _ = _assert_matches_jose(f"{header}.{_segment(claims)}.{signature}")
+    assert expected is None
+
+
+def test_changed_header():
+    payload = _segment({"sub": "admin", "exp": 4102444800})
+    
+    # alg "none" with an empty signature
+    expected, _ = _assert_matches_jose(f"{_segment({'alg': 'none', 'typ': 'JWT'})}.{payload}.")
+    assert expected is None
+    
+    # A different algorithm, validly signed with the same key
+    hs512 = jwt.encode({"sub": "admin"}, settings.SECRET_KEY, algorithm="HS512")
+    expected, _ = _assert_matches_jose(hs512)
+    assert expected is None
+    
+    # An HS256 header the fast path does not issue is left to jose
+    with_kid = jwt.encode({"sub": "admin"}, settings.SECRET_KEY, algorithm="HS256", headers={"kid": "1"})
+    expected, fast = _assert_matches_jose(with_kid)
+    assert expected == {"sub": "admin"}
+    assert fast is None
+
+
+def test_claims_jose_validates():
+    for claims in (
+        {"sub": "admin", "nbf": 4102444800},
+        {"sub": "admin", "exp": "4102444800"},
+        {"sub": 42},
+        {"sub": "admin", "iat": 1.5},
+    ):
+        _assert_matches_jose(_signed(_segment(claims)))
+
+
+@pytest.mark.parametrize("token", [
+    "",
+    "not-a-token",
+    "a.b",
+    "a.b.c",
+    "a.b.c.d",
+    f"{_HS256_HEADER}.!!!.sig",
+    _signed("bm90IGpzb24"),
+    _signed(_segment(["sub", "admin"])),
+    create_access_token({"sub": "admin"})[:-3],
+])
+def test_malformed_tokens(token):
+    expected, _ = _assert_matches_jose(token)
+    assert expected is None
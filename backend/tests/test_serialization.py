@@ -0,0 +1,106 @@
+"""
+Tests for the wire format of model timestamps.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from app.models.device import Device
+from app.models.scan_result import ScanResult, ScanSession
+from app.models.settings import Settings, SettingType
+from app.models.user import User
+from app.routers import scans
+
+STARTED = datetime(2024, 1, 15, 10, 30, 0)
+COMPLETED = STARTED + timedelta(seconds=42, microseconds=500)
+
+
+def _session() -> ScanSession:
+    return ScanSession(
+        id=7, started_at=STARTED, completed_at=COMPLETED,
+        total_devices_found=1, new_devices_found=0, scan_type="arp",
+        network_range="192.168.1.0/24", status="completed", error_message=None
+    )
+
+
+def _result() -> ScanResult:
+    return ScanResult(
+        id=156, device_id=1, session_id=7, ip_address="192.168.1.105", rssi=-55,
+        scan_timestamp=COMPLETED, is_connected=True, response_time_ms=2.5
+    )
+
+
+def test_to_dict_timestamps_are_iso_strings():
+    user = User(
+        id=1, username="admin", email="admin@wifitracker.local", role="admin",
+        is_active=True, created_at=STARTED, last_login=None
+    )
+    setting = Settings(
+        id=1, setting_key="scan_interval_seconds", setting_value="300",
+        setting_type=SettingType.INT, description=None, updated_at=STARTED
+    )
+    device = Device(id=1, mac_address="AA:BB:CC:DD:EE:FF", first_seen=STARTED, last_seen=COMPLETED)
+    device.scan_results = [_result()]
+    
+    assert _session().to_dict()["started_at"] == "2024-01-15T10:30:00"
+    assert _session().to_dict()["completed_at"] == "2024-01-15T10:30:42.000500"
+    assert _result().to_dict()["scan_timestamp"] == "2024-01-15T10:30:42.000500"
+    assert user.to_dict()["created_at"] == "2024-01-15T10:30:00"
+    assert user.to_dict()["last_login"] is None
+    assert setting.to_dict()["updated_at"] == "2024-01-15T10:30:00"
+    assert device.to_dict(include_latest_scan=True)["latest_scan"]["scan_timestamp"] == (
+        "2024-01-15T10:30:42.000500"
+    )
+
+
+class _SessionQuery:
+    """Just enough of Session.query(...).filter(...).first()."""
+    
+    def __init__(self, session):
+        self._session = session
+    
+    def query(self, *entities):
+        return self
+    
+    def filter(self, *criteria):
+        return self
+    
+    def first(self):
+        return self._session
+
+
+class _ResultsSession:
+    """Just enough of SessionLocal() for the streamed results query."""
+    
+    def __init__(self, rows):
+        self._rows = rows
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def execute(self, statement):
+        return self
+    
+    def scalars(self):
+        return self
+    
+    def partitions(self):
+        yield self._rows
+
+
+def test_scan_results_body_uses_one_timestamp_format(monkeypatch):
+    monkeypatch.setattr(scans, "SessionLocal", lambda: _ResultsSession([_result()]))
+    response = scans.get_scan_results(7, current_user=None, db=_SessionQuery(_session()))
+    
+    async def read_body():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    
+    body = json.loads(asyncio.run(read_body()))
+    
+    assert body["session"]["started_at"] == "2024-01-15T10:30:00"
+    assert body["session"]["completed_at"] == "2024-01-15T10:30:42.000500"
+    assert body["results"][0]["scan_timestamp"] == "2024-01-15T10:30:42.000500"
@@ -172,6 +172,7 @@ class ApiClient {
         if (filters.is_trusted !== undefined) params.append('is_trusted', filters.is_trusted);
         if (filters.is_suspicious !== undefined) params.append('is_suspicious', filters.is_suspicious);
         if (filters.is_online !== undefined) params.append('is_online', filters.is_online);
+        if (filters.cursor) params.append('cursor', filters.cursor);
 
         return this.request(`/devices?${params}`);
     }
@@ -215,8 +216,11 @@ class ApiClient {
         return this.request('/scans/status');
     }
 
-    async getScanHistory(page = 1, pageSize = 20) {
-        return this.request(`/scans/history?page=${page}&page_size=${pageSize}`);
+    async getScanHistory(page = 1, pageSize = 20, cursor = null) {
+        const params = new URLSearchParams({ page, page_size: pageSize });
+        if (cursor) params.append('cursor', cursor);
+
+        return this.request(`/scans/history?${params}`);
     }
 
     async getScanResults(sessionId) {
@@ -230,6 +234,7 @@ class ApiClient {
         if (filters.alert_type) params.append('alert_type', filters.alert_type);
         if (filters.severity) params.append('severity', filters.severity);
         if (filters.is_acknowledged !== undefined) params.append('is_acknowledged', filters.is_acknowledged);
+        if (filters.cursor) params.append('cursor', filters.cursor);
 
         return this.request(`/alerts?${params}`);
     }
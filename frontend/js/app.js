@@ -331,6 +331,7 @@ class App {
 
         try {
             this.websocket = new WebSocket(wsUrl);
+            this.websocket.binaryType = 'arraybuffer';
 
             this.websocket.onopen = () => {
                 console.log('WebSocket connected');
@@ -349,7 +350,12 @@ class App {
             };
 
             this.websocket.onmessage = (event) => {
-                this.handleWebSocketMessage(JSON.parse(event.data));
+                if (event.data === 'pong') return;
+
+                // A frame holds one message object, or an array of them for a burst
+                const payload = JSON.parse(event.data);
+                const messages = Array.isArray(payload) ? payload : [payload];
+                messages.forEach((message) => this.handleWebSocketMessage(message));
             };
 
         } catch (error) {
@@ -0,0 +1,101 @@
+-- WiFi Tracker System Database Migration
+-- Brings a database created by an earlier setup_database.sql up to the
+-- current schema. Every step checks information_schema first, so the
+-- script is safe to run more than once (and on a fresh database).
+
+USE wifi_tracker;
+
+DELIMITER //
+
+-- Add a column unless the table already has it
+DROP PROCEDURE IF EXISTS migrate_add_column //
+CREATE PROCEDURE migrate_add_column(IN tbl VARCHAR(64), IN col VARCHAR(64), IN col_def TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND COLUMN_NAME = col
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE `', tbl, '` ADD COLUMN `', col, '` ', col_def);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+-- Create an index unless the table already has one of that name
+DROP PROCEDURE IF EXISTS migrate_add_index //
+CREATE PROCEDURE migrate_add_index(IN tbl VARCHAR(64), IN idx VARCHAR(64), IN cols TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND INDEX_NAME = idx
+    ) THEN
+        SET @ddl = CONCAT('CREATE INDEX `', idx, '` ON `', tbl, '` (', cols, ')');
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+-- Add a foreign key unless the column already references another table
+DROP PROCEDURE IF EXISTS migrate_add_foreign_key //
+CREATE PROCEDURE migrate_add_foreign_key(IN tbl VARCHAR(64), IN col VARCHAR(64), IN fk_def TEXT)
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM information_schema.KEY_COLUMN_USAGE
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = tbl AND COLUMN_NAME = col
+            AND REFERENCED_TABLE_NAME IS NOT NULL
+    ) THEN
+        SET @ddl = CONCAT('ALTER TABLE `', tbl, '` ADD FOREIGN KEY (`', col, '`) ', fk_def);
+        PREPARE stmt FROM @ddl;
+        EXECUTE stmt;
+        DEALLOCATE PREPARE stmt;
+    END IF;
+END //
+
+DELIMITER ;
+
+-- ml_predictions.model_type: ENUM -> VARCHAR(30), indexed
+ALTER TABLE ml_predictions MODIFY model_type VARCHAR(30) NOT NULL;
+CALL migrate_add_index('ml_predictions', 'idx_prediction_model_type', 'model_type');
+
+-- Per-device history in time order: (device_id, timestamp) composites
+CALL migrate_add_index('scan_results', 'ix_scan_results_device_ts', 'device_id, scan_timestamp');
+CALL migrate_add_index('device_activity', 'ix_device_activity_device_ts', 'device_id, event_timestamp');
+
+-- ml_predictions.anomaly_score_q: quantized score, backfilled from the float
+CALL migrate_add_column('ml_predictions', 'anomaly_score_q', 'SMALLINT NOT NULL DEFAULT 0 AFTER anomaly_score');
+UPDATE ml_predictions
+SET anomaly_score_q = ROUND(LEAST(GREATEST(anomaly_score, 0), 1) * 255)
+WHERE anomaly_score_q = 0 AND anomaly_score > 0;
+CALL migrate_add_index('ml_predictions', 'idx_prediction_score_q', 'anomaly_score_q');
+
+-- Dashboard and alert list hot paths
+CALL migrate_add_index('devices', 'idx_first_seen', 'first_seen');
+CALL migrate_add_index('alerts', 'ix_alerts_ack_created', 'is_acknowledged, created_at');
+CALL migrate_add_index('scan_sessions', 'ix_scan_sessions_status_completed', 'status, completed_at');
+CALL migrate_add_index('alerts', 'ix_alerts_device_created', 'device_id, created_at');
+
+-- scan_results.session_id: the scan session that produced each row
+CALL migrate_add_column('scan_results', 'session_id', 'INT NULL AFTER device_id');
+CALL migrate_add_index('scan_results', 'idx_scan_session', 'session_id');
+CALL migrate_add_foreign_key('scan_results', 'session_id', 'REFERENCES scan_sessions(id) ON DELETE SET NULL');
+-- Older rows: attribute by the session's time window, as results were looked up before
+UPDATE scan_results sr
+JOIN scan_sessions ss
+    ON sr.scan_timestamp >= ss.started_at
+    AND sr.scan_timestamp <= COALESCE(ss.completed_at, NOW())
+SET sr.session_id = ss.id
+WHERE sr.session_id IS NULL;
+
+-- devices.search_text: generated search column behind the device list filter
+CALL migrate_add_column('devices', 'search_text', 'VARCHAR(374) GENERATED ALWAYS AS (
+    LOWER(CONCAT_WS(CHAR(31 USING utf8mb4), mac_address, hostname, vendor))
+) STORED');
+CALL migrate_add_index('devices', 'ix_devices_search_text', 'search_text');
+
+DROP PROCEDURE migrate_add_column;
+DROP PROCEDURE migrate_add_index;
+DROP PROCEDURE migrate_add_foreign_key;
+
+SELECT 'Database migration completed successfully!' AS Status;
@@ -31,24 +31,47 @@ CREATE TABLE IF NOT EXISTS devices (
     is_trusted BOOLEAN DEFAULT FALSE,
     is_suspicious BOOLEAN DEFAULT FALSE,
     notes TEXT,
-    INDEX idx_mac_address (mac_address),
+    search_text VARCHAR(374) GENERATED ALWAYS AS (
+        LOWER(CONCAT_WS(CHAR(31 USING utf8mb4), mac_address, hostname, vendor))
+    ) STORED,
+    INDEX idx_first_seen (first_seen),
     INDEX idx_last_seen (last_seen),
-    INDEX idx_is_trusted (is_trusted)
+    INDEX idx_is_trusted (is_trusted),
+    INDEX ix_devices_search_text (search_text)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Scan sessions table to track scan batches
+CREATE TABLE IF NOT EXISTS scan_sessions (
+    id INT PRIMARY KEY AUTO_INCREMENT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    completed_at TIMESTAMP NULL,
+    total_devices_found INT DEFAULT 0,
+    new_devices_found INT DEFAULT 0,
+    scan_type ENUM('arp', 'icmp', 'full') DEFAULT 'arp',
+    network_range VARCHAR(50),
+    status ENUM('running', 'completed', 'failed') DEFAULT 'running',
+    error_message TEXT,
+    INDEX idx_session_started (started_at),
+    INDEX idx_session_status (status),
+    INDEX ix_scan_sessions_status_completed (status, completed_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Scan results table for individual scan data points
 CREATE TABLE IF NOT EXISTS scan_results (
     id INT PRIMARY KEY AUTO_INCREMENT,
     device_id INT NOT NULL,
+    session_id INT NULL,
     ip_address VARCHAR(45) NOT NULL,
     rssi INT DEFAULT NULL,
     scan_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     is_connected BOOLEAN DEFAULT TRUE,
     response_time_ms FLOAT DEFAULT NULL,
     FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE,
-    INDEX idx_device_id (device_id),
+    FOREIGN KEY (session_id) REFERENCES scan_sessions(id) ON DELETE SET NULL,
+    INDEX idx_scan_session (session_id),
     INDEX idx_scan_timestamp (scan_timestamp),
-    INDEX idx_ip_address (ip_address)
+    INDEX idx_ip_address (ip_address),
+    INDEX ix_scan_results_device_ts (device_id, scan_timestamp)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Device activity log for connection/disconnection events
@@ -60,9 +83,9 @@ CREATE TABLE IF NOT EXISTS device_activity (
     new_value VARCHAR(100),
     event_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE,
-    INDEX idx_device_activity (device_id),
     INDEX idx_event_timestamp (event_timestamp),
-    INDEX idx_event_type (event_type)
+    INDEX idx_event_type (event_type),
+    INDEX ix_device_activity_device_ts (device_id, event_timestamp)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Alerts table for security notifications
@@ -82,15 +105,18 @@ CREATE TABLE IF NOT EXISTS alerts (
     INDEX idx_alert_created (created_at),
     INDEX idx_alert_type (alert_type),
     INDEX idx_severity (severity),
-    INDEX idx_acknowledged (is_acknowledged)
+    INDEX idx_acknowledged (is_acknowledged),
+    INDEX ix_alerts_ack_created (is_acknowledged, created_at),
+    INDEX ix_alerts_device_created (device_id, created_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- ML predictions table for anomaly detection results
 CREATE TABLE IF NOT EXISTS ml_predictions (
     id INT PRIMARY KEY AUTO_INCREMENT,
     device_id INT NOT NULL,
-    model_type ENUM('isolation_forest', 'autoencoder', 'ensemble') NOT NULL,
+    model_type VARCHAR(30) NOT NULL,
     anomaly_score FLOAT NOT NULL,
+    anomaly_score_q SMALLINT NOT NULL DEFAULT 0,
     is_anomaly BOOLEAN NOT NULL,
     confidence FLOAT DEFAULT NULL,
     features JSON,
@@ -98,22 +124,9 @@ CREATE TABLE IF NOT EXISTS ml_predictions (
     FOREIGN KEY (device_id) REFERENCES devices(id) ON DELETE CASCADE,
     INDEX idx_prediction_device (device_id),
     INDEX idx_prediction_timestamp (prediction_timestamp),
-    INDEX idx_is_anomaly (is_anomaly)
-) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
-
--- Scan sessions table to track scan batches
-CREATE TABLE IF NOT EXISTS scan_sessions (
-    id INT PRIMARY KEY AUTO_INCREMENT,
-    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    completed_at TIMESTAMP NULL,
-    total_devices_found INT DEFAULT 0,
-    new_devices_found INT DEFAULT 0,
-    scan_type ENUM('arp', 'icmp', 'full') DEFAULT 'arp',
-    network_range VARCHAR(50),
-    status ENUM('running', 'completed', 'failed') DEFAULT 'running',
-    error_message TEXT,
-    INDEX idx_session_started (started_at),
-    INDEX idx_session_status (status)
+    INDEX idx_prediction_model_type (model_type),
+    INDEX idx_is_anomaly (is_anomaly),
+    INDEX idx_prediction_score_q (anomaly_score_q)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Settings table for application configuration
@@ -127,6 +140,36 @@ CREATE TABLE IF NOT EXISTS settings (
     INDEX idx_setting_key (setting_key)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
+-- Row counters for unfiltered totals, kept current by the triggers below
+CREATE TABLE IF NOT EXISTS counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value BIGINT NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+DROP TRIGGER IF EXISTS trg_devices_count_insert;
+CREATE TRIGGER trg_devices_count_insert AFTER INSERT ON devices
+FOR EACH ROW UPDATE counters SET value = value + 1 WHERE name = 'devices';
+
+DROP TRIGGER IF EXISTS trg_devices_count_delete;
+CREATE TRIGGER trg_devices_count_delete AFTER DELETE ON devices
+FOR EACH ROW UPDATE counters SET value = value - 1 WHERE name = 'devices';
+
+DROP TRIGGER IF EXISTS trg_scan_sessions_count_insert;
+CREATE TRIGGER trg_scan_sessions_count_insert AFTER INSERT ON scan_sessions
+FOR EACH ROW UPDATE counters SET value = value + 1 WHERE name = 'scan_sessions';
+
+DROP TRIGGER IF EXISTS trg_scan_sessions_count_delete;
+CREATE TRIGGER trg_scan_sessions_count_delete AFTER DELETE ON scan_sessions
+FOR EACH ROW UPDATE counters SET value = value - 1 WHERE name = 'scan_sessions';
+
+-- Seed (or resync) the counters from the current row counts
+INSERT INTO counters (name, value)
+SELECT 'devices', COUNT(*) FROM devices
+ON DUPLICATE KEY UPDATE value = VALUES(value);
+INSERT INTO counters (name, value)
+SELECT 'scan_sessions', COUNT(*) FROM scan_sessions
+ON DUPLICATE KEY UPDATE value = VALUES(value);
+
 -- Insert default settings
 INSERT INTO settings (setting_key, setting_value, setting_type, description) VALUES
 ('scan_interval_seconds', '300', 'int', 'Interval between automatic network scans'),